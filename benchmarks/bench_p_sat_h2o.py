@@ -0,0 +1,61 @@
+"""
+Benchmark the fast tabulated mode of `ecoflux.physchem.sat_vap.p_sat_h2o`.
+
+Only the Goff-Gratch equation is tabulated; the Buck and CIMO equations
+ignore `fast` and are not benchmarked.
+
+Run from the repository root with ``python benchmarks/bench_p_sat_h2o.py``.
+It prints the time per call of the exact and fast evaluations, the speedup,
+and the maximum relative error of the fast mode, for arrays of temperature
+of several sizes (e.g., 36000 is a half-hour of 20 Hz data).
+"""
+
+import timeit
+
+import numpy as np
+
+from ecoflux.physchem.sat_vap import p_sat_h2o
+
+
+def main():
+    rng = np.random.default_rng(42)
+    p_sat_h2o(0.0, fast=True)  # build the table outside of the timing
+    print(
+        "%8s %12s %12s %8s %10s"
+        % ("size", "exact [ms]", "fast [ms]", "speedup", "max error")
+    )
+    for size in (1000, 36000, 1000000):
+        temp = rng.uniform(-30.0, 45.0, size)
+        p_sat_h2o(temp, fast=True)
+        number = max(1, 2000000 // size)
+        t_exact = min(
+            timeit.repeat(
+                lambda: p_sat_h2o(temp),
+                number=number,
+                repeat=5,
+            )
+        )
+        t_fast = min(
+            timeit.repeat(
+                lambda: p_sat_h2o(temp, fast=True),
+                number=number,
+                repeat=5,
+            )
+        )
+        error = np.max(
+            np.abs(p_sat_h2o(temp, fast=True) / p_sat_h2o(temp) - 1.0)
+        )
+        print(
+            "%8d %12.4f %12.4f %8.1f %10.1e"
+            % (
+                size,
+                t_exact / number * 1e3,
+                t_fast / number * 1e3,
+                t_exact / t_fast,
+                error,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+=====================================
+Flux processing (:mod:`ecoflux.flux`)
+=====================================
+
+.. currentmodule:: ecoflux.flux
+
+Functions to calculate turbulent fluxes from high-frequency measurements.
+
+"""
+
+from . import (  # noqa
+    eddycov,
+    footprint,
+    partitioning,
+    qc,
+    rotation,
+    spectra,
+    spectral_correction,
+    turbulence,
+    ustar,
+)
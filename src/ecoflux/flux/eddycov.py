@@ -0,0 +1,314 @@
+"""Eddy covariance fluxes from block-averaged high-frequency data."""
+
+from collections import namedtuple
+
+import numpy as _np
+import scipy.constants as _sc
+from scipy import fft as _fft
+
+from ecoflux.constants import constants
+from ecoflux.physchem.latent_heat import latent_heat_vap
+
+T_0: float = _sc.zero_Celsius
+
+
+def to_blocks(series, block_size):
+    """
+    Reshape a time series into consecutive averaging blocks.
+
+    Parameters
+    ----------
+    series : array_like
+        Input time series. Blocks are taken along the first axis.
+    block_size : int
+        Number of samples per block, e.g., 36000 for 30 min at 20 Hz.
+
+    Returns
+    -------
+    array_like
+        Array with the shape ``(n_blocks, block_size) + series.shape[1:]``.
+        An incomplete last block is padded with NaNs.
+
+    """
+    series = _np.asarray(series, dtype="d")
+    block_size = int(block_size)
+    n = series.shape[0]
+    n_blocks = -(-n // block_size)
+    if n_blocks * block_size != n:
+        pad_width = [(0, n_blocks * block_size - n)] + [(0, 0)] * (
+            series.ndim - 1
+        )
+        series = _np.pad(series, pad_width, constant_values=_np.nan)
+    return series.reshape((n_blocks, block_size) + series.shape[1:])
+
+
+def block_cov(x, y, block_size, ddof=1):
+    """
+    Calculate the covariances of two time series in averaging blocks.
+
+    Fluctuations are deviations from the block averages. Samples where either
+    series is NaN are ignored.
+
+    Parameters
+    ----------
+    x, y : array_like
+        Two time series of the same length, e.g., vertical wind speed and a
+        scalar.
+    block_size : int
+        Number of samples per block, e.g., 36000 for 30 min at 20 Hz.
+    ddof : int, optional
+        Degree of freedom for covariance calculation. Default is 1.
+
+    Returns
+    -------
+    array_like
+        Covariance in each block.
+
+    See Also
+    --------
+    `lagged_block_cov` : Block covariances at the lags of maximum
+        correlation.
+
+    """
+    x_blk, y_blk, valid = _block_fluctuations(
+        to_blocks(x, block_size), to_blocks(y, block_size)
+    )
+    n = _np.sum(valid, axis=1)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        return _np.where(
+            n > ddof, _np.sum(x_blk * y_blk, axis=1) / (n - ddof), _np.nan
+        )
+
+
+def lagged_block_cov(
+    x, y, block_size, max_lag, min_lag=None, ddof=1, chunk_size=None
+):
+    """
+    Calculate the block covariances at the time lags of maximum correlation.
+
+    The cross-covariance at every lag of every block is computed at once by
+    FFT, and the lag with the largest absolute covariance within
+    [`min_lag`, `max_lag`] is selected for each block. A positive lag means
+    that `y` lags behind `x`, as for a scalar measured by a closed-path
+    analyzer.
+
+    Parameters
+    ----------
+    x, y : array_like
+        Two time series of the same length, e.g., vertical wind speed and a
+        scalar.
+    block_size : int
+        Number of samples per block, e.g., 36000 for 30 min at 20 Hz.
+    max_lag : int
+        Maximum lag to search [samples].
+    min_lag : int, optional
+        Minimum lag to search [samples]. Default is ``-max_lag``.
+    ddof : int, optional
+        Degree of freedom for covariance calculation. Default is 1.
+    chunk_size : int, optional
+        Number of blocks transformed at once, to bound the memory. Default is
+        to use chunks of about 2^24 values.
+
+    Returns
+    -------
+    cov : array_like
+        Covariance in each block at the selected lag.
+    lag : array_like
+        Selected lag in each block [samples]. 0 where no covariance is
+        available; check `valid`.
+    valid : array_like
+        Boolean flags of the blocks with a covariance at any lag, e.g.,
+        False where the whole block is missing.
+
+    See Also
+    --------
+    `block_cov` : Block covariances without time lag.
+
+    """
+    max_lag = int(max_lag)
+    min_lag = -max_lag if min_lag is None else int(min_lag)
+    block_size = int(block_size)
+    if max(abs(min_lag), abs(max_lag)) >= block_size:
+        raise ValueError("Lag search range larger than block size.")
+
+    x_all, y_all = to_blocks(x, block_size), to_blocks(y, block_size)
+    n_blocks = x_all.shape[0]
+    # zero padding long enough to avoid circular wrap-around of the lags
+    n_fft = _fft_size(block_size + max(abs(min_lag), abs(max_lag)))
+    lags = _np.arange(min_lag, max_lag + 1)
+    if chunk_size is None:
+        chunk_size = max(1, 2**24 // n_fft)
+
+    cov = _np.full(n_blocks, _np.nan)
+    lag = _np.zeros(n_blocks, dtype=int)
+    valid_all = _np.zeros(n_blocks, dtype=bool)
+    for start in range(0, n_blocks, int(chunk_size)):
+        chunk = slice(start, start + int(chunk_size))
+        x_blk, y_blk, valid = _block_fluctuations(x_all[chunk], y_all[chunk])
+        # r[l] = sum_t x(t) * y(t + l), and the number of valid pairs
+        xcov = _xcorr(x_blk, y_blk, n_fft)[:, lags]
+        if _np.all(valid):
+            n_pairs = block_size - _np.abs(lags)
+        else:
+            mask = valid.astype("d")
+            n_pairs = _np.rint(_xcorr(mask, mask, n_fft)[:, lags])
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            xcov = _np.where(n_pairs > ddof, xcov / (n_pairs - ddof), _np.nan)
+        valid = _np.any(_np.isfinite(xcov), axis=1)
+        i_max = _np.argmax(_np.nan_to_num(_np.abs(xcov), nan=-1.0), axis=1)
+        cov[chunk] = _np.where(
+            valid, xcov[_np.arange(xcov.shape[0]), i_max], _np.nan
+        )
+        lag[chunk] = _np.where(valid, lags[i_max], 0)
+        valid_all[chunk] = valid
+
+    LaggedBlockCovResult = namedtuple(
+        "LaggedBlockCovResult", ("cov", "lag", "valid")
+    )
+    return LaggedBlockCovResult(cov, lag, valid_all)
+
+
+def air_molar_density(pressure, temp, e_h2o=0.0, kelvin=False):
+    """
+    Calculate the molar density of (dry) air from the ideal gas law.
+
+    Parameters
+    ----------
+    pressure : float or array_like
+        Ambient pressure [Pa].
+    temp : float or array_like
+        Air temperature, in Celsius degree by default.
+    e_h2o : float or array_like, optional
+        Water vapor partial pressure [Pa]. If given, the dry air molar
+        density is returned. Default is 0.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    float or array_like
+        Air molar density [mol m^-3].
+
+    """
+    T_k = _np.asarray(temp, dtype="d") + (not kelvin) * T_0
+    return (_np.asarray(pressure, dtype="d") - e_h2o) / (_sc.R * T_k)
+
+
+def h2o_mole_fraction(mixing_ratio):
+    """
+    Convert the mass mixing ratio of water vapor to its mole fraction.
+
+    Parameters
+    ----------
+    mixing_ratio : float or array_like
+        Water vapor mass mixing ratio [kg kg^-1 dry air].
+
+    Returns
+    -------
+    float or array_like
+        Water vapor mole fraction [mol mol^-1 dry air].
+
+    """
+    return _np.asarray(mixing_ratio, dtype="d") * constants.M_d / constants.M_w
+
+
+def sensible_heat_flux(cov_w_ts, rho_m):
+    """
+    Calculate the sensible heat flux from the covariance of vertical wind
+    speed and temperature.
+
+    Parameters
+    ----------
+    cov_w_ts : float or array_like
+        Covariance of vertical wind speed and air temperature [m s^-1 K].
+    rho_m : float or array_like
+        Air molar density [mol m^-3].
+
+    Returns
+    -------
+    float or array_like
+        Sensible heat flux [W m^-2].
+
+    """
+    return rho_m * constants.cpm_d * cov_w_ts
+
+
+def latent_heat_flux(cov_w_h2o, rho_m, temp, kelvin=False):
+    """
+    Calculate the latent heat flux from the covariance of vertical wind
+    speed and water vapor mole fraction.
+
+    Parameters
+    ----------
+    cov_w_h2o : float or array_like
+        Covariance of vertical wind speed and water vapor mole fraction
+        [m s^-1 mol mol^-1].
+    rho_m : float or array_like
+        Dry air molar density [mol m^-3].
+    temp : float or array_like
+        Air temperature, in Celsius degree by default.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    float or array_like
+        Latent heat flux [W m^-2].
+
+    """
+    return rho_m * cov_w_h2o * constants.M_w * latent_heat_vap(temp, kelvin)
+
+
+def scalar_flux(cov_w_c, rho_m):
+    """
+    Calculate the flux of a scalar from the covariance of vertical wind speed
+    and the scalar mole fraction.
+
+    Parameters
+    ----------
+    cov_w_c : float or array_like
+        Covariance of vertical wind speed and the scalar mole fraction, e.g.,
+        [m s^-1 µmol mol^-1] for CO2.
+    rho_m : float or array_like
+        Dry air molar density [mol m^-3].
+
+    Returns
+    -------
+    float or array_like
+        Scalar flux, e.g., [µmol m^-2 s^-1] for CO2.
+
+    """
+    return rho_m * cov_w_c
+
+
+def _block_fluctuations(x_blk, y_blk):
+    """
+    A helper function to calculate fluctuations from block averages over the
+    samples where both series are finite; other samples are set to zero.
+    Also returns the mask of valid samples.
+    """
+    valid = _np.isfinite(x_blk) & _np.isfinite(y_blk)
+    n = _np.sum(valid, axis=1)
+    x_blk = _np.where(valid, x_blk, 0.0)
+    y_blk = _np.where(valid, y_blk, 0.0)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = _np.sum(x_blk, axis=1, keepdims=True) / n[:, _np.newaxis]
+        y_mean = _np.sum(y_blk, axis=1, keepdims=True) / n[:, _np.newaxis]
+    x_blk = _np.where(valid, x_blk - x_mean, 0.0)
+    y_blk = _np.where(valid, y_blk - y_mean, 0.0)
+    return x_blk, y_blk, valid
+
+
+def _xcorr(x_blk, y_blk, n_fft):
+    """
+    A helper function to calculate the cross-correlation sums of blocks by
+    FFT; negative lags wrap around to the end.
+    """
+    x_fft = _fft.rfft(x_blk, n=n_fft, axis=1)
+    y_fft = _fft.rfft(y_blk, n=n_fft, axis=1)
+    return _fft.irfft(_np.conj(x_fft) * y_fft, n=n_fft, axis=1)
+
+
+def _fft_size(n):
+    """A helper function to find a fast FFT size of at least `n`."""
+    return _fft.next_fast_len(int(n), real=True)
@@ -0,0 +1,377 @@
+"""Flux footprint parameterization and footprint climatologies."""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as _np
+
+from ecoflux.constants import constants
+
+# parameters of the footprint parameterization [KCRS15]
+_A: float = 1.4524
+_B: float = -1.9914
+_C: float = 1.4622
+_D: float = 0.1359
+_AC: float = 2.17
+_BC: float = 1.66
+_CC: float = 20.0
+# Obukhov length above which the stratification is taken as neutral [m]
+_OLN: float = 5000.0
+
+
+def footprint(
+    x,
+    y,
+    zm,
+    u_star,
+    sigma_v,
+    obukhov_length,
+    wind_dir,
+    h=1500.0,
+    z0=None,
+    u_mean=None,
+):
+    """
+    Calculate the two-dimensional flux footprints of many intervals at once.
+
+    This evaluates the footprint parameterization of Kljun et al. [KCRS15]_
+    analytically on a grid around the tower at the origin. Either the
+    roughness length `z0` or the mean wind speed `u_mean` must be given. The
+    footprints of intervals outside the range of validity (``u_star <=
+    0.1``, ``zm / L < -15.5``, or ``zm >= h``) are NaN.
+
+    Parameters
+    ----------
+    x, y : array_like
+        1D coordinates of the grid cells east and north of the tower [m].
+    zm : float or array_like
+        Measurement height above the zero-plane displacement [m].
+    u_star : array_like
+        Friction velocity [m s^-1].
+    sigma_v : array_like
+        Standard deviation of the crosswind speed [m s^-1].
+    obukhov_length : array_like
+        Obukhov length [m].
+    wind_dir : array_like
+        Wind direction, clockwise from north [degree].
+    h : float or array_like, optional
+        Boundary layer height [m]. Default is 1500 m.
+    z0 : float or array_like, optional
+        Roughness length [m].
+    u_mean : array_like, optional
+        Mean wind speed at `zm` [m s^-1], used if `z0` is not given.
+
+    Returns
+    -------
+    array_like
+        Footprint densities [m^-2] with the shape (n_intervals, len(y),
+        len(x)).
+
+    Raises
+    ------
+    ValueError
+        If neither `z0` nor `u_mean` is given.
+
+    See Also
+    --------
+    `footprint_climatology` : Footprint climatology of many intervals.
+
+    References
+    ----------
+    .. [KCRS15] Kljun, N., Calanca, P., Rotach, M. W., and Schmid, H. P.
+       (2015). A simple two-dimensional parameterisation for Flux Footprint
+       Prediction (FFP). *Geoscientific Model Development*, 8(11),
+       3695–3713. https://doi.org/10.5194/gmd-8-3695-2015
+
+    """
+    grid_x, grid_y = _np.meshgrid(
+        _np.asarray(x, dtype="d"), _np.asarray(y, dtype="d")
+    )
+    params = _footprint_params(
+        zm, u_star, sigma_v, obukhov_length, wind_dir, h, z0, u_mean
+    )
+    return _ffp(grid_x, grid_y, *params)
+
+
+def footprint_climatology(
+    x,
+    y,
+    zm,
+    u_star,
+    sigma_v,
+    obukhov_length,
+    wind_dir,
+    h=1500.0,
+    z0=None,
+    u_mean=None,
+    chunk_size=None,
+    n_workers=None,
+):
+    """
+    Calculate the footprint climatology of many intervals.
+
+    The intervals are evaluated in chunks on the shared grid, and only the
+    running sum is kept in memory. With `n_workers`, the chunks are
+    distributed to a process pool and the partial climatologies merged.
+
+    Parameters
+    ----------
+    x, y, zm, u_star, sigma_v, obukhov_length, wind_dir, h, z0, u_mean
+        See `footprint`.
+    chunk_size : int, optional
+        Number of intervals evaluated at once. Default is to use chunks of
+        about 2^21 grid values.
+    n_workers : int, optional
+        Number of worker processes. Default is to run in the current
+        process.
+
+    Returns
+    -------
+    FootprintClimatology
+        The accumulated climatology.
+
+    See Also
+    --------
+    `FootprintClimatology` : Streaming accumulation of footprints.
+
+    """
+    x = _np.asarray(x, dtype="d")
+    y = _np.asarray(y, dtype="d")
+    params = _footprint_params(
+        zm, u_star, sigma_v, obukhov_length, wind_dir, h, z0, u_mean
+    )
+    n = params[0].shape[0]
+    if chunk_size is None:
+        chunk_size = max(1, 2**21 // (x.size * y.size))
+    chunks = [
+        tuple(p[start : start + chunk_size] for p in params)
+        for start in range(0, n, int(chunk_size))
+    ]
+
+    climatology = FootprintClimatology(x, y)
+    if n_workers is None:
+        for chunk in chunks:
+            climatology._accumulate(chunk)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for partial_clim in executor.map(
+                partial(_chunk_climatology, x, y), chunks
+            ):
+                climatology.merge(partial_clim)
+    return climatology
+
+
+class FootprintClimatology:
+    """
+    Streaming accumulator of a footprint climatology on a fixed grid.
+
+    Footprints are added interval by interval or chunk by chunk with
+    `update`, and only their sum is kept. Partial climatologies on the same
+    grid (e.g., of different months or computed on different cores) can be
+    combined with `merge`.
+
+    Parameters
+    ----------
+    x, y : array_like
+        1D coordinates of the grid cells east and north of the tower [m].
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> x = np.arange(-200.0, 201.0, 2.0)
+    >>> clim = FootprintClimatology(x, x).update(
+    ...     20.0, [0.3, 0.5], 0.6, [-50.0, 200.0], [270.0, 180.0], z0=0.1
+    ... )
+    >>> clim.count
+    2
+
+    """
+
+    def __init__(self, x, y):
+        self.x = _np.asarray(x, dtype="d")
+        self.y = _np.asarray(y, dtype="d")
+        self._sum = _np.zeros((self.y.size, self.x.size))
+        self._count = 0
+
+    @property
+    def count(self):
+        """Number of valid intervals accumulated."""
+        return self._count
+
+    @property
+    def mean(self):
+        """Mean footprint density [m^-2]; NaN if no intervals are valid."""
+        if self._count == 0:
+            return _np.full(self._sum.shape, _np.nan)
+        return self._sum / self._count
+
+    def update(
+        self,
+        zm,
+        u_star,
+        sigma_v,
+        obukhov_length,
+        wind_dir,
+        h=1500.0,
+        z0=None,
+        u_mean=None,
+        chunk_size=None,
+    ):
+        """
+        Add the footprints of intervals to the climatology.
+
+        Parameters
+        ----------
+        zm, u_star, sigma_v, obukhov_length, wind_dir, h, z0, u_mean
+            See `footprint`.
+        chunk_size : int, optional
+            Number of intervals evaluated at once. Default is to use chunks
+            of about 2^21 grid values.
+
+        Returns
+        -------
+        FootprintClimatology
+            The accumulator itself.
+
+        """
+        params = _footprint_params(
+            zm, u_star, sigma_v, obukhov_length, wind_dir, h, z0, u_mean
+        )
+        if chunk_size is None:
+            chunk_size = max(1, 2**21 // self._sum.size)
+        for start in range(0, params[0].shape[0], int(chunk_size)):
+            self._accumulate(
+                tuple(p[start : start + int(chunk_size)] for p in params)
+            )
+        return self
+
+    def merge(self, other):
+        """
+        Merge the climatology of another accumulator into this one.
+
+        Parameters
+        ----------
+        other : FootprintClimatology
+            Another accumulator on the same grid.
+
+        Returns
+        -------
+        FootprintClimatology
+            The accumulator itself.
+
+        Raises
+        ------
+        ValueError
+            If the grids of the accumulators differ.
+
+        """
+        if not (
+            _np.array_equal(self.x, other.x)
+            and _np.array_equal(self.y, other.y)
+        ):
+            raise ValueError("Footprint climatologies on different grids.")
+        self._sum += other._sum
+        self._count += other._count
+        return self
+
+    def _accumulate(self, params):
+        """Add a chunk of prepared interval parameters."""
+        grid_x, grid_y = _np.meshgrid(self.x, self.y)
+        f = _ffp(grid_x, grid_y, *params)
+        valid = _np.isfinite(f[:, 0, 0])
+        self._sum += _np.sum(f[valid], axis=0)
+        self._count += int(_np.sum(valid))
+
+
+def _footprint_params(
+    zm, u_star, sigma_v, obukhov_length, wind_dir, h, z0, u_mean
+):
+    """
+    A helper function to broadcast the interval parameters to 1D arrays and
+    to derive the length scale that converts distances to the dimensionless
+    upwind distance.
+    """
+    if z0 is None and u_mean is None:
+        raise ValueError("Either z0 or u_mean must be given.")
+    zm, u_star, sigma_v, ol, wind_dir, h = (
+        _np.atleast_1d(_np.asarray(a, dtype="d"))
+        for a in _np.broadcast_arrays(
+            zm, u_star, sigma_v, obukhov_length, wind_dir, h
+        )
+    )
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        if z0 is not None:
+            # stability correction of the parameterization
+            psi = _np.where(
+                (ol <= 0.0) | (ol >= _OLN),
+                _psi_unstable(_np.sqrt(_np.sqrt(1.0 - 19.0 * zm / ol))),
+                -5.3 * zm / ol,
+            )
+            profile = _np.log(zm / _np.asarray(z0, dtype="d")) - psi
+        else:
+            profile = _np.asarray(u_mean, dtype="d") / u_star * constants.kappa
+        scale = zm / (1.0 - zm / h) * profile
+        valid = (
+            (u_star > 0.1) & (zm / ol >= -15.5) & (zm < h) & (profile > 0.0)
+        )
+    scale = _np.where(valid, scale, _np.nan)
+    ol = _np.where(_np.abs(ol) > _OLN, -1e6, ol)
+    return scale, zm, u_star, sigma_v, ol, _np.deg2rad(wind_dir)
+
+
+def _psi_unstable(x):
+    """A helper function of the stability correction of the profile."""
+    return (
+        _np.log(0.5 * (1.0 + x * x))
+        + 2.0 * _np.log(0.5 * (1.0 + x))
+        - 2.0 * _np.arctan(x)
+        + 0.5 * _np.pi
+    )
+
+
+def _ffp(grid_x, grid_y, scale, zm, u_star, sigma_v, ol, wind_dir):
+    """
+    A helper function to evaluate the footprint densities of intervals on a
+    grid, with the intervals along the first axis of the output.
+    """
+    scale, zm, u_star, sigma_v, ol, sin_wd, cos_wd = (
+        a[:, _np.newaxis, _np.newaxis]
+        for a in (
+            scale,
+            zm,
+            u_star,
+            sigma_v,
+            ol,
+            _np.sin(wind_dir),
+            _np.cos(wind_dir),
+        )
+    )
+    # upwind and crosswind distances
+    x_up = grid_x * sin_wd + grid_y * cos_wd
+    y_cross = grid_x * cos_wd - grid_y * sin_wd
+
+    x_star = x_up / scale
+    with _np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        xd = _np.where(x_star > _D, x_star - _D, _np.inf)
+        f_ci = _A * xd**_B * _np.exp(-_C / xd) / scale
+        x_pos = _np.maximum(x_star, 0.0)
+        sigma_y_star = _AC * _np.sqrt(_BC * x_pos**2 / (1.0 + _CC * x_pos))
+        scale_const = _np.minimum(
+            1e-5 * _np.abs(ol / zm) + _np.where(ol <= 0.0, 0.80, 0.55), 1.0
+        )
+        sigma_y = sigma_y_star / scale_const * zm * sigma_v / u_star
+        f = (
+            f_ci
+            * _np.exp(-0.5 * (y_cross / sigma_y) ** 2)
+            / (_np.sqrt(2.0 * _np.pi) * sigma_y)
+        )
+    return _np.where(
+        x_star > _D, f, _np.where(_np.isnan(x_star), _np.nan, 0.0)
+    )
+
+
+def _chunk_climatology(x, y, params):
+    """A helper function to accumulate a chunk in a worker process."""
+    climatology = FootprintClimatology(x, y)
+    climatology._accumulate(params)
+    return climatology
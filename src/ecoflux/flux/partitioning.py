@@ -0,0 +1,341 @@
+"""Partitioning of net ecosystem exchange into respiration and GPP."""
+
+from collections import namedtuple
+
+import numpy as _np
+
+from ecoflux.leaf.light_response import hyperbolic, jac_hyperbolic
+from ecoflux.stats.regressions import batch_least_squares
+
+# temperature parameters of the Lloyd–Taylor function [degree C]
+_T_REF: float = 15.0
+_T_0: float = -46.02
+# minimum number of records and temperature range [K] of the windows used
+# to estimate E_0 [R05]
+_MIN_NIGHT_COUNT: int = 6
+_MIN_TEMP_RANGE: float = 5.0
+
+
+def lloyd_taylor(p, temp):
+    """
+    Lloyd–Taylor temperature response of ecosystem respiration.
+
+    Parameters
+    ----------
+    p : tuple
+        A tuple of two parameters
+
+        * p[0]: R_ref, respiration at the reference temperature of 15 °C
+          [µmol m^-2 s^-1];
+        * p[1]: E_0, temperature sensitivity [K].
+
+    temp : array_like
+        Air or soil temperature [°C].
+
+    Returns
+    -------
+    array_like
+        Ecosystem respiration [µmol m^-2 s^-1].
+
+    References
+    ----------
+    .. [LT94] Lloyd, J. and Taylor, J. A. (1994). On the temperature
+       dependence of soil respiration. *Functional Ecology*, 8(3), 315–323.
+       https://doi.org/10.2307/2389824
+
+    """
+    r_ref, e_0 = p
+    return r_ref * _np.exp(e_0 * (1.0 / (_T_REF - _T_0) - 1.0 / (temp - _T_0)))
+
+
+def nighttime_partitioning(
+    time, nee, temp, rg, window=4.0, step=2.0, rg_night=10.0
+):
+    """
+    Partition NEE with the nighttime respiration–temperature method.
+
+    The Lloyd–Taylor function `lloyd_taylor` is fitted to the nighttime NEE
+    of every moving window in one batched nonlinear least-squares solve. A
+    single temperature sensitivity E_0 is then taken as the mean of the
+    window estimates within 30–450 K, weighted by their inverse variances,
+    using only the windows with at least 6 records over a temperature range
+    of at least 5 K. If no window qualifies, E_0 defaults to 100 K. The
+    reference respiration of every window is re-estimated with E_0
+    fixed [R05]_. The reference respiration is interpolated linearly between
+    the window centers to all records.
+
+    Parameters
+    ----------
+    time : array_like
+        Time of the records in days, increasing.
+    nee : array_like
+        Net ecosystem exchange [µmol m^-2 s^-1], positive upward. NaNs are
+        ignored in the fits.
+    temp : array_like
+        Air or soil temperature [°C].
+    rg : array_like
+        Global radiation [W m^-2], to select the nighttime records.
+    window : float, optional
+        Length of the moving windows [day]. Default is 4.
+    step : float, optional
+        Step between the moving windows [day]. Default is 2.
+    rg_night : float, optional
+        Global radiation below which records are nighttime [W m^-2]. Default
+        is 10.
+
+    Returns
+    -------
+    reco : array_like
+        Ecosystem respiration of all records [µmol m^-2 s^-1].
+    gpp : array_like
+        Gross primary production of all records [µmol m^-2 s^-1].
+    e_0 : float
+        Temperature sensitivity [K].
+    window_time : array_like
+        Center time of the windows [day].
+    r_ref : array_like
+        Reference respiration of the windows [µmol m^-2 s^-1].
+
+    See Also
+    --------
+    `daytime_partitioning` : The daytime light-response method.
+
+    References
+    ----------
+    .. [R05] Reichstein, M. et al. (2005). On the separation of net
+       ecosystem exchange into assimilation and ecosystem respiration:
+       review and improved algorithm. *Global Change Biology*, 11(9),
+       1424–1439. https://doi.org/10.1111/j.1365-2486.2005.001002.x
+
+    """
+    time, nee, temp, rg = (
+        _np.asarray(a, dtype="d") for a in (time, nee, temp, rg)
+    )
+    night = (rg < rg_night) & _np.isfinite(temp)
+    centers, (f, t) = _window_pack(
+        time, window, step, _np.where(night, nee, _np.nan), temp
+    )
+    e_0, r_ref = _fit_nighttime(f, t)
+    r_ref_all = _interp_finite(time, centers, r_ref)
+    reco = lloyd_taylor((r_ref_all, e_0), temp)
+
+    NighttimePartitioningResult = namedtuple(
+        "NighttimePartitioningResult",
+        ("reco", "gpp", "e_0", "window_time", "r_ref"),
+    )
+    return NighttimePartitioningResult(reco, reco - nee, e_0, centers, r_ref)
+
+
+def daytime_partitioning(
+    time,
+    nee,
+    temp,
+    par,
+    rg,
+    window=4.0,
+    step=2.0,
+    theta=0.0,
+    e_0=None,
+    rg_night=10.0,
+):
+    """
+    Partition NEE with the daytime light-response method.
+
+    The daytime NEE of every moving window is fitted with a light response
+    and a respiration term [L10]_,
+
+        ``-NEE = hyperbolic((theta, alpha, P_m, 0), PAR) - R_ref * f(T)``,
+
+    where the curvature `theta` is fixed, ``f(T)`` is the Lloyd–Taylor
+    response `lloyd_taylor` with a fixed temperature sensitivity, and
+    ``theta = 0`` gives the rectangular hyperbola. All windows are fitted
+    in one batched nonlinear least-squares solve, and the parameters are
+    interpolated linearly between the window centers to all records.
+
+    Parameters
+    ----------
+    time : array_like
+        Time of the records in days, increasing.
+    nee : array_like
+        Net ecosystem exchange [µmol m^-2 s^-1], positive upward. NaNs are
+        ignored in the fits.
+    temp : array_like
+        Air temperature [°C].
+    par : array_like
+        Photosynthetically active radiation [µmol m^-2 s^-1].
+    rg : array_like
+        Global radiation [W m^-2], to select the daytime records.
+    window : float, optional
+        Length of the moving windows [day]. Default is 4.
+    step : float, optional
+        Step between the moving windows [day]. Default is 2.
+    theta : float, optional
+        Curvature of the light response. Default is 0.
+    e_0 : float, optional
+        Temperature sensitivity [K]. Default is to estimate it from the
+        nighttime records as in `nighttime_partitioning`.
+    rg_night : float, optional
+        Global radiation below which records are nighttime [W m^-2]. Default
+        is 10.
+
+    Returns
+    -------
+    reco : array_like
+        Ecosystem respiration of all records [µmol m^-2 s^-1].
+    gpp : array_like
+        Gross primary production of all records [µmol m^-2 s^-1].
+    e_0 : float
+        Temperature sensitivity [K].
+    window_time : array_like
+        Center time of the windows [day].
+    params : array_like
+        Fitted alpha, P_m, and R_ref of the windows, with the shape
+        (n_windows, 3); NaN for windows that did not converge or whose
+        parameters are implausible (alpha > 0.22 or P_m > 250).
+
+    See Also
+    --------
+    `nighttime_partitioning` : The nighttime respiration method.
+
+    References
+    ----------
+    .. [L10] Lasslop, G. et al. (2010). Separation of net ecosystem exchange
+       into assimilation and respiration using a light response curve
+       approach: critical issues and global evaluation. *Global Change
+       Biology*, 16(1), 187–208.
+       https://doi.org/10.1111/j.1365-2486.2009.02041.x
+
+    """
+    time, nee, temp, par, rg = (
+        _np.asarray(a, dtype="d") for a in (time, nee, temp, par, rg)
+    )
+    if e_0 is None:
+        night = (rg < rg_night) & _np.isfinite(temp)
+        _, (f_night, t_night) = _window_pack(
+            time, window, step, _np.where(night, nee, _np.nan), temp
+        )
+        e_0, _ = _fit_nighttime(f_night, t_night)
+
+    day = (rg >= rg_night) & _np.isfinite(temp) & _np.isfinite(par)
+    centers, (f, t, q) = _window_pack(
+        time, window, step, _np.where(day, nee, _np.nan), temp, par
+    )
+    # initial guesses from the bounds of the data in each window
+    with _np.errstate(invalid="ignore"):
+        r_ref0 = _np.fmax(_np.nanmax(f, axis=1, initial=-_np.inf), 1.0)
+        p_m0 = _np.fmax(r_ref0 - _np.nanmin(f, axis=1, initial=_np.inf), 1.0)
+    p0 = _np.column_stack((_np.full(f.shape[0], 0.03), p_m0, r_ref0))
+    p0 = _np.where(_np.isfinite(p0), p0, 1.0)
+
+    def resid(p, f, t, q):
+        gpp = hyperbolic((theta, p[:, :1], p[:, 1:2], 0.0), q)
+        return lloyd_taylor((p[:, 2:], e_0), t) - gpp - f
+
+    def jac(p, f, t, q):
+        d_gpp = jac_hyperbolic((theta, p[:, :1], p[:, 1:2], 0.0), q)
+        d_reco = lloyd_taylor((1.0, e_0), t)
+        return _np.stack((-d_gpp[..., 1], -d_gpp[..., 2], d_reco), axis=-1)
+
+    fit = batch_least_squares(resid, p0, args=(f, t, q), jac=jac)
+    # plausible ranges of the parameters [L10]
+    valid = (
+        fit.converged
+        & (_np.sum(_np.isfinite(f), axis=1) > 3)
+        & _np.all(fit.x > 0.0, axis=1)
+        & (fit.x[:, 0] <= 0.22)
+        & (fit.x[:, 1] <= 250.0)
+    )
+    params = _np.where(valid[:, None], fit.x, _np.nan)
+    alpha, p_m, r_ref = (
+        _interp_finite(time, centers, params[:, i]) for i in range(3)
+    )
+    reco = lloyd_taylor((r_ref, e_0), temp)
+    gpp = hyperbolic((theta, alpha, p_m, 0.0), _np.fmax(par, 0.0))
+
+    DaytimePartitioningResult = namedtuple(
+        "DaytimePartitioningResult",
+        ("reco", "gpp", "e_0", "window_time", "params"),
+    )
+    return DaytimePartitioningResult(reco, gpp, e_0, centers, params)
+
+
+def _fit_nighttime(f, t):
+    """
+    A helper function to estimate E_0 and the reference respiration of the
+    windows from NaN-padded nighttime NEE and temperature.
+    """
+    p0 = _np.column_stack(
+        (
+            _np.fmax(_np.nan_to_num(_np.nanmedian(_nanpad(f), axis=1)), 0.1),
+            _np.full(f.shape[0], 100.0),
+        )
+    )
+    fit = batch_least_squares(
+        lambda p, f, t: lloyd_taylor((p[:, :1], p[:, 1:]), t) - f,
+        p0,
+        args=(f, t),
+    )
+    e_0_win, e_0_err = fit.x[:, 1], fit.stderr[:, 1]
+    finite = _np.isfinite(f) & _np.isfinite(t)
+    t_fit = _np.where(finite, t, _np.nan)
+    with _np.errstate(invalid="ignore"):
+        t_range = _np.nanmax(t_fit, axis=1, initial=-_np.inf) - _np.nanmin(
+            t_fit, axis=1, initial=_np.inf
+        )
+    good = (
+        fit.converged
+        & (_np.sum(finite, axis=1) >= _MIN_NIGHT_COUNT)
+        & (t_range >= _MIN_TEMP_RANGE)
+        & (e_0_win > 30.0)
+        & (e_0_win < 450.0)
+        & (e_0_err > 0.0)
+        & _np.isfinite(e_0_err)
+    )
+    if not _np.any(good):
+        e_0 = 100.0
+    else:
+        weight = 1.0 / e_0_err[good] ** 2
+        e_0 = _np.sum(weight * e_0_win[good]) / _np.sum(weight)
+
+    # with E_0 fixed, R_ref is the linear least-squares slope
+    g = lloyd_taylor((1.0, e_0), t)
+    finite = _np.isfinite(f) & _np.isfinite(g)
+    g, f = _np.where(finite, g, 0.0), _np.where(finite, f, 0.0)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        r_ref = _np.where(
+            _np.sum(finite, axis=1) > 2,
+            _np.sum(g * f, axis=1) / _np.sum(g * g, axis=1),
+            _np.nan,
+        )
+    return e_0, r_ref
+
+
+def _nanpad(a):
+    """A helper function to keep an all-NaN row from warning in reductions."""
+    return _np.where(_np.any(_np.isfinite(a), axis=1, keepdims=True), a, 0.0)
+
+
+def _window_pack(time, window, step, *series):
+    """
+    A helper function to gather the records of moving windows into
+    NaN-padded arrays with the shape (n_windows, max_records).
+    """
+    t_start = _np.nanmin(time)
+    n_win = max(int(_np.ceil((_np.nanmax(time) - t_start) / step)), 1)
+    centers = t_start + 0.5 * window + step * _np.arange(n_win)
+    first = _np.searchsorted(time, centers - 0.5 * window, side="left")
+    last = _np.searchsorted(time, centers + 0.5 * window, side="left")
+    counts = last - first
+    idx = first[:, None] + _np.arange(max(int(_np.max(counts)), 1))
+    inside = idx < last[:, None]
+    idx = _np.where(inside, idx, 0)
+    packed = tuple(_np.where(inside, s[idx], _np.nan) for s in series)
+    return centers, packed
+
+
+def _interp_finite(x, xp, fp):
+    """A helper function to interpolate linearly over the finite values."""
+    finite = _np.isfinite(fp)
+    if not _np.any(finite):
+        return _np.full(_np.shape(x), _np.nan)
+    return _np.interp(x, xp[finite], fp[finite])
@@ -0,0 +1,170 @@
+"""Quality control tests of eddy covariance fluxes."""
+
+import numpy as _np
+
+from .eddycov import block_cov, to_blocks
+
+# angular speed of the Earth's rotation [rad s^-1]
+_OMEGA: float = 7.2921e-5
+
+
+def steady_state_test(x, y, block_size, n_sub=6):
+    """
+    Run the steady-state test of Foken and Wichura on many blocks at once.
+
+    Each averaging block is split into `n_sub` sub-intervals, and the mean of
+    the sub-interval covariances is compared with the covariance of the whole
+    block [FW96]_. The covariances of all blocks and sub-intervals are
+    computed together as segmented reductions.
+
+    Parameters
+    ----------
+    x, y : array_like
+        Two time series of the same length, e.g., vertical wind speed and a
+        scalar.
+    block_size : int
+        Number of samples per block, e.g., 36000 for 30 min at 20 Hz.
+    n_sub : int, optional
+        Number of sub-intervals per block. Default is 6, i.e., 5-min
+        sub-intervals of 30-min blocks.
+
+    Returns
+    -------
+    array_like
+        Relative non-stationarity of each block, ``|mean(cov_sub) - cov| /
+        |cov|``.
+
+    Raises
+    ------
+    ValueError
+        If `block_size` is not divisible by `n_sub`.
+
+    See Also
+    --------
+    `qc_flag` : Combined quality flags.
+
+    References
+    ----------
+    .. [FW96] Foken, T. and Wichura, B. (1996). Tools for quality assessment
+       of surface-based flux measurements. *Agricultural and Forest
+       Meteorology*, 78(1–2), 83–105.
+       https://doi.org/10.1016/0168-1923(95)02248-1
+
+    """
+    block_size, n_sub = int(block_size), int(n_sub)
+    if block_size % n_sub:
+        raise ValueError("Block size not divisible by the sub-intervals.")
+    x_pad = to_blocks(x, block_size).ravel()
+    y_pad = to_blocks(y, block_size).ravel()
+    cov = block_cov(x_pad, y_pad, block_size)
+    cov_sub = block_cov(x_pad, y_pad, block_size // n_sub).reshape(-1, n_sub)
+    finite = _np.isfinite(cov_sub)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        cov_sub_mean = _np.sum(_np.where(finite, cov_sub, 0.0), axis=1) / (
+            _np.sum(finite, axis=1)
+        )
+        return _np.abs(cov_sub_mean - cov) / _np.abs(cov)
+
+
+def itc_test(sigma_w, u_star, zeta, latitude):
+    """
+    Run the integral turbulence characteristic test of the vertical wind.
+
+    The measured ratio ``sigma_w / u_star`` is compared with the model of
+    Foken [F04]_ as a function of stability,
+
+    * ``1.3 * (1 - 2 * zeta)**(1/3)`` for ``-3 <= zeta < -0.2``, and
+    * ``0.21 * ln(z_+ * f / u_star) + 3.1`` for ``-0.2 <= zeta <= 0.4``,
+      with ``z_+ = 1 m`` and the Coriolis parameter ``f``.
+
+    The model is not given outside of these ranges, where the test is not
+    applied and the result is NaN.
+
+    Parameters
+    ----------
+    sigma_w : array_like
+        Standard deviation of the vertical wind speed [m s^-1].
+    u_star : array_like
+        Friction velocity [m s^-1].
+    zeta : array_like
+        Stability parameter (z - d) / L.
+    latitude : float or array_like
+        Latitude [degree].
+
+    Returns
+    -------
+    array_like
+        Relative deviation of the measured from the modeled characteristic.
+        NaN where the stability is out of the range of the model.
+
+    See Also
+    --------
+    `qc_flag` : Combined quality flags.
+
+    References
+    ----------
+    .. [F04] Foken, T., Göckede, M., Mauder, M., Mahrt, L., Amiro, B., and
+       Munger, W. (2004). Post-field data quality control. In X. Lee, W.
+       Massman, and B. Law (Eds.), *Handbook of Micrometeorology* (pp.
+       181–208). Springer. https://doi.org/10.1007/1-4020-2265-4_9
+
+    """
+    sigma_w = _np.asarray(sigma_w, dtype="d")
+    u_star = _np.asarray(u_star, dtype="d")
+    zeta = _np.asarray(zeta, dtype="d")
+    f_coriolis = 2.0 * _OMEGA * _np.abs(_np.sin(_np.deg2rad(latitude)))
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        model = _np.select(
+            [(zeta >= -3.0) & (zeta < -0.2), (zeta >= -0.2) & (zeta <= 0.4)],
+            [
+                1.3 * _np.cbrt(1.0 - 2.0 * zeta),
+                0.21 * _np.log(f_coriolis / u_star) + 3.1,
+            ],
+            _np.nan,
+        )
+        return _np.abs((model - sigma_w / u_star) / model)
+
+
+def qc_flag(steady_state, itc=None):
+    """
+    Combine the test results into the 0-1-2 quality flags.
+
+    Following Mauder and Foken [MF04]_, flag 0 (high quality) requires both
+    deviations to be no more than 30%, flag 1 (usable) no more than 100%, and
+    flag 2 (to be discarded) is given otherwise, including where the
+    steady-state test result is missing. Where the integral turbulence
+    characteristic is not tested (NaN), the flag follows the steady-state
+    test alone.
+
+    Parameters
+    ----------
+    steady_state : array_like
+        Relative non-stationarity from `steady_state_test`.
+    itc : array_like, optional
+        Relative deviation from `itc_test`, NaN where not tested. If
+        omitted, only the steady-state test is used.
+
+    Returns
+    -------
+    array_like
+        Quality flags as 8-bit integers.
+
+    References
+    ----------
+    .. [MF04] Mauder, M. and Foken, T. (2004). *Documentation and Instruction
+       Manual of the Eddy Covariance Software Package TK2*. Arbeitsergebnisse
+       26, Universität Bayreuth.
+
+    """
+    deviation = _np.asarray(steady_state, dtype="d")
+    if itc is not None:
+        # NaN in `itc` means not tested, NaN in `steady_state` stays missing
+        deviation = _np.where(
+            _np.isnan(deviation),
+            deviation,
+            _np.fmax(deviation, _np.asarray(itc, dtype="d")),
+        )
+    flag = _np.full(deviation.shape, 2, dtype=_np.int8)
+    flag[deviation <= 1.0] = 1
+    flag[deviation <= 0.3] = 0
+    return flag
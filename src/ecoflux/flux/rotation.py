@@ -0,0 +1,240 @@
+"""Coordinate rotation of sonic anemometer wind vectors."""
+
+from collections import namedtuple
+
+import numpy as _np
+
+from ecoflux.stats.regressions import nanmultilinregress
+
+
+def interval_mean(wind, boundaries=None):
+    """
+    Calculate the mean wind vector of averaging intervals.
+
+    Parameters
+    ----------
+    wind : array_like
+        Wind vectors (u, v, w), either with the shape
+        (n_intervals, n_samples, 3), or flat with the shape (n, 3) if
+        `boundaries` is given.
+    boundaries : array_like, optional
+        Start indices of the intervals in a flat `wind` array.
+
+    Returns
+    -------
+    array_like
+        Mean wind vectors with the shape (n_intervals, 3), ignoring NaNs.
+
+    """
+    wind = _np.asarray(wind, dtype="d")
+    finite = _np.all(_np.isfinite(wind), axis=-1, keepdims=True)
+    wind = _np.where(finite, wind, 0.0)
+    if boundaries is None:
+        total, count = _np.sum(wind, axis=1), _np.sum(finite, axis=1)
+    else:
+        starts = _np.asarray(boundaries, dtype=int)
+        total = _np.add.reduceat(wind, starts, axis=0)
+        count = _np.add.reduceat(finite, starts, axis=0)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        return total / count
+
+
+def double_rotation(wind, boundaries=None):
+    """
+    Rotate the wind vectors of many intervals with double rotation.
+
+    The first rotation (yaw) aligns the x-axis with the mean horizontal wind,
+    and the second (pitch) sets the mean vertical wind to zero [WMP01]_.
+    All intervals are rotated together with one batched matrix
+    multiplication.
+
+    Parameters
+    ----------
+    wind : array_like
+        Wind vectors (u, v, w), either with the shape
+        (n_intervals, n_samples, 3), or flat with the shape (n, 3) if
+        `boundaries` is given.
+    boundaries : array_like, optional
+        Start indices of the intervals in a flat `wind` array.
+
+    Returns
+    -------
+    wind : array_like
+        Rotated wind vectors. Has the same shape as the input.
+    matrix : array_like
+        Rotation matrices with the shape (n_intervals, 3, 3).
+
+    See Also
+    --------
+    `planar_fit_rotation` : Planar fit rotation.
+
+    References
+    ----------
+    .. [WMP01] Wilczak, J. M., Oncley, S. P., and Stage, S. A. (2001). Sonic
+       anemometer tilt correction algorithms. *Boundary-Layer Meteorology*,
+       99(1), 127–150. https://doi.org/10.1023/A:1018966204465
+
+    """
+    u_mean, v_mean, w_mean = _np.moveaxis(
+        interval_mean(wind, boundaries), -1, 0
+    )
+    yaw = _np.arctan2(v_mean, u_mean)
+    pitch = _np.arctan2(w_mean, _np.hypot(u_mean, v_mean))
+    cy, sy = _np.cos(yaw), _np.sin(yaw)
+    cp, sp = _np.cos(pitch), _np.sin(pitch)
+    zero = _np.zeros_like(yaw)
+    # pitch rotation applied after the yaw rotation
+    matrix = _np.stack(
+        (
+            _np.stack((cp * cy, cp * sy, sp), axis=-1),
+            _np.stack((-sy, cy, zero), axis=-1),
+            _np.stack((-sp * cy, -sp * sy, cp), axis=-1),
+        ),
+        axis=-2,
+    )
+
+    RotationResult = namedtuple("RotationResult", ("wind", "matrix"))
+    return RotationResult(_rotate(wind, matrix, boundaries), matrix)
+
+
+def planar_fit(mean_wind, n_sectors=1, min_count=10):
+    """
+    Fit the planes of mean wind vectors in wind direction sectors.
+
+    In each sector, the mean vertical wind of the intervals is regressed on
+    the mean horizontal wind components, ``w = b0 + b1 * u + b2 * v``
+    [WMP01]_. Sectors with fewer than `min_count` valid intervals use the
+    plane fitted to the intervals of all sectors, so that their winds can
+    still be rotated.
+
+    Parameters
+    ----------
+    mean_wind : array_like
+        Mean wind vectors of the intervals with the shape (n_intervals, 3),
+        e.g., from `interval_mean`.
+    n_sectors : int, optional
+        Number of wind direction sectors of equal width, counted
+        counterclockwise from the x-axis of the anemometer. Default is 1.
+    min_count : int, optional
+        Minimum number of valid intervals to fit the plane of a sector.
+        Default is 10.
+
+    Returns
+    -------
+    b0 : array_like
+        Offsets of the vertical wind in the sectors [m s^-1].
+    b1 : array_like
+        Coefficients of u in the sectors.
+    b2 : array_like
+        Coefficients of v in the sectors.
+
+    See Also
+    --------
+    `planar_fit_rotation` : Planar fit rotation.
+
+    """
+    mean_wind = _np.asarray(mean_wind, dtype="d")
+    sector = _wind_sector(mean_wind, n_sectors)
+    finite = _np.all(_np.isfinite(mean_wind), axis=1)
+    fit = nanmultilinregress(mean_wind[:, :2], mean_wind[:, 2])
+    coef = _np.tile(_np.r_[fit.intercept, fit.coef], (n_sectors, 1))
+    for k in range(n_sectors):
+        in_sector = (sector == k) & finite
+        if _np.sum(in_sector) < max(min_count, 3):
+            continue
+        fit = nanmultilinregress(
+            mean_wind[in_sector, :2], mean_wind[in_sector, 2]
+        )
+        coef[k] = fit.intercept, *fit.coef
+
+    PlanarFitResult = namedtuple("PlanarFitResult", ("b0", "b1", "b2"))
+    return PlanarFitResult(*coef.T)
+
+
+def planar_fit_rotation(wind, fit, boundaries=None):
+    """
+    Rotate the wind vectors of many intervals with the planar fit method.
+
+    The z-axis is set normal to the fitted plane of the sector of each
+    interval, after the offset `b0` is removed from the vertical wind, and
+    the x-axis is aligned with the mean wind in the plane [WMP01]_. All
+    intervals are rotated together with one batched matrix multiplication.
+
+    Parameters
+    ----------
+    wind : array_like
+        Wind vectors (u, v, w), either with the shape
+        (n_intervals, n_samples, 3), or flat with the shape (n, 3) if
+        `boundaries` is given.
+    fit : tuple
+        Fitted planes of the sectors, as returned by `planar_fit`.
+    boundaries : array_like, optional
+        Start indices of the intervals in a flat `wind` array.
+
+    Returns
+    -------
+    wind : array_like
+        Rotated wind vectors. Has the same shape as the input.
+    matrix : array_like
+        Rotation matrices with the shape (n_intervals, 3, 3).
+
+    See Also
+    --------
+    `double_rotation` : Double rotation.
+    `planar_fit` : Plane fitting in wind direction sectors.
+
+    """
+    b0, b1, b2 = (_np.asarray(b, dtype="d") for b in fit)
+    wind = _np.asarray(wind, dtype="d")
+    mean_wind = interval_mean(wind, boundaries)
+    sector = _wind_sector(mean_wind, b0.size)
+    offset = _np.zeros((b0.size, 3))
+    offset[:, 2] = b0
+
+    # unit vectors of the new z-axis
+    k_hat = _np.stack((-b1, -b2, _np.ones_like(b1)), axis=-1)
+    k_hat /= _np.linalg.norm(k_hat, axis=-1, keepdims=True)
+    k_hat = k_hat[sector]
+    # new x-axis along the mean wind projected onto the plane
+    i_hat = mean_wind - offset[sector]
+    i_hat -= _np.sum(i_hat * k_hat, axis=-1, keepdims=True) * k_hat
+    i_hat /= _np.linalg.norm(i_hat, axis=-1, keepdims=True)
+    j_hat = _np.cross(k_hat, i_hat)
+    matrix = _np.stack((i_hat, j_hat, k_hat), axis=-2)
+
+    if boundaries is None:
+        wind = wind - offset[sector][:, _np.newaxis, :]
+    else:
+        starts = _np.asarray(boundaries, dtype=int)
+        counts = _np.diff(_np.r_[starts, wind.shape[0]])
+        wind = wind - _np.repeat(offset[sector], counts, axis=0)
+
+    RotationResult = namedtuple("RotationResult", ("wind", "matrix"))
+    return RotationResult(_rotate(wind, matrix, boundaries), matrix)
+
+
+def _wind_sector(mean_wind, n_sectors):
+    """A helper function to find the wind direction sector of intervals."""
+    direction = _np.mod(
+        _np.arctan2(mean_wind[:, 1], mean_wind[:, 0]), 2 * _np.pi
+    )
+    direction = _np.nan_to_num(direction)
+    return _np.minimum(
+        (direction / (2 * _np.pi / n_sectors)).astype(int), n_sectors - 1
+    )
+
+
+def _rotate(wind, matrix, boundaries):
+    """A helper function to apply rotation matrices to intervals."""
+    wind = _np.asarray(wind, dtype="d")
+    if boundaries is None:
+        return _np.matmul(wind, _np.swapaxes(matrix, -1, -2))
+
+    starts = _np.asarray(boundaries, dtype=int)
+    counts = _np.diff(_np.r_[starts, wind.shape[0]])
+    rotated = _np.empty_like(wind)
+    for i in range(3):
+        rotated[:, i] = _np.sum(
+            _np.repeat(matrix[:, i, :], counts, axis=0) * wind, axis=-1
+        )
+    return rotated
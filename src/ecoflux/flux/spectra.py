@@ -0,0 +1,243 @@
+"""Spectra, cospectra, and ogives of turbulent time series."""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as _np
+from scipy import fft as _fft
+
+
+def spectra(x, fs, detrend="linear", taper=False):
+    """
+    Calculate the power spectral densities of many intervals at once.
+
+    Parameters
+    ----------
+    x : array_like
+        Time series of the intervals, with time along the last axis, e.g.,
+        with the shape (n_intervals, n_samples). NaNs are replaced by zero
+        fluctuations.
+    fs : float
+        Sampling frequency [Hz].
+    detrend : str, optional
+        'linear' (default) to remove the linear trends, or 'mean' to remove
+        the means of the intervals.
+    taper : bool, optional
+        If `True`, apply a Hamming window, with the spectra rescaled to keep
+        the variance. Default is `False`.
+
+    Returns
+    -------
+    freq : array_like
+        Frequencies [Hz], excluding zero.
+    psd : array_like
+        One-sided power spectral densities, which integrate to the variance
+        over `freq`.
+
+    See Also
+    --------
+    `cospectra` : Cospectra.
+    `log_bin` : Bin spectra on a logarithmic frequency grid.
+
+    """
+    x_fft, n = _fluctuation_fft(x, detrend, taper)
+    psd = _one_sided(_np.abs(x_fft) ** 2, n, fs)
+
+    SpectraResult = namedtuple("SpectraResult", ("freq", "psd"))
+    return SpectraResult(_rfft_freq(n, fs), psd)
+
+
+def cospectra(x, y, fs, detrend="linear", taper=False):
+    """
+    Calculate the cospectral densities of many intervals at once.
+
+    Parameters
+    ----------
+    x : array_like
+        Time series of the intervals, with time along the last axis, e.g.,
+        vertical wind speed with the shape (n_intervals, n_samples). NaNs are
+        replaced by zero fluctuations.
+    y : array_like
+        Time series of the intervals that broadcast against `x`, e.g.,
+        several scalars with the shape (n_scalars, n_intervals, n_samples).
+    fs : float
+        Sampling frequency [Hz].
+    detrend : str, optional
+        'linear' (default) to remove the linear trends, or 'mean' to remove
+        the means of the intervals.
+    taper : bool, optional
+        If `True`, apply a Hamming window, with the cospectra rescaled to
+        keep the covariance. Default is `False`.
+
+    Returns
+    -------
+    freq : array_like
+        Frequencies [Hz], excluding zero.
+    cospec : array_like
+        One-sided cospectral densities, which integrate to the covariance
+        over `freq`.
+
+    See Also
+    --------
+    `ogive` : Ogives from cospectra.
+    `spectra` : Power spectra.
+
+    """
+    x_fft, n = _fluctuation_fft(x, detrend, taper)
+    y_fft, _ = _fluctuation_fft(y, detrend, taper)
+    cospec = _one_sided(_np.real(_np.conj(x_fft) * y_fft), n, fs)
+
+    CospectraResult = namedtuple("CospectraResult", ("freq", "cospec"))
+    return CospectraResult(_rfft_freq(n, fs), cospec)
+
+
+def ogive(freq, cospec):
+    """
+    Calculate the ogives from cospectra.
+
+    The ogive at a frequency is the integral of the cospectrum from that
+    frequency to the Nyquist frequency, so that at the lowest frequency it
+    equals the covariance.
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequencies [Hz], evenly spaced.
+    cospec : array_like
+        Cospectral densities, with frequency along the last axis.
+
+    Returns
+    -------
+    array_like
+        Ogives, same shape as `cospec`.
+
+    """
+    df = freq[1] - freq[0] if len(freq) > 1 else freq[0]
+    return _np.cumsum(cospec[..., ::-1], axis=-1)[..., ::-1] * df
+
+
+@lru_cache(maxsize=32)
+def log_freq_grid(n_samples, fs, n_bins=50):
+    """
+    Get a logarithmic frequency grid for binning spectra.
+
+    The grid is computed once for each combination of arguments and cached.
+
+    Parameters
+    ----------
+    n_samples : int
+        Number of samples of an interval.
+    fs : float
+        Sampling frequency [Hz].
+    n_bins : int, optional
+        Number of logarithmic bins between the lowest and the Nyquist
+        frequencies. Empty bins are dropped. Default is 50.
+
+    Returns
+    -------
+    freq : array_like
+        Geometric mean frequency of each bin [Hz].
+    starts : array_like
+        Index of the first FFT frequency of each bin.
+    counts : array_like
+        Number of FFT frequencies in each bin.
+
+    """
+    freq = _rfft_freq(int(n_samples), fs)
+    edges = _np.logspace(
+        _np.log10(freq[0]), _np.log10(freq[-1]), int(n_bins) + 1
+    )
+    edges[-1] = _np.inf
+    index = _np.searchsorted(edges, freq, side="right") - 1
+    starts = _np.flatnonzero(_np.r_[True, index[1:] != index[:-1]])
+    counts = _np.diff(_np.r_[starts, freq.size])
+    bin_freq = _np.exp(_np.add.reduceat(_np.log(freq), starts) / counts)
+    for a in (bin_freq, starts, counts):
+        a.flags.writeable = False
+
+    LogFreqGrid = namedtuple("LogFreqGrid", ("freq", "starts", "counts"))
+    return LogFreqGrid(bin_freq, starts, counts)
+
+
+def log_bin(spec, n_samples, fs, n_bins=50):
+    """
+    Bin spectra or cospectra on a logarithmic frequency grid.
+
+    Parameters
+    ----------
+    spec : array_like
+        Spectral densities from `spectra` or `cospectra`, with frequency
+        along the last axis.
+    n_samples : int
+        Number of samples of an interval.
+    fs : float
+        Sampling frequency [Hz].
+    n_bins : int, optional
+        Number of logarithmic bins. Default is 50.
+
+    Returns
+    -------
+    freq : array_like
+        Geometric mean frequency of each bin [Hz].
+    spec : array_like
+        Mean spectral densities in the bins.
+
+    See Also
+    --------
+    `log_freq_grid` : The cached logarithmic frequency grid.
+
+    """
+    grid = log_freq_grid(int(n_samples), fs, n_bins)
+    binned = _np.add.reduceat(_np.asarray(spec), grid.starts, axis=-1)
+    binned /= grid.counts
+
+    LogBinResult = namedtuple("LogBinResult", ("freq", "spec"))
+    return LogBinResult(grid.freq, binned)
+
+
+def _fluctuation_fft(x, detrend, taper):
+    """
+    A helper function to detrend, taper, and transform time series along the
+    last axis.
+    """
+    x = _np.asarray(x, dtype="d")
+    n = x.shape[-1]
+    finite = _np.isfinite(x)
+    count = _np.sum(finite, axis=-1, keepdims=True)
+    x0 = _np.where(finite, x, 0.0)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        mean = _np.sum(x0, axis=-1, keepdims=True) / count
+        fluc = _np.where(finite, x - mean, 0.0)
+        if detrend == "linear":
+            t = _np.where(finite, _np.arange(n) - (n - 1) / 2.0, 0.0)
+            t = t - _np.sum(t, axis=-1, keepdims=True) / count
+            t = _np.where(finite, t, 0.0)
+            slope = _np.sum(t * fluc, axis=-1, keepdims=True) / _np.sum(
+                t * t, axis=-1, keepdims=True
+            )
+            fluc = fluc - _np.nan_to_num(slope) * t
+        elif detrend != "mean":
+            raise ValueError("Unknown detrending method: %s" % detrend)
+    fluc = _np.nan_to_num(fluc)
+    if taper:
+        window = _np.hamming(n)
+        fluc = fluc * (window / _np.sqrt(_np.mean(window**2)))
+    # drop the zero frequency
+    return _fft.rfft(fluc, axis=-1)[..., 1:], n
+
+
+def _one_sided(power, n, fs):
+    """
+    A helper function to scale the squared Fourier amplitudes to one-sided
+    spectral densities, without the zero frequency.
+    """
+    density = power * (2.0 / (n * fs))
+    if n % 2 == 0:
+        # the Nyquist frequency is not doubled
+        density[..., -1] *= 0.5
+    return density
+
+
+def _rfft_freq(n, fs):
+    """A helper function to get the FFT frequencies, excluding zero."""
+    return _fft.rfftfreq(n, d=1.0 / fs)[1:]
@@ -0,0 +1,326 @@
+"""High-frequency spectral corrections of eddy covariance fluxes."""
+
+from functools import lru_cache
+
+import numpy as _np
+
+# kinematic viscosity of air [m^2 s^-1]
+_NU_AIR: float = 1.5e-5
+
+
+def kaimal_cospectrum(n, zeta):
+    """
+    Normalized model cospectrum of a scalar flux [K72]_ [M97]_.
+
+    Parameters
+    ----------
+    n : array_like
+        Normalized frequency ``f * (z - d) / u``.
+    zeta : array_like
+        Stability parameter (z - d) / L. Must broadcast against `n`.
+
+    Returns
+    -------
+    array_like
+        Normalized cospectrum ``f * Co(f) / cov``.
+
+    References
+    ----------
+    .. [K72] Kaimal, J. C., Wyngaard, J. C., Izumi, Y., and Coté, O. R.
+       (1972). Spectral characteristics of surface-layer turbulence.
+       *Quarterly Journal of the Royal Meteorological Society*, 98(417),
+       563–589. https://doi.org/10.1002/qj.49709841707
+    .. [M97] Moncrieff, J. B. et al. (1997). A system to measure surface
+       fluxes of momentum, sensible heat, water vapour and carbon dioxide.
+       *Journal of Hydrology*, 188–189, 589–611.
+       https://doi.org/10.1016/S0022-1694(96)03194-0
+
+    """
+    n = _np.asarray(n, dtype="d")
+    zeta = _np.asarray(zeta, dtype="d")
+    a0 = 0.284 * (1.0 + 6.4 * _np.maximum(zeta, 0.0)) ** 0.75
+    b0 = 2.34 * a0 ** (-1.1)
+    stable = n / (a0 + b0 * n**2.1)
+    unstable = _np.where(
+        n <= 0.54,
+        12.92 * n / (1.0 + 26.7 * n) ** 1.375,
+        4.378 * n / (1.0 + 3.8 * n) ** 2.4,
+    )
+    return _np.where(zeta > 0.0, stable, unstable)
+
+
+def tf_first_order(freq, tau):
+    """
+    Transfer function of a first-order sensor response.
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequency [Hz].
+    tau : float
+        Time constant [s].
+
+    Returns
+    -------
+    array_like
+        Amplitude transfer function.
+
+    """
+    return 1.0 / _np.sqrt(1.0 + (2.0 * _np.pi * freq * tau) ** 2)
+
+
+def tf_block_average(freq, period):
+    """
+    Transfer function of block averaging, a high-pass filter [M97]_.
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequency [Hz].
+    period : float
+        Averaging period [s].
+
+    Returns
+    -------
+    array_like
+        Transfer function.
+
+    """
+    x = _np.pi * freq * period
+    return 1.0 - (_np.sin(x) / x) ** 2
+
+
+def tf_sonic_path(freq, u, path):
+    """
+    Transfer function of line averaging of vertical wind by a sonic
+    anemometer [M97]_.
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequency [Hz].
+    u : array_like
+        Mean wind speed [m s^-1]. Must broadcast against `freq`.
+    path : float
+        Path length [m].
+
+    Returns
+    -------
+    array_like
+        Amplitude transfer function.
+
+    """
+    x = 2.0 * _np.pi * freq * path / u
+    t = (
+        4.0
+        / x
+        * (1.0 + 0.5 * _np.exp(-x) - 3.0 * (1.0 - _np.exp(-x)) / (2.0 * x))
+    )
+    return _np.sqrt(_np.clip(t, 0.0, 1.0))
+
+
+def tf_scalar_path(freq, u, path):
+    """
+    Transfer function of line averaging of a scalar by an open-path sensor
+    [M97]_.
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequency [Hz].
+    u : array_like
+        Mean wind speed [m s^-1]. Must broadcast against `freq`.
+    path : float
+        Path length [m].
+
+    Returns
+    -------
+    array_like
+        Amplitude transfer function.
+
+    """
+    x = 2.0 * _np.pi * freq * path / u
+    t = (3.0 + _np.exp(-x) - 4.0 * (1.0 - _np.exp(-x)) / x) / x
+    return _np.sqrt(_np.clip(t, 0.0, 1.0))
+
+
+def tf_separation(freq, u, distance):
+    """
+    Transfer function of the lateral separation between the anemometer and a
+    scalar sensor [M97]_.
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequency [Hz].
+    u : array_like
+        Mean wind speed [m s^-1]. Must broadcast against `freq`.
+    distance : float
+        Separation distance [m].
+
+    Returns
+    -------
+    array_like
+        Transfer function.
+
+    """
+    return _np.exp(-9.9 * (freq * distance / u) ** 1.5)
+
+
+def tf_tube(freq, length, radius, flow_rate, diffusivity=1.39e-5):
+    """
+    Transfer function of the attenuation of a scalar in a sampling tube.
+
+    The attenuation results from longitudinal dispersion in the tube, with
+    the dispersion coefficient of Taylor [T53]_ for laminar flow and of
+    Taylor [T54]_ for turbulent flow (Reynolds number > 2300).
+
+    Parameters
+    ----------
+    freq : array_like
+        Frequency [Hz].
+    length : float
+        Tube length [m].
+    radius : float
+        Tube inner radius [m].
+    flow_rate : float
+        Volumetric flow rate [m^3 s^-1].
+    diffusivity : float, optional
+        Molecular diffusivity of the scalar in air [m^2 s^-1]. Default is the
+        value of CO2, 1.39e-5.
+
+    Returns
+    -------
+    array_like
+        Amplitude transfer function.
+
+    References
+    ----------
+    .. [T53] Taylor, G. I. (1953). Dispersion of soluble matter in solvent
+       flowing slowly through a tube. *Proceedings of the Royal Society A*,
+       219(1137), 186–203. https://doi.org/10.1098/rspa.1953.0139
+    .. [T54] Taylor, G. I. (1954). The dispersion of matter in turbulent flow
+       through a pipe. *Proceedings of the Royal Society A*, 223(1155),
+       446–468. https://doi.org/10.1098/rspa.1954.0130
+
+    """
+    velocity = flow_rate / (_np.pi * radius**2)
+    reynolds = 2.0 * radius * velocity / _NU_AIR
+    if reynolds > 2300.0:
+        # friction velocity in the tube from the Blasius friction factor
+        u_star = velocity * _np.sqrt(0.316 * reynolds**-0.25 / 8.0)
+        dispersion = 10.1 * radius * u_star
+    else:
+        dispersion = diffusivity + (radius * velocity) ** 2 / (
+            48.0 * diffusivity
+        )
+    return _np.exp(
+        -4.0 * _np.pi**2 * freq**2 * dispersion * length / velocity**3
+    )
+
+
+def spectral_correction_factor(
+    u,
+    z,
+    zeta,
+    fs,
+    period=1800.0,
+    sonic_path=None,
+    scalar_path=None,
+    separation=None,
+    tau=(),
+    tube=None,
+    n_freq=400,
+):
+    """
+    Calculate high-frequency spectral correction factors of scalar fluxes.
+
+    The correction factor is the ratio of the integral of the model
+    cospectrum `kaimal_cospectrum` to that of the cospectrum attenuated by
+    the transfer functions of the measurement system [M97]_. All
+    half-hours are evaluated at once on a (half-hours, frequencies) grid.
+    The transfer functions that depend only on the instrument setup (block
+    averaging, sensor response, and tube attenuation) are computed once for
+    each setup and cached.
+
+    Parameters
+    ----------
+    u : array_like
+        Mean wind speed [m s^-1].
+    z : float or array_like
+        Measurement height above the zero-plane displacement [m].
+    zeta : array_like
+        Stability parameter (z - d) / L.
+    fs : float
+        Sampling frequency [Hz].
+    period : float, optional
+        Averaging period [s]. Default is 1800 s.
+    sonic_path : float, optional
+        Path length of the sonic anemometer [m].
+    scalar_path : float, optional
+        Path length of an open-path scalar sensor [m].
+    separation : float, optional
+        Lateral separation between the anemometer and the scalar sensor [m].
+    tau : float or tuple of float, optional
+        Time constants of first-order sensor responses [s].
+    tube : tuple, optional
+        Sampling tube of a closed-path analyzer, as ``(length, radius,
+        flow_rate)`` or ``(length, radius, flow_rate, diffusivity)``; see
+        `tf_tube`.
+    n_freq : int, optional
+        Number of logarithmically spaced frequencies for the integration.
+        Default is 400.
+
+    Returns
+    -------
+    array_like
+        Correction factors (>= 1) to multiply the measured fluxes.
+
+    """
+    u = _np.asarray(u, dtype="d")[..., _np.newaxis]
+    z = _np.asarray(z, dtype="d")[..., _np.newaxis]
+    zeta = _np.asarray(zeta, dtype="d")[..., _np.newaxis]
+    tau = tuple(_np.atleast_1d(tau).tolist())
+    tube = None if tube is None else tuple(tube)
+    freq = _log_freq(float(fs), float(period), int(n_freq))
+    transfer = _setup_transfer(
+        float(fs), float(period), int(n_freq), tau, tube
+    )
+
+    # transfer functions that depend on the wind speed of each half-hour
+    transfer = _np.broadcast_to(transfer, _np.broadcast(u, freq).shape)
+    if sonic_path is not None:
+        transfer = transfer * tf_sonic_path(freq, u, sonic_path)
+    if scalar_path is not None:
+        transfer = transfer * tf_scalar_path(freq, u, scalar_path)
+    if separation is not None:
+        transfer = transfer * tf_separation(freq, u, separation)
+
+    # f * Co(f) integrated over ln(f) on the evenly spaced logarithmic grid
+    model = kaimal_cospectrum(freq * z / u, zeta)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        return _np.sum(model, axis=-1) / _np.sum(model * transfer, axis=-1)
+
+
+@lru_cache(maxsize=32)
+def _log_freq(fs, period, n_freq):
+    """A helper function to get the cached logarithmic frequency grid."""
+    freq = _np.logspace(_np.log10(0.1 / period), _np.log10(0.5 * fs), n_freq)
+    freq.flags.writeable = False
+    return freq
+
+
+@lru_cache(maxsize=128)
+def _setup_transfer(fs, period, n_freq, tau, tube):
+    """
+    A helper function to get the cached transfer function of an instrument
+    setup, which is independent of the flow conditions.
+    """
+    freq = _log_freq(fs, period, n_freq)
+    transfer = tf_block_average(freq, period)
+    for t in tau:
+        transfer = transfer * tf_first_order(freq, t)
+    if tube is not None:
+        transfer = transfer * tf_tube(freq, *tube)
+    transfer.flags.writeable = False
+    return transfer
@@ -0,0 +1,231 @@
+"""Monin–Obukhov similarity and turbulence parameters."""
+
+from collections import namedtuple
+
+import numpy as _np
+import scipy.constants as _sc
+
+from ecoflux.constants import constants
+
+T_0: float = _sc.zero_Celsius
+
+
+def friction_velocity(cov_uw, cov_vw=0.0):
+    """
+    Calculate the friction velocity from the momentum flux covariances.
+
+    Parameters
+    ----------
+    cov_uw : float or array_like
+        Covariance of the streamwise and vertical wind speeds [m^2 s^-2].
+    cov_vw : float or array_like, optional
+        Covariance of the crosswind and vertical wind speeds [m^2 s^-2].
+        Default is 0.
+
+    Returns
+    -------
+    float or array_like
+        Friction velocity [m s^-1].
+
+    """
+    cov_uw = _np.asarray(cov_uw, dtype="d")
+    return (cov_uw**2 + _np.asarray(cov_vw, dtype="d") ** 2) ** 0.25
+
+
+def potential_temp(temp, pressure, p_ref=1e5, kelvin=False):
+    """
+    Calculate the potential temperature.
+
+    Parameters
+    ----------
+    temp : float or array_like
+        Air temperature, in Celsius degree by default.
+    pressure : float or array_like
+        Ambient pressure [Pa].
+    p_ref : float, optional
+        Reference pressure [Pa]. Default is 1e5 Pa.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    float or array_like
+        Potential temperature [K].
+
+    """
+    T_k = _np.asarray(temp, dtype="d") + (not kelvin) * T_0
+    return T_k * (p_ref / _np.asarray(pressure, dtype="d")) ** (
+        constants.R_d / constants.cp_d
+    )
+
+
+def obukhov_length(u_star, cov_w_ts, temp, pressure=None, kelvin=False):
+    """
+    Calculate the Obukhov length.
+
+    The sonic temperature approximates the virtual temperature. If
+    `pressure` is given, it is converted to the virtual potential temperature
+    with `potential_temp`, as is appropriate above the lowest few meters of
+    the atmosphere.
+
+    Parameters
+    ----------
+    u_star : float or array_like
+        Friction velocity [m s^-1].
+    cov_w_ts : float or array_like
+        Covariance of vertical wind speed and sonic (virtual) temperature
+        [m s^-1 K].
+    temp : float or array_like
+        Mean sonic (virtual) temperature, in Celsius degree by default.
+    pressure : float or array_like, optional
+        Ambient pressure [Pa]. If omitted, the temperature is used as is.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    float or array_like
+        Obukhov length [m]; infinite for a zero heat flux.
+
+    """
+    if pressure is None:
+        T_k = _np.asarray(temp, dtype="d") + (not kelvin) * T_0
+    else:
+        T_k = potential_temp(temp, pressure, kelvin=kelvin)
+    with _np.errstate(divide="ignore"):
+        return (
+            -(_np.asarray(u_star, dtype="d") ** 3)
+            * T_k
+            / (constants.kappa * _sc.g * _np.asarray(cov_w_ts, dtype="d"))
+        )
+
+
+def psi_m(zeta):
+    """
+    Calculate the integrated stability function for momentum.
+
+    The Businger–Dyer form of Paulson [P70]_ is used for unstable conditions
+    and ``-5 * zeta`` for stable conditions [D74]_.
+
+    Parameters
+    ----------
+    zeta : float or array_like
+        Stability parameter (z - d) / L.
+
+    Returns
+    -------
+    float or array_like
+        Integrated stability function for momentum.
+
+    See Also
+    --------
+    `psi_h` : The integrated stability function for heat.
+
+    References
+    ----------
+    .. [P70] Paulson, C. A. (1970). The mathematical representation of wind
+       speed and temperature profiles in the unstable atmospheric surface
+       layer. *Journal of Applied Meteorology*, 9(6), 857–861.
+       https://doi.org/10.1175/1520-0450(1970)009<0857:TMROWS>2.0.CO;2
+    .. [D74] Dyer, A. J. (1974). A review of flux-profile relationships.
+       *Boundary-Layer Meteorology*, 7(3), 363–372.
+       https://doi.org/10.1007/BF00240838
+
+    """
+    zeta = _np.asarray(zeta, dtype="d")
+    x = _np.sqrt(_np.sqrt(1.0 - 16.0 * _np.minimum(zeta, 0.0)))
+    unstable = (
+        2.0 * _np.log(0.5 * (1.0 + x))
+        + _np.log(0.5 * (1.0 + x * x))
+        - 2.0 * _np.arctan(x)
+        + 0.5 * _np.pi
+    )
+    return _np.where(zeta < 0.0, unstable, -5.0 * zeta)
+
+
+def psi_h(zeta):
+    """
+    Calculate the integrated stability function for heat.
+
+    The Businger–Dyer form of Paulson [P70]_ is used for unstable conditions
+    and ``-5 * zeta`` for stable conditions [D74]_.
+
+    Parameters
+    ----------
+    zeta : float or array_like
+        Stability parameter (z - d) / L.
+
+    Returns
+    -------
+    float or array_like
+        Integrated stability function for heat.
+
+    See Also
+    --------
+    `psi_m` : The integrated stability function for momentum.
+
+    """
+    zeta = _np.asarray(zeta, dtype="d")
+    x2 = _np.sqrt(1.0 - 16.0 * _np.minimum(zeta, 0.0))
+    return _np.where(zeta < 0.0, 2.0 * _np.log(0.5 * (1.0 + x2)), -5.0 * zeta)
+
+
+def turbulence_params(
+    cov_uw, cov_vw, cov_w_ts, temp, z, d=0.0, pressure=None, kelvin=False
+):
+    """
+    Calculate the turbulence parameters of many intervals at once.
+
+    Every parameter is computed once from the others, so that the results
+    can be shared by downstream calculations, e.g., quality control,
+    spectral corrections, and footprints.
+
+    Parameters
+    ----------
+    cov_uw, cov_vw : array_like
+        Covariances of the streamwise and crosswind speeds with the vertical
+        wind speed [m^2 s^-2].
+    cov_w_ts : array_like
+        Covariance of vertical wind speed and sonic temperature [m s^-1 K].
+    temp : array_like
+        Mean sonic temperature, in Celsius degree by default.
+    z : float or array_like
+        Measurement height [m].
+    d : float or array_like, optional
+        Zero-plane displacement height [m]. Default is 0.
+    pressure : array_like, optional
+        Ambient pressure [Pa]. If given, the Obukhov length uses the virtual
+        potential temperature. See `obukhov_length`.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    u_star : array_like
+        Friction velocity [m s^-1].
+    obukhov_length : array_like
+        Obukhov length [m].
+    zeta : array_like
+        Stability parameter (z - d) / L.
+    psi_m : array_like
+        Integrated stability function for momentum.
+    psi_h : array_like
+        Integrated stability function for heat.
+
+    Examples
+    --------
+    >>> tp = turbulence_params(-0.09, 0.0, 0.1, 20.0, 3.0)
+    >>> print("%.3f %.2f %.4f" % (tp.u_star, tp.obukhov_length, tp.zeta))
+    0.300 -20.18 -0.1487
+
+    """
+    u_star = friction_velocity(cov_uw, cov_vw)
+    length = obukhov_length(u_star, cov_w_ts, temp, pressure, kelvin)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        zeta = (_np.asarray(z, dtype="d") - d) / length
+
+    TurbulenceParams = namedtuple(
+        "TurbulenceParams",
+        ("u_star", "obukhov_length", "zeta", "psi_m", "psi_h"),
+    )
+    return TurbulenceParams(u_star, length, zeta, psi_m(zeta), psi_h(zeta))
@@ -0,0 +1,197 @@
+"""Friction velocity threshold detection for nighttime flux filtering."""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as _np
+
+
+def ustar_threshold(
+    u_star,
+    nee,
+    temp,
+    season=None,
+    n_temp=6,
+    n_ustar=20,
+    n_boot=0,
+    seed=None,
+    n_workers=None,
+):
+    """
+    Detect the friction velocity threshold with the moving point test.
+
+    In each season, the records are split into `n_temp` temperature classes
+    of equal size, and each temperature class into `n_ustar` friction
+    velocity classes of equal size. The threshold of a temperature class is
+    the mean friction velocity of the first class where the mean flux
+    reaches 99% of the mean flux of the higher classes [R05]_; temperature
+    classes where temperature and friction velocity are correlated
+    (``|r| >= 0.4``) are skipped. The seasonal threshold is the median over
+    the temperature classes, and the overall threshold is the maximum over
+    the seasons [P06]_.
+
+    Both the temperature classes and the sorting by friction velocity
+    within them are done once. The bootstrap resamples the records within
+    each temperature class by drawing counts of the presorted records, so
+    that the draws never have to be sorted again. Each draw has its own
+    random stream spawned from `seed`, which makes the results reproducible
+    regardless of `n_workers`.
+
+    Parameters
+    ----------
+    u_star : array_like
+        Friction velocity [m s^-1].
+    nee : array_like
+        Nighttime net ecosystem exchange. Records of daytime should be
+        excluded beforehand, e.g., by setting them to NaN.
+    temp : array_like
+        Air or soil temperature.
+    season : array_like, optional
+        Season labels of the records, e.g., ``month // 3``. Default is to
+        treat all records as one season.
+    n_temp : int, optional
+        Number of temperature classes. Default is 6.
+    n_ustar : int, optional
+        Number of friction velocity classes. Default is 20.
+    n_boot : int, optional
+        Number of bootstrap draws. Default is 0 (no bootstrap).
+    seed : int or numpy.random.SeedSequence, optional
+        Seed of the bootstrap random streams.
+    n_workers : int, optional
+        Number of worker processes for the bootstrap. Default is to run in
+        the current process.
+
+    Returns
+    -------
+    threshold : float
+        Friction velocity threshold [m s^-1]; NaN if not found.
+    season : array_like
+        Sorted unique season labels.
+    season_threshold : array_like
+        Threshold of each season [m s^-1].
+    bootstrap : array_like
+        Overall thresholds of the bootstrap draws [m s^-1].
+
+    References
+    ----------
+    .. [R05] Reichstein, M. et al. (2005). On the separation of net
+       ecosystem exchange into assimilation and ecosystem respiration:
+       review and improved algorithm. *Global Change Biology*, 11(9),
+       1424–1439. https://doi.org/10.1111/j.1365-2486.2005.001002.x
+    .. [P06] Papale, D. et al. (2006). Towards a standardized processing of
+       Net Ecosystem Exchange measured with eddy covariance technique:
+       algorithms and uncertainty estimation. *Biogeosciences*, 3(4),
+       571–583. https://doi.org/10.5194/bg-3-571-2006
+
+    """
+    u_star = _np.asarray(u_star, dtype="d")
+    nee = _np.asarray(nee, dtype="d")
+    temp = _np.asarray(temp, dtype="d")
+    if season is None:
+        season = _np.zeros(u_star.shape, dtype=int)
+    levels, season_index = _np.unique(season, return_inverse=True)
+    valid = _np.isfinite(u_star) & _np.isfinite(nee) & _np.isfinite(temp)
+
+    # sort once: by temperature in each season, then by u* in each class
+    classes = []
+    for k in range(levels.size):
+        idx = _np.flatnonzero(valid & (season_index.ravel() == k))
+        idx = idx[_np.argsort(temp[idx], kind="stable")]
+        season_classes = []
+        for cls in _np.array_split(idx, n_temp):
+            cls = cls[_np.argsort(u_star[cls], kind="stable")]
+            season_classes.append((u_star[cls], nee[cls], temp[cls]))
+        classes.append(season_classes)
+
+    season_threshold = _season_thresholds(classes, n_ustar, None)
+    boot = _np.full(int(n_boot), _np.nan)
+    if n_boot > 0:
+        seeds = _np.random.SeedSequence(seed).spawn(int(n_boot))
+        draw = partial(_bootstrap_draws, classes, n_ustar)
+        if n_workers is None:
+            boot = draw(seeds)
+        else:
+            batches = [
+                seeds[b[0] : b[-1] + 1]
+                for b in _np.array_split(_np.arange(int(n_boot)), n_workers)
+                if b.size
+            ]
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                boot = _np.concatenate(list(executor.map(draw, batches)))
+
+    UstarThresholdResult = namedtuple(
+        "UstarThresholdResult",
+        ("threshold", "season", "season_threshold", "bootstrap"),
+    )
+    return UstarThresholdResult(
+        _nan_reduce(_np.max, season_threshold), levels, season_threshold, boot
+    )
+
+
+def _bootstrap_draws(classes, n_ustar, seeds):
+    """
+    A helper function to calculate the overall thresholds of bootstrap
+    draws, each with its own random stream.
+    """
+    thresholds = _np.full(len(seeds), _np.nan)
+    for i, seed_seq in enumerate(seeds):
+        rng = _np.random.default_rng(seed_seq)
+        thresholds[i] = _nan_reduce(
+            _np.max, _season_thresholds(classes, n_ustar, rng)
+        )
+    return thresholds
+
+
+def _season_thresholds(classes, n_ustar, rng):
+    """
+    A helper function to calculate the seasonal thresholds, resampling the
+    temperature classes if a random generator is given.
+    """
+    thresholds = _np.full(len(classes), _np.nan)
+    for k, season_classes in enumerate(classes):
+        class_thresholds = []
+        for u, f, t in season_classes:
+            if rng is not None and u.size > 0:
+                counts = _np.bincount(
+                    rng.integers(0, u.size, u.size), minlength=u.size
+                )
+                # repeating the presorted records keeps them sorted by u*
+                idx = _np.repeat(_np.arange(u.size), counts)
+                u, f, t = u[idx], f[idx], t[idx]
+            class_thresholds.append(_class_threshold(u, f, t, n_ustar))
+        thresholds[k] = _nan_reduce(_np.median, _np.array(class_thresholds))
+    return thresholds
+
+
+def _class_threshold(u, f, t, n_ustar):
+    """
+    A helper function to find the threshold of a temperature class from its
+    records sorted by friction velocity.
+    """
+    n = u.size
+    if n < 3 * n_ustar:
+        return _np.nan
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        r = _np.corrcoef(t, u)[0, 1]
+    if not abs(r) < 0.4:
+        return _np.nan
+
+    starts = (_np.arange(n_ustar) * n) // n_ustar
+    counts = _np.diff(_np.r_[starts, n])
+    u_mean = _np.add.reduceat(u, starts) / counts
+    f_mean = _np.add.reduceat(f, starts) / counts
+    # mean flux of the classes above each class
+    higher = _np.cumsum(f_mean[::-1])[::-1][1:] / _np.arange(
+        n_ustar - 1, 0, -1
+    )
+    reached = f_mean[:-1] >= 0.99 * higher
+    if not _np.any(reached):
+        return _np.nan
+    return u_mean[_np.argmax(reached)]
+
+
+def _nan_reduce(func, values):
+    """A helper function to reduce the finite values, or return NaN."""
+    values = values[_np.isfinite(values)]
+    return func(values) if values.size else _np.nan
@@ -9,4 +9,4 @@ Leaf-scale exchange of mass and energy.
 
 """
 
-from . import light_response  # noqa
+from . import energy_balance, light_response, photosynthesis  # noqa
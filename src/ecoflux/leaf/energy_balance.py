@@ -0,0 +1,161 @@
+"""Leaf energy balance."""
+
+from collections import namedtuple
+
+import numpy as _np
+import scipy.constants as _sc
+
+from ecoflux.constants import constants
+from ecoflux.physchem.latent_heat import latent_heat_vap
+from ecoflux.physchem.sat_vap import dp_sat_h2o_dT, p_sat_h2o
+
+T_0: float = _sc.zero_Celsius
+
+
+def leaf_temp(
+    rad_abs,
+    temp_air,
+    e_air,
+    heat_cond,
+    vap_cond,
+    pressure=101325.0,
+    emissivity=0.97,
+    method="gg",
+    max_iter=50,
+    tol=1e-6,
+    kelvin=False,
+):
+    """
+    Solve the leaf energy balance for leaf temperature.
+
+    The leaf temperature balances the absorbed radiation with the thermal
+    emission from both sides of the leaf, the sensible heat flux, and the
+    latent heat flux [CN98]_,
+
+        ``R_abs = 2 * eps * sigma * T_l^4 + c_p * g_h * (T_l - T_a)
+        + lambda * g_v * (e_sat(T_l) - e_a) / p``.
+
+    The balance is solved by Newton iterations on whole arrays, e.g., of
+    leaves × time steps, with the analytic derivative of the saturation
+    vapor pressure `ecoflux.physchem.sat_vap.dp_sat_h2o_dT`. Each element
+    stops updating once its step is below `tol`, and the elements that have
+    not converged after `max_iter` iterations are NaN.
+
+    Parameters
+    ----------
+    rad_abs : array_like
+        Absorbed shortwave and longwave radiation of both sides per unit
+        leaf area [W m^-2].
+    temp_air : array_like
+        Air temperature, in Celsius degree by default.
+    e_air : array_like
+        Vapor pressure of the air [Pa].
+    heat_cond : array_like
+        Boundary layer conductance to heat of both sides [mol m^-2 s^-1].
+    vap_cond : array_like
+        Total leaf conductance to water vapor, i.e., stomatal and boundary
+        layer conductances in series [mol m^-2 s^-1].
+    pressure : float or array_like, optional
+        Ambient pressure [Pa]. Default is 101325 Pa.
+    emissivity : float, optional
+        Leaf emissivity. Default is 0.97.
+    method : str, optional
+        Method used to evaluate saturation vapor pressure. See
+        `ecoflux.physchem.sat_vap.p_sat_h2o`.
+    max_iter : int, optional
+        Maximum number of Newton iterations. Default is 50.
+    tol : float, optional
+        Tolerance of the temperature step [K]. Default is 1e-6.
+    kelvin : bool, optional
+        Temperature input and output are in Kelvin if enabled.
+
+    Returns
+    -------
+    temp : array_like
+        Leaf temperature, in Celsius degree by default.
+    sensible_heat : array_like
+        Sensible heat flux from the leaf [W m^-2].
+    latent_heat : array_like
+        Latent heat flux from the leaf [W m^-2].
+    transpiration : array_like
+        Transpiration rate [mol m^-2 s^-1].
+    converged : array_like
+        Boolean flags of convergence.
+
+    References
+    ----------
+    .. [CN98] Campbell, G. S. and Norman, J. M. (1998). *An Introduction to
+       Environmental Biophysics* (2nd ed.), pp. 224–229. Springer, New
+       York, NY, USA.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> res = leaf_temp([600.0, 800.0], 25.0, 2000.0, 1.0, [0.0, 0.2])
+    >>> np.round(res.temp, 2)
+    array([18.33, 21.94])
+
+    """
+    T_a = _np.asarray(temp_air, dtype="d") + (not kelvin) * T_0
+    rad_abs, T_a, e_air, heat_cond, vap_cond, pressure = (
+        _np.array(a, dtype="d")
+        for a in _np.broadcast_arrays(
+            rad_abs, T_a, e_air, heat_cond, vap_cond, pressure
+        )
+    )
+    # molar latent heat at the air temperature [J mol^-1]
+    lambda_m = latent_heat_vap(T_a, kelvin=True) * constants.M_w
+    emit = 2.0 * emissivity * _sc.sigma
+    g_heat = constants.cpm_d * heat_cond
+    g_vap = lambda_m * vap_cond / pressure
+
+    # iterate on the flattened elements that have not converged
+    flat = [a.ravel() for a in (rad_abs, T_a, e_air, g_heat, g_vap)]
+    T_l = T_a.copy()
+    flat_T = T_l.reshape(-1)
+    converged = _np.zeros(T_l.shape, dtype=bool)
+    flat_conv = converged.reshape(-1)
+    active = _np.flatnonzero(_np.all(_np.isfinite(flat), axis=0))
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        r, t_a, e_a, g_h, g_v = (a[active] for a in flat)
+        T = flat_T[active]
+        balance = (
+            r
+            - emit * T**4
+            - g_h * (T - t_a)
+            - g_v * (p_sat_h2o(T, kelvin=True, method=method) - e_a)
+        )
+        deriv = (
+            -4.0 * emit * T**3
+            - g_h
+            - g_v * dp_sat_h2o_dT(T, kelvin=True, method=method)
+        )
+        # limit the steps to keep the iterations in the physical range
+        step = _np.clip(-balance / deriv, -10.0, 10.0)
+        flat_T[active] = T + step
+        done = _np.abs(step) < tol
+        flat_conv[active[done]] = True
+        active = active[~done]
+
+    T_l = _np.where(converged, T_l, _np.nan)
+    sensible_heat = g_heat * (T_l - T_a)
+    transpiration = (
+        vap_cond
+        * (p_sat_h2o(T_l, kelvin=True, method=method) - e_air)
+        / pressure
+    )
+    latent_heat = lambda_m * transpiration
+
+    LeafTempResult = namedtuple(
+        "LeafTempResult",
+        ("temp", "sensible_heat", "latent_heat", "transpiration", "converged"),
+    )
+    return LeafTempResult(
+        T_l - (not kelvin) * T_0,
+        sensible_heat,
+        latent_heat,
+        transpiration,
+        converged,
+    )
@@ -1,9 +1,12 @@
 """Light response of leaf photosynthesis."""
 
-from typing import Tuple
+from collections import namedtuple
+from typing import Optional, Tuple
 
 import numpy as _np
 
+from ecoflux.stats.regressions import batch_least_squares, pack_groups
+
 
 def michaelis_menten(p: Tuple[float, float, float], par: _np.ndarray):
     r"""
@@ -79,6 +82,45 @@ def residual_michaelis_menten(
     return p_m * par / (k_par + par) - r_d - A_n
 
 
+def jac_michaelis_menten(
+    p: Tuple[float, float, float],
+    par: _np.ndarray,
+    A_n: Optional[_np.ndarray] = None,
+):
+    r"""
+    Jacobian of the residual function for Michaelis–Menten light response.
+
+    Parameters
+    ----------
+    p : tuple
+        A tuple of three parameters, as in `michaelis_menten`.
+    par : array_like
+        Photosynthetically active radiation
+        [µmol photons m\ :sup:`–2` s\ :sup:`–1`].
+    A_n : array_like, optional
+        Measured photosynthetic assimilation rate. Not used; accepted so
+        that the function takes the same arguments as
+        `residual_michaelis_menten`, e.g., in
+        ``scipy.optimize.least_squares(..., jac=jac_michaelis_menten)``.
+
+    Returns
+    -------
+    array_like
+        Derivatives of the residuals with respect to the parameters, with
+        the parameters along the last axis.
+
+    """
+    k_par, p_m, r_d = p
+    par = _np.asarray(par, dtype="d")
+    sat = par / (k_par + par)
+    return _np.stack(
+        _np.broadcast_arrays(
+            -p_m * sat / (k_par + par), sat, -_np.ones_like(sat)
+        ),
+        axis=-1,
+    )
+
+
 def hyperbolic(p: Tuple[float, float, float, float], par: _np.ndarray):
     r"""
     Hyperbolic light response function.
@@ -118,16 +160,11 @@ def hyperbolic(p: Tuple[float, float, float, float], par: _np.ndarray):
 
     """
     theta, alpha, p_m, r_d = p
-    if _np.isclose(theta, 0.0):
-        A_n = alpha * p_m * par / (alpha * par + p_m) - r_d
-    else:
-        A_n = (
-            alpha * par
-            + p_m
-            - _np.sqrt(
-                (alpha * par + p_m) ** 2 - 4.0 * theta * alpha * par * p_m
-            )
-        ) * 0.5 / theta - r_d
+    # the smaller root of the quadratic, in a form that has no cancellation
+    # error and is also valid at theta = 0 (the rectangular hyperbola)
+    s = alpha * par + p_m
+    q = alpha * par * p_m
+    A_n = 2.0 * q / (s + _np.sqrt(s * s - 4.0 * theta * q)) - r_d
     return A_n
 
 
@@ -166,3 +203,165 @@ def residual_hyperbolic(
 
     """
     return hyperbolic(p, par) - A_n
+
+
+def jac_hyperbolic(
+    p: Tuple[float, float, float, float],
+    par: _np.ndarray,
+    A_n: Optional[_np.ndarray] = None,
+):
+    r"""
+    Jacobian of the residual function for the hyperbolic light response.
+
+    The gross rate *P* is the smaller root of
+    *θP*\ :sup:`2` – (*αI* + *P*\ :sub:`m`)\ *P* + *αIP*\ :sub:`m` = 0,
+    so its derivatives follow from implicit differentiation, e.g.,
+    ∂\ *P*/∂\ *θ* = *P*\ :sup:`2`/*D* with the discriminant root *D*.
+    These forms have no branch and hold at *θ* = 0.
+
+    Parameters
+    ----------
+    p : tuple
+        A tuple of four parameters, as in `hyperbolic`.
+    par : array_like
+        Photosynthetically active radiation
+        [µmol photons m\ :sup:`–2` s\ :sup:`–1`].
+    A_n : array_like, optional
+        Measured photosynthetic assimilation rate. Not used; accepted so
+        that the function takes the same arguments as
+        `residual_hyperbolic`, e.g., in
+        ``scipy.optimize.least_squares(..., jac=jac_hyperbolic)``.
+
+    Returns
+    -------
+    array_like
+        Derivatives of the residuals with respect to the parameters, with
+        the parameters along the last axis.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> jac_hyperbolic([0.7, 0.04, 20., 2.], np.array([0., 1500.]))
+    array([[ 0.        ,  0.        ,  0.        , -1.        ],
+           [ 5.72060971, 60.94379449,  0.76610545, -1.        ]])
+
+    """
+    theta, alpha, p_m, r_d = p
+    par = _np.asarray(par, dtype="d")
+    s = alpha * par + p_m
+    q = alpha * par * p_m
+    d = _np.sqrt(s * s - 4.0 * theta * q)
+    gross = 2.0 * q / (s + d)
+    return _np.stack(
+        _np.broadcast_arrays(
+            gross * gross / d,
+            par * (p_m - gross) / d,
+            (alpha * par - gross) / d,
+            -_np.ones_like(gross),
+        ),
+        axis=-1,
+    )
+
+
+def fit_light_response(curve, par, A_n, model="hyperbolic", p0=None):
+    r"""
+    Fit many light response curves at once.
+
+    The records of all curves are packed into NaN-padded arrays and every
+    curve is fitted together with the vectorized Levenberg–Marquardt solver
+    `ecoflux.stats.regressions.batch_least_squares`, using the analytic
+    Jacobians `jac_hyperbolic` and `jac_michaelis_menten`.
+
+    Parameters
+    ----------
+    curve : array_like
+        Curve labels of the records. Records of a curve need not be
+        contiguous.
+    par : array_like
+        Photosynthetically active radiation
+        [µmol photons m\ :sup:`–2` s\ :sup:`–1`].
+    A_n : array_like
+        Measured photosynthetic assimilation rate
+        [µmol m\ :sup:`–2` s\ :sup:`–1`]. NaNs are ignored.
+    model : str, optional
+        'hyperbolic' (default) or 'michaelis_menten'.
+    p0 : array_like, optional
+        Initial guess of the parameters, either one for all curves or one
+        per curve with the shape (n_curves, n_params). Default is to guess
+        from the data of each curve.
+
+    Returns
+    -------
+    curve : array_like
+        Sorted unique curve labels.
+    params : array_like
+        Fitted parameters of the curves, with the shape (n_curves, 4) for
+        `hyperbolic` or (n_curves, 3) for `michaelis_menten`.
+    stderr : array_like
+        Standard errors of the parameters.
+    converged : array_like
+        Boolean flags of convergence.
+
+    Raises
+    ------
+    ValueError
+        If the model is unknown.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> par = np.tile([0., 50., 100., 200., 400., 800., 1200., 1600.], 2)
+    >>> curve = np.repeat([0, 1], 8)
+    >>> A_n = np.r_[
+    ...     hyperbolic([0.7, 0.05, 20., 2.], par[:8]),
+    ...     hyperbolic([0.8, 0.04, 15., 1.], par[8:]),
+    ... ]
+    >>> fit = fit_light_response(curve, par, A_n)
+    >>> np.round(fit.params, 3)
+    array([[ 0.7 ,  0.05, 20.  ,  2.  ],
+           [ 0.8 ,  0.04, 15.  ,  1.  ]])
+
+    """
+    if model == "hyperbolic":
+        residual, jac = residual_hyperbolic, jac_hyperbolic
+    elif model == "michaelis_menten":
+        residual, jac = residual_michaelis_menten, jac_michaelis_menten
+    else:
+        raise ValueError("Unknown light response model: %s" % model)
+
+    levels, (par_pk, A_n_pk) = pack_groups(curve, par, A_n)
+    par_pk = _np.where(_np.isfinite(A_n_pk), par_pk, _np.nan)
+    if p0 is None:
+        p0 = _guess_light_response(par_pk, A_n_pk, model)
+    else:
+        p0 = _np.broadcast_to(
+            _np.asarray(p0, dtype="d"), (levels.size, _np.shape(p0)[-1])
+        )
+    fit = batch_least_squares(
+        lambda p, par, A_n: residual(p.T[..., None], par, A_n),
+        p0,
+        args=(par_pk, A_n_pk),
+        jac=lambda p, par, A_n: jac(p.T[..., None], par),
+    )
+
+    LightResponseFitResult = namedtuple(
+        "LightResponseFitResult", ("curve", "params", "stderr", "converged")
+    )
+    return LightResponseFitResult(levels, fit.x, fit.stderr, fit.converged)
+
+
+def _guess_light_response(par, A_n, model):
+    """
+    A helper function to guess the initial parameters of NaN-padded light
+    response curves.
+    """
+    finite = _np.isfinite(A_n)
+    a_max = _np.max(_np.where(finite, A_n, -_np.inf), axis=1)
+    i_dark = _np.argmin(_np.where(finite, par, _np.inf), axis=1)
+    r_d = _np.maximum(-A_n[_np.arange(A_n.shape[0]), i_dark], 0.5)
+    p_m = _np.maximum(a_max + r_d, 1.0)
+    p0 = _np.column_stack((_np.full(r_d.shape, 0.05), p_m, r_d))
+    if model == "hyperbolic":
+        return _np.column_stack((_np.full(r_d.shape, 0.7), p0))
+    # Michaelis constant at the half-saturation of the guessed rates
+    return _np.column_stack((p_m / 0.05 * 0.5, p_m, r_d))
@@ -0,0 +1,442 @@
+"""Farquhar–von Caemmerer–Berry model of leaf photosynthesis."""
+
+from collections import namedtuple
+
+import numpy as _np
+import scipy.constants as _sc
+
+from ecoflux.leaf.light_response import hyperbolic
+from ecoflux.stats.regressions import batch_least_squares, pack_groups
+
+T_0: float = _sc.zero_Celsius
+
+# values at 25 C and activation energies [J mol^-1] [BSPL01]_ [SBCL07]_
+K_C_25: float = 404.9  # Michaelis constant of CO2 [µmol mol^-1]
+K_O_25: float = 278.4  # Michaelis constant of O2 [mmol mol^-1]
+GAMMA_STAR_25: float = 42.75  # CO2 compensation point [µmol mol^-1]
+H_A_K_C: float = 79430.0
+H_A_K_O: float = 36380.0
+H_A_GAMMA_STAR: float = 37830.0
+H_A_VCMAX: float = 65330.0
+H_A_J: float = 43900.0
+H_A_TPU: float = 53100.0
+H_A_RD: float = 46390.0
+
+
+def arrhenius(value_25, energy, temp, kelvin=False):
+    """
+    Scale a parameter from 25 °C with the Arrhenius function.
+
+    Parameters
+    ----------
+    value_25 : float or array_like
+        Value at 25 °C.
+    energy : float
+        Activation energy [J mol^-1].
+    temp : float or array_like
+        Leaf temperature, in Celsius degree by default.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    float or array_like
+        Value at the temperature.
+
+    """
+    T_k = _np.asarray(temp, dtype="d") + (not kelvin) * T_0
+    T_25 = T_0 + 25.0
+    return value_25 * _np.exp(energy * (T_k - T_25) / (_sc.R * T_25 * T_k))
+
+
+def temperature_factors(temp, kelvin=False):
+    """
+    Calculate the temperature responses of the FvCB parameters.
+
+    The maximum rates and the daytime respiration are returned as factors
+    relative to their values at 25 °C, and the kinetic constants as values
+    at the temperature, all with the Arrhenius function.
+
+    Parameters
+    ----------
+    temp : float or array_like
+        Leaf temperature, in Celsius degree by default.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    vcmax : float or array_like
+        Factor of the maximum carboxylation rate.
+    j : float or array_like
+        Factor of the maximum electron transport rate.
+    tpu : float or array_like
+        Factor of the triose phosphate utilization rate.
+    rd : float or array_like
+        Factor of the daytime respiration.
+    k_c : float or array_like
+        Michaelis constant of CO2 [µmol mol^-1].
+    k_o : float or array_like
+        Michaelis constant of O2 [mmol mol^-1].
+    gamma_star : float or array_like
+        CO2 compensation point [µmol mol^-1].
+
+    Examples
+    --------
+    >>> f = temperature_factors(25.)
+    >>> float(f.vcmax), float(f.k_c)
+    (1.0, 404.9)
+
+    """
+    TemperatureFactors = namedtuple(
+        "TemperatureFactors",
+        ("vcmax", "j", "tpu", "rd", "k_c", "k_o", "gamma_star"),
+    )
+    return TemperatureFactors(
+        arrhenius(1.0, H_A_VCMAX, temp, kelvin),
+        arrhenius(1.0, H_A_J, temp, kelvin),
+        arrhenius(1.0, H_A_TPU, temp, kelvin),
+        arrhenius(1.0, H_A_RD, temp, kelvin),
+        arrhenius(K_C_25, H_A_K_C, temp, kelvin),
+        arrhenius(K_O_25, H_A_K_O, temp, kelvin),
+        arrhenius(GAMMA_STAR_25, H_A_GAMMA_STAR, temp, kelvin),
+    )
+
+
+def fvcb(
+    ci,
+    temp,
+    vcmax25,
+    jmax25,
+    rd25,
+    tpu25=_np.inf,
+    par=None,
+    o2=210.0,
+    theta=0.7,
+    alpha=0.3,
+    kelvin=False,
+):
+    """
+    Calculate leaf photosynthesis with the FvCB model.
+
+    The net assimilation rate is the minimum of the Rubisco-limited,
+    RuBP-regeneration-limited, and TPU-limited rates less the daytime
+    respiration [FvCB80]_, with the temperature responses of Bernacchi et
+    al. [BSPL01]_. The electron transport rate is the non-rectangular
+    hyperbola `ecoflux.leaf.light_response.hyperbolic` of the light, with
+    the maximum `jmax25` at 25 °C. All arguments broadcast, e.g., against
+    each other as arrays of leaves × conditions.
+
+    Parameters
+    ----------
+    ci : array_like
+        Intercellular CO2 mole fraction [µmol mol^-1].
+    temp : array_like
+        Leaf temperature, in Celsius degree by default.
+    vcmax25 : array_like
+        Maximum carboxylation rate at 25 °C [µmol m^-2 s^-1].
+    jmax25 : array_like
+        Maximum electron transport rate at 25 °C [µmol m^-2 s^-1].
+    rd25 : array_like
+        Daytime respiration at 25 °C [µmol m^-2 s^-1].
+    tpu25 : array_like, optional
+        Triose phosphate utilization rate at 25 °C [µmol m^-2 s^-1].
+        Default is no TPU limitation.
+    par : array_like, optional
+        Absorbed photosynthetically active radiation [µmol m^-2 s^-1].
+        Default is saturating light, i.e., ``J = Jmax``.
+    o2 : float or array_like, optional
+        Intercellular O2 mole fraction [mmol mol^-1]. Default is 210.
+    theta : float, optional
+        Curvature of the light response of electron transport. Default is
+        0.7.
+    alpha : float, optional
+        Quantum yield of electron transport. Default is 0.3.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    a_n : array_like
+        Net assimilation rate [µmol m^-2 s^-1].
+    w_c : array_like
+        Rubisco-limited gross rate [µmol m^-2 s^-1].
+    w_j : array_like
+        RuBP-regeneration-limited gross rate [µmol m^-2 s^-1].
+    w_p : array_like
+        TPU-limited gross rate [µmol m^-2 s^-1].
+    r_d : array_like
+        Daytime respiration [µmol m^-2 s^-1].
+
+    References
+    ----------
+    .. [FvCB80] Farquhar, G. D., von Caemmerer, S., and Berry, J. A. (1980).
+       A biochemical model of photosynthetic CO2 assimilation in leaves of
+       C3 species. *Planta*, 149(1), 78–90.
+       https://doi.org/10.1007/BF00386231
+    .. [BSPL01] Bernacchi, C. J., Singsaas, E. L., Pimentel, C., Portis Jr,
+       A. R., and Long, S. P. (2001). Improved temperature response
+       functions for models of Rubisco-limited photosynthesis. *Plant, Cell
+       & Environment*, 24(2), 253–259.
+       https://doi.org/10.1111/j.1365-3040.2001.00668.x
+    .. [SBCL07] Sharkey, T. D., Bernacchi, C. J., Farquhar, G. D., and
+       Singsaas, E. L. (2007). Fitting photosynthetic carbon dioxide
+       response curves for C3 leaves. *Plant, Cell & Environment*, 30(9),
+       1035–1040. https://doi.org/10.1111/j.1365-3040.2007.01710.x
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> res = fvcb([100., 400., 1000.], 25., 60., 120., 1.)
+    >>> np.round(res.a_n, 2)
+    array([ 3.24, 18.31, 25.46])
+
+    """
+    ci = _np.asarray(ci, dtype="d")
+    f = temperature_factors(temp, kelvin)
+    g_c, g_j = _ci_factors(ci, o2, f)
+    jmax = jmax25 * f.j
+    j = jmax if par is None else hyperbolic((theta, alpha, jmax, 0.0), par)
+    w_c = vcmax25 * f.vcmax * g_c
+    w_j = j * g_j
+    w_p = _np.broadcast_to(3.0 * tpu25 * f.tpu, _np.shape(w_c))
+    r_d = rd25 * f.rd
+
+    FvCBResult = namedtuple("FvCBResult", ("a_n", "w_c", "w_j", "w_p", "r_d"))
+    return FvCBResult(
+        _np.minimum(_np.minimum(w_c, w_j), w_p) - r_d, w_c, w_j, w_p, r_d
+    )
+
+
+def fit_aci(curve, ci, A_n, temp=25.0, o2=210.0, fit_tpu=False, kelvin=False):
+    """
+    Fit many A/Ci curves at once with the FvCB model.
+
+    The curves are packed into NaN-padded arrays. Since the model is the
+    minimum of the limited rates, the initial parameters are fitted from
+    the lowest-Ci points as Rubisco-limited and from the highest-Ci points
+    as RuBP-limited; every point is then assigned to its lowest rate once,
+    and the parameters are refitted by linear least squares. The start with
+    the lower cost of the full model is refined with
+    `ecoflux.stats.regressions.batch_least_squares`, in which every point
+    takes the Jacobian of its limiting rate. A parameter whose limitation
+    is not strictly limiting at any point of a curve is not determined by
+    the data; it has a NaN standard error, and the curve is flagged as not
+    converged.
+
+    Parameters
+    ----------
+    curve : array_like
+        Curve labels of the records.
+    ci : array_like
+        Intercellular CO2 mole fraction [µmol mol^-1].
+    A_n : array_like
+        Measured net assimilation rate [µmol m^-2 s^-1]. NaNs are ignored.
+    temp : float or array_like, optional
+        Leaf temperature, in Celsius degree by default. Default is 25 °C.
+    o2 : float or array_like, optional
+        Intercellular O2 mole fraction [mmol mol^-1]. Default is 210.
+    fit_tpu : bool, optional
+        Also fit the TPU limitation if enabled. Default is `False`.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    curve : array_like
+        Sorted unique curve labels.
+    params : array_like
+        Fitted Vcmax, J, and Rd at 25 °C (and TPU if `fit_tpu`), with the
+        shape (n_curves, 3) or (n_curves, 4). J is the electron transport
+        rate at the light of the measurements.
+    stderr : array_like
+        Standard errors of the parameters.
+    converged : array_like
+        Boolean flags of convergence; False also where a parameter is not
+        determined by the data.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> ci = np.array([50., 100., 200., 300., 400., 600., 800., 1200.])
+    >>> A_n = fvcb(ci, 25., 60., 120., 1.).a_n
+    >>> fit = fit_aci(np.zeros(8), ci, A_n)
+    >>> np.round(fit.params, 3)
+    array([[ 60., 120.,   1.]])
+
+    """
+    temp = _np.broadcast_to(_np.asarray(temp, dtype="d"), _np.shape(ci))
+    o2 = _np.broadcast_to(_np.asarray(o2, dtype="d"), _np.shape(ci))
+    levels, (ci_pk, A_n_pk, temp_pk, o2_pk) = pack_groups(
+        curve, ci, A_n, temp, o2
+    )
+    finite = _np.isfinite(A_n_pk) & _np.isfinite(ci_pk)
+    f = temperature_factors(temp_pk, kelvin)
+    g_c, g_j = _ci_factors(ci_pk, o2_pk, f)
+    # derivatives of the limited rates with respect to their parameters
+    d_c, d_j, d_p, d_r = f.vcmax * g_c, f.j * g_j, 3.0 * f.tpu, -f.rd
+
+    def rates(p, d_c, d_j, d_p):
+        w = [p[:, :1] * d_c, p[:, 1:2] * d_j]
+        if fit_tpu:
+            w.append(p[:, 3:4] * d_p)
+        return _np.stack(w, axis=-1)
+
+    def resid(p, a, d_c, d_j, d_p, d_r):
+        return _np.min(rates(p, d_c, d_j, d_p), axis=-1) + p[:, 2:3] * d_r - a
+
+    def jac(p, a, d_c, d_j, d_p, d_r):
+        limit = _np.argmin(rates(p, d_c, d_j, d_p), axis=-1)
+        jacobian = _np.zeros(a.shape + (p.shape[1],))
+        jacobian[..., 0] = _np.where(limit == 0, d_c, 0.0)
+        jacobian[..., 1] = _np.where(limit == 1, d_j, 0.0)
+        jacobian[..., 2] = d_r
+        if fit_tpu:
+            jacobian[..., 3] = _np.where(limit == 2, d_p, 0.0)
+        return jacobian
+
+    p0 = _guess_aci(ci_pk, A_n_pk, finite, d_c, d_j, d_p, d_r, fit_tpu)
+    args = (
+        _np.where(finite, A_n_pk, _np.nan),
+        *_np.broadcast_arrays(d_c, d_j, d_p, d_r),
+    )
+    fit = batch_least_squares(resid, p0, args=args, jac=jac)
+    # limitations that are strictly limiting at no point, i.e., whose
+    # parameters are not determined by the data
+    w = rates(fit.x, *args[1:4])
+    limiting = _np.zeros(finite.shape + (p0.shape[1],), dtype=bool)
+    limiting[..., 2] = True
+    for i, col in enumerate((0, 1, 3)[: w.shape[-1]]):
+        other = _np.min(_np.delete(w, i, axis=-1), axis=-1)
+        limiting[..., col] = w[..., i] < other - 1e-8 * (1.0 + _np.abs(other))
+    active = _np.any(limiting & finite[..., None], axis=1)
+    stderr = _np.where(active, fit.stderr, _np.nan)
+    converged = fit.converged & _np.all(active, axis=1)
+
+    AciFitResult = namedtuple(
+        "AciFitResult", ("curve", "params", "stderr", "converged")
+    )
+    return AciFitResult(levels, fit.x, stderr, converged)
+
+
+def _ci_factors(ci, o2, f):
+    """
+    A helper function to calculate the CO2 dependences of the Rubisco- and
+    RuBP-limited rates per unit Vcmax and J.
+    """
+    g_c = (ci - f.gamma_star) / (ci + f.k_c * (1.0 + o2 / f.k_o))
+    g_j = (ci - f.gamma_star) / (4.0 * ci + 8.0 * f.gamma_star)
+    return g_c, g_j
+
+
+def _guess_aci(ci, A_n, finite, d_c, d_j, d_p, d_r, fit_tpu):
+    """
+    A helper function to guess the initial parameters of NaN-padded A/Ci
+    curves from a single estimate of the limitation of every point.
+
+    Two starts are tried on every curve: Vcmax and Rd from the line through
+    the two lowest-Ci points as Rubisco-limited, and J and Rd from the line
+    through the two highest-Ci points as RuBP-limited. Every limited rate is
+    at least the gross assimilation, so the other rates start from the
+    largest gross rates per unit of their limited rates. Each point is then
+    assigned to its lowest rate, and the parameters are refitted by linear
+    least squares on their points. The start with the lower cost of the
+    full model is kept, and curves without a feasible guess get default
+    values.
+    """
+    rows = _np.arange(ci.shape[0])
+    d_c, d_j, d_p, d_r = (
+        _np.broadcast_to(a, ci.shape) for a in (d_c, d_j, d_p, d_r)
+    )
+    d_rates = (d_c, d_j, d_p)[: 2 + fit_tpu]
+    y = _np.where(finite, A_n, 0.0)
+    order = _np.argsort(_np.where(finite, ci, _np.inf), axis=1)
+    last = _np.maximum(_np.sum(finite, axis=1) - 1, 1)
+    ends = [
+        (0, order[:, 0], order[:, 1]),
+        (1, order[rows, last - 1], order[rows, last]),
+    ]
+
+    best_p = _np.full((ci.shape[0], 3 + fit_tpu), _np.nan)
+    best_cost = _np.full(ci.shape[0], _np.inf)
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        for i, i0, i1 in ends:
+            # the line through two points limited by rate `i`
+            (a0, a1), (r0, r1), (y0, y1) = (
+                (a[rows, i0], a[rows, i1]) for a in (d_rates[i], d_r, y)
+            )
+            det = a0 * r1 - a1 * r0
+            rate = (y0 * r1 - y1 * r0) / det
+            r_d = (a0 * y1 - a1 * y0) / det
+            r_d = _np.where(_np.isfinite(r_d) & (r_d > 0.0), r_d, 1.0)
+            gross = y - r_d[:, None] * d_r
+            rates = [
+                _np.max(_np.where(finite, gross / d, -_np.inf), axis=1)
+                for d in d_rates
+            ]
+            rates[i] = rate
+            p, cost = _refine_aci(rates, r_d, y, finite, d_rates, d_r)
+            better = cost < best_cost
+            best_p[better] = p[better]
+            best_cost[better] = cost[better]
+
+    default = [50.0, 100.0, 1.0]
+    if fit_tpu:
+        default.append(
+            _np.max(_np.where(finite, A_n, 0.0), axis=1) / 3.0 + 1.0
+        )
+    return _np.column_stack(
+        [
+            _np.where(_np.isfinite(p) & (p > 0.0), p, d)
+            for p, d in zip(best_p.T, default)
+        ]
+    )
+
+
+def _refine_aci(rates, r_d, y, finite, d_rates, d_r):
+    """
+    A helper function to assign the points of NaN-padded A/Ci curves to
+    their lowest limited rates, refit the parameters by linear least squares
+    on the assigned points, and return the parameters in the order of
+    `fit_aci` and the cost of the full model.
+    """
+    limit = _np.argmin(
+        _np.stack([r[:, None] * d for r, d in zip(rates, d_rates)], axis=-1),
+        axis=-1,
+    )
+    # Vcmax and Rd from the Rubisco-limited points
+    on = finite & (limit == 0)
+    d_c = d_rates[0]
+    a11, a12, a22, b1, b2 = (
+        _np.sum(_np.where(on, u * v, 0.0), axis=1)
+        for u, v in ((d_c, d_c), (d_c, d_r), (d_r, d_r), (d_c, y), (d_r, y))
+    )
+    det = a11 * a22 - a12 * a12
+    refit = (_np.sum(on, axis=1) >= 2) & (det > 1e-10 * a11 * a22)
+    vcmax = _np.where(refit, (b1 * a22 - b2 * a12) / det, rates[0])
+    r_d_fit = (a11 * b2 - a12 * b1) / det
+    r_d = _np.where(refit & (r_d_fit > 0.0), r_d_fit, r_d)
+    gross = y - r_d[:, None] * d_r
+
+    # J and TPU from the RuBP- and TPU-limited points
+    p = [vcmax]
+    for i in range(1, len(d_rates)):
+        on = finite & (limit == i)
+        d = d_rates[i]
+        fitted = _np.sum(_np.where(on, d * gross, 0.0), axis=1) / _np.sum(
+            _np.where(on, d * d, 0.0), axis=1
+        )
+        p.append(_np.where(_np.any(on, axis=1), fitted, rates[i]))
+    p.insert(2, r_d)
+    p = _np.column_stack(p)
+
+    model = _np.min(
+        _np.stack(
+            [p[:, (0, 1, 3)[i], None] * d for i, d in enumerate(d_rates)],
+            axis=-1,
+        ),
+        axis=-1,
+    )
+    resid = _np.where(finite, model + p[:, 2:3] * d_r - y, 0.0)
+    feasible = _np.all(_np.isfinite(p) & (p > 0.0), axis=1)
+    return p, _np.where(feasible, _np.sum(resid * resid, axis=1), _np.inf)
@@ -1,6 +1,13 @@
 """Stomatal conductance."""
 
+from collections import namedtuple
+
+import numpy as _np
+
+from ecoflux.leaf.light_response import hyperbolic
+from ecoflux.leaf.photosynthesis import temperature_factors
 from ecoflux.physchem.sat_vap import p_sat_h2o
+from ecoflux.stats.regressions import grouped_linregress
 
 
 def ball_berry_predictor(A_n, E, pressure, T_leaf, stom_cond, bl_cond, co2):
@@ -41,3 +48,435 @@ def ball_berry_predictor(A_n, E, pressure, T_leaf, stom_cond, bl_cond, co2):
     h_s = 1.0 - (E * pressure) / (p_sat_h2o(T_leaf) * stom_cond)
     co2_s = co2 - A_n * 1.37 / bl_cond
     return A_n * h_s / co2_s
+
+
+def medlyn_predictor(A_n, E, pressure, stom_cond, bl_cond, co2):
+    r"""
+    Calculate the Medlyn predictor (1.6 * A / (co2_s * sqrt(D_s))) from leaf
+    flux data.
+
+    With this predictor, the Medlyn model [M11]_ is linear,
+    ``g_s - 1.6 * A / co2_s = g0 + g1 * predictor``. Note: This function is
+    used for processing leaf-level gas-exchange data. It does not describe a
+    forward model for stomatal conductance.
+
+    Parameters
+    ----------
+    A_n : array_like
+        CO2 assimilation rate [µmol m\ :sup:`–2` s\ :sup:`–1`].
+    E : array_like
+        Transpiration rate [mol m\ :sup:`–2` s\ :sup:`–1`].
+    pressure : array_like
+        Ambient pressure [Pa].
+    stom_cond : array_like
+        Stomatal conductance to water vapor [mol m\ :sup:`–2` s\ :sup:`–1`].
+    bl_cond : array_like
+        Boundary layer conductance to water vapor
+        [mol m\ :sup:`–2` s\ :sup:`–1`].
+    co2 : array_like
+        Ambient CO2 concentration [µmol mol\ :sup:`–1`].
+
+    Returns
+    -------
+    array_like
+        Medlyn predictor ``(1.6 * A / (co2_s * sqrt(D_s)))``
+        [mol m\ :sup:`–2` s\ :sup:`–1` kPa\ :sup:`–0.5`], where ``D_s`` is
+        the vapor pressure deficit from the leaf to the leaf surface in kPa.
+
+    """
+    # the leaf-to-surface vapor pressure deficit drives the transpiration
+    vpd_s = E * pressure / stom_cond * 1e-3
+    co2_s = co2 - A_n * 1.37 / bl_cond
+    return 1.6 * A_n / (co2_s * _np.sqrt(vpd_s))
+
+
+def fit_ball_berry(groups, A_n, E, pressure, T_leaf, stom_cond, bl_cond, co2):
+    r"""
+    Fit the Ball–Berry model to the leaf flux data of many groups at once.
+
+    The stomatal conductance is regressed on `ball_berry_predictor` in every
+    group with `ecoflux.stats.regressions.grouped_linregress`, so that the
+    slope is g1 and the intercept is g0.
+
+    Parameters
+    ----------
+    groups : array_like
+        Group labels of the records, e.g., leaf, species, or campaign IDs.
+    A_n, E, pressure, T_leaf, stom_cond, bl_cond, co2 : array_like
+        See `ball_berry_predictor`. NaNs are ignored.
+
+    Returns
+    -------
+    group : array_like
+        Sorted unique group labels.
+    g0 : array_like
+        Residual stomatal conductance [mol m\ :sup:`–2` s\ :sup:`–1`].
+    g1 : array_like
+        Ball–Berry slope.
+    g0_stderr, g1_stderr : array_like
+        Standard errors of g0 and g1.
+    rvalue : array_like
+        Pearson correlation coefficients.
+    count : array_like
+        Numbers of finite records in the groups.
+
+    """
+    predictor = ball_berry_predictor(
+        A_n, E, pressure, T_leaf, stom_cond, bl_cond, co2
+    )
+    return _stom_cond_fit(groups, predictor, stom_cond)
+
+
+def fit_medlyn(groups, A_n, E, pressure, stom_cond, bl_cond, co2):
+    r"""
+    Fit the Medlyn model to the leaf flux data of many groups at once.
+
+    The linearized model ``g_s - 1.6 * A / co2_s = g0 + g1 * predictor``
+    with the predictor of `medlyn_predictor` is fitted in every group with
+    `ecoflux.stats.regressions.grouped_linregress`.
+
+    Parameters
+    ----------
+    groups : array_like
+        Group labels of the records, e.g., leaf, species, or campaign IDs.
+    A_n, E, pressure, stom_cond, bl_cond, co2 : array_like
+        See `medlyn_predictor`. NaNs are ignored.
+
+    Returns
+    -------
+    group : array_like
+        Sorted unique group labels.
+    g0 : array_like
+        Residual stomatal conductance [mol m\ :sup:`–2` s\ :sup:`–1`].
+    g1 : array_like
+        Medlyn slope [kPa\ :sup:`0.5`].
+    g0_stderr, g1_stderr : array_like
+        Standard errors of g0 and g1.
+    rvalue : array_like
+        Pearson correlation coefficients.
+    count : array_like
+        Numbers of finite records in the groups.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> vpd = np.array([0.5, 1.0, 1.5, 2.0, 0.5, 1.0, 1.5, 2.0])
+    >>> A_n = np.full(8, 15.0)
+    >>> g1 = np.repeat([3.0, 5.0], 4)
+    >>> g_s = 0.02 + 1.6 * (1.0 + g1 / np.sqrt(vpd)) * A_n / 400.0
+    >>> fit = fit_medlyn(g1, A_n, g_s * vpd / 100.0, 1e5, g_s, np.inf, 400.0)
+    >>> np.round(fit.g1, 6)
+    array([3., 5.])
+
+    """
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        predictor = medlyn_predictor(A_n, E, pressure, stom_cond, bl_cond, co2)
+        response = stom_cond - 1.6 * A_n / (co2 - A_n * 1.37 / bl_cond)
+    return _stom_cond_fit(groups, predictor, response)
+
+
+def coupled_stom_cond(
+    co2,
+    temp,
+    par,
+    vcmax25,
+    jmax25,
+    rd25,
+    g0,
+    g1,
+    model="ball_berry",
+    rh=None,
+    vpd=None,
+    bl_cond=None,
+    tpu25=_np.inf,
+    o2=210.0,
+    theta=0.7,
+    alpha=0.3,
+    kelvin=False,
+):
+    r"""
+    Solve the coupled photosynthesis and stomatal conductance of leaves.
+
+    The stomatal conductance follows the Ball–Berry model [BWB87]_,
+    ``g_s = g0 + g1 * A_n * h_s / co2_s``, or the Medlyn model [M11]_,
+    ``g_s = g0 + 1.6 * (1 + g1 / sqrt(D_s)) * A_n / co2_s``, and the
+    assimilation rate follows `ecoflux.leaf.photosynthesis.fvcb`. For each
+    limitation, eliminating the intercellular and leaf surface CO2 from the
+    diffusion equations gives a cubic in ``A_n`` (a quadratic without the
+    boundary layer), which is solved in closed form for all leaves at once
+    [B94]_. The net assimilation rate is the minimum over the limitations.
+    Where the leaf is not assimilating, the stomatal conductance is `g0`.
+    All arguments broadcast, e.g., against each other as arrays of canopy
+    layers × time steps.
+
+    Parameters
+    ----------
+    co2 : array_like
+        Ambient CO2 concentration [µmol mol\ :sup:`–1`].
+    temp : array_like
+        Leaf temperature, in Celsius degree by default.
+    par : array_like
+        Absorbed photosynthetically active radiation
+        [µmol m\ :sup:`–2` s\ :sup:`–1`].
+    vcmax25, jmax25, rd25 : array_like
+        Maximum carboxylation rate, maximum electron transport rate, and
+        daytime respiration at 25 °C [µmol m\ :sup:`–2` s\ :sup:`–1`].
+    g0 : array_like
+        Residual stomatal conductance to water vapor
+        [mol m\ :sup:`–2` s\ :sup:`–1`].
+    g1 : array_like
+        Slope of the stomatal conductance model; dimensionless for
+        Ball–Berry and in kPa\ :sup:`0.5` for Medlyn.
+    model : str, optional
+        ``"ball_berry"`` (default) or ``"medlyn"``.
+    rh : array_like, optional
+        Relative humidity at the leaf surface (0–1), required by
+        Ball–Berry.
+    vpd : array_like, optional
+        Vapor pressure deficit at the leaf surface [kPa], required by
+        Medlyn.
+    bl_cond : array_like, optional
+        Boundary layer conductance to water vapor
+        [mol m\ :sup:`–2` s\ :sup:`–1`]. Default is no boundary layer
+        resistance.
+    tpu25 : array_like, optional
+        Triose phosphate utilization rate at 25 °C
+        [µmol m\ :sup:`–2` s\ :sup:`–1`]. Default is no TPU limitation.
+    o2, theta, alpha, kelvin
+        See `ecoflux.leaf.photosynthesis.fvcb`.
+
+    Returns
+    -------
+    a_n : array_like
+        Net assimilation rate [µmol m\ :sup:`–2` s\ :sup:`–1`].
+    g_s : array_like
+        Stomatal conductance to water vapor [mol m\ :sup:`–2` s\ :sup:`–1`].
+    c_i : array_like
+        Intercellular CO2 mole fraction [µmol mol\ :sup:`–1`].
+    c_s : array_like
+        CO2 mole fraction at the leaf surface [µmol mol\ :sup:`–1`].
+
+    Raises
+    ------
+    ValueError
+        If the model is unknown or its humidity input is missing.
+
+    References
+    ----------
+    .. [BWB87] Ball, J. T., Woodrow, I. E., and Berry, J. A. (1987). A model
+       predicting stomatal conductance and its contribution to the control
+       of photosynthesis under different environmental conditions. In
+       *Progress in Photosynthesis Research* (pp. 221–224). Springer.
+       https://doi.org/10.1007/978-94-017-0519-6_48
+    .. [M11] Medlyn, B. E. et al. (2011). Reconciling the optimal and
+       empirical approaches to modelling stomatal conductance. *Global
+       Change Biology*, 17(6), 2134–2144.
+       https://doi.org/10.1111/j.1365-2486.2010.02375.x
+    .. [B94] Baldocchi, D. (1994). An analytical solution for coupled leaf
+       photosynthesis and stomatal conductance models. *Tree Physiology*,
+       14(7–9), 1069–1079. https://doi.org/10.1093/treephys/14.7-8-9.1069
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> res = coupled_stom_cond(
+    ...     400., 25., [0., 500., 1500.], 60., 120., 1., 0.01, 9., rh=0.7
+    ... )
+    >>> np.round(res.a_n, 2)
+    array([-1.  , 13.36, 14.4 ])
+
+    """
+    if model == "ball_berry":
+        if rh is None:
+            raise ValueError("The Ball–Berry model requires `rh`.")
+        slope = g1 * _np.asarray(rh, dtype="d")
+    elif model == "medlyn":
+        if vpd is None:
+            raise ValueError("The Medlyn model requires `vpd`.")
+        slope = 1.6 * (1.0 + g1 / _np.sqrt(_np.asarray(vpd, dtype="d")))
+    else:
+        raise ValueError("Unknown stomatal conductance model: %s" % model)
+
+    f = temperature_factors(temp, kelvin)
+    jmax = jmax25 * f.j
+    j = hyperbolic((theta, alpha, jmax, 0.0), _np.asarray(par, dtype="d"))
+    r_d = rd25 * f.rd
+    # the limited gross rates are w = a * (c_i - gamma_star) / (c_i + b)
+    co2, g0, slope, r_d, gamma_star, a_c, b_c, a_j, w_p = _np.broadcast_arrays(
+        _np.asarray(co2, dtype="d"),
+        _np.asarray(g0, dtype="d"),
+        slope,
+        r_d,
+        f.gamma_star,
+        vcmax25 * f.vcmax,
+        f.k_c * (1.0 + o2 / f.k_o),
+        0.25 * j,
+        3.0 * tpu25 * f.tpu,
+    )
+    # boundary layer conductance to CO2, in µmol m-2 s-1 per µmol mol-1
+    g_b = (
+        _np.full(co2.shape, _np.inf)
+        if bl_cond is None
+        else _np.broadcast_to(
+            _np.asarray(bl_cond, dtype="d") / 1.37, co2.shape
+        )
+    )
+    with _np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        a_n = _np.minimum(
+            _np.minimum(
+                _solve_limitation(
+                    co2, g0, slope, g_b, r_d, gamma_star, a_c, b_c
+                ),
+                _solve_limitation(
+                    co2, g0, slope, g_b, r_d, gamma_star, a_j, 2.0 * gamma_star
+                ),
+            ),
+            w_p - r_d,
+        )
+        c_s = co2 - a_n / g_b
+        g_s = _np.where(a_n > 0.0, g0 + slope * a_n / c_s, g0)
+        c_i = _np.where(g_s > 0.0, c_s - 1.6 * a_n / g_s, _np.nan)
+
+    CoupledStomCondResult = namedtuple(
+        "CoupledStomCondResult", ("a_n", "g_s", "c_i", "c_s")
+    )
+    return CoupledStomCondResult(a_n, g_s, c_i, c_s)
+
+
+def _stom_cond_fit(groups, predictor, response):
+    """
+    A helper function to fit the linear stomatal conductance models in
+    groups.
+    """
+    res = grouped_linregress(groups, predictor, response)
+    StomCondFitResult = namedtuple(
+        "StomCondFitResult",
+        ("group", "g0", "g1", "g0_stderr", "g1_stderr", "rvalue", "count"),
+    )
+    return StomCondFitResult(
+        res.group,
+        res.intercept,
+        res.slope,
+        res.intercept_stderr,
+        res.stderr,
+        res.rvalue,
+        res.count,
+    )
+
+
+def _solve_limitation(co2, g0, slope, g_b, r_d, gamma_star, a, b):
+    """
+    A helper function to solve the net assimilation rate of one limitation,
+    ``A + r_d = a * (c_i - gamma_star) / (c_i + b)``, coupled with the
+    stomatal conductance model and the diffusion through the stomata and the
+    boundary layer.
+    """
+    # polynomials in A as tuples of coefficients, lowest degree first
+    inv_gb = 1.0 / g_b
+    c_s = (co2, -inv_gb)
+    # c_i * g_s * c_s = c_s * (g0 * c_s + (slope - 1.6) * A)
+    g_cs = _poly_add(_poly_scale(c_s, g0), (0.0, slope))
+    ci_num = _poly_mul(
+        c_s, _poly_add(_poly_scale(c_s, g0), (0.0, slope - 1.6))
+    )
+    # (A + r_d) * (c_i + b) - a * (c_i - gamma_star) = 0, times g_s * c_s
+    poly = _poly_add(
+        _poly_mul((r_d, 1.0), _poly_add(ci_num, _poly_scale(g_cs, b))),
+        _poly_scale(_poly_add(ci_num, _poly_scale(g_cs, -gamma_star)), -a),
+    )
+    roots = _cubic_roots(*poly)
+
+    # the root between zero and the rate at c_i = co2 is physical
+    a_max = a * (co2 - gamma_star) / (co2 + b) - r_d
+    tol = 1e-9 * (_np.abs(a_max) + 1.0)
+    valid = (roots >= -tol[..., None]) & (
+        roots <= a_max[..., None] + tol[..., None]
+    )
+    coupled = _np.nanmax(_np.where(valid, roots, -_np.inf), axis=-1)
+
+    # not assimilating: constant conductance g0 in series with the boundary
+    # layer, A = g_t * (co2 - c_i), which is a quadratic in A
+    g_t = 1.0 / (1.6 / g0 + inv_gb)
+    qa = -1.0
+    qb = g_t * (co2 + b) - r_d + a
+    qc = g_t * (r_d * (co2 + b) - a * (co2 - gamma_star))
+    fixed = (qb - _np.sqrt(qb * qb - 4.0 * qa * qc)) / (-2.0 * qa)
+    fixed = _np.where(g_t > 0.0, fixed, -r_d)
+    return _np.where(a_max > 0.0, _np.fmax(coupled, 0.0), fixed)
+
+
+def _poly_add(p, q):
+    """A helper function to add polynomials given lowest degree first."""
+    if len(p) < len(q):
+        p, q = q, p
+    return tuple(p[i] + q[i] if i < len(q) else p[i] for i in range(len(p)))
+
+
+def _poly_scale(p, s):
+    """A helper function to multiply a polynomial by a scalar."""
+    return tuple(c * s for c in p)
+
+
+def _poly_mul(p, q):
+    """A helper function to multiply polynomials given lowest degree first."""
+    out = [0.0] * (len(p) + len(q) - 1)
+    for i, c_p in enumerate(p):
+        for k, c_q in enumerate(q):
+            out[i + k] = out[i + k] + c_p * c_q
+    return tuple(out)
+
+
+def _cubic_roots(c0, c1, c2, c3):
+    """
+    A helper function to find the real roots of cubics, or of quadratics
+    where the cubic coefficient is zero, in closed form. The roots are
+    stacked along the last axis, with NaN for complex or missing roots, and
+    polished by Newton steps.
+    """
+    cubic = c3 != 0.0
+    d3 = _np.where(cubic, c3, 1.0)
+    # trigonometric or Cardano solution of the normalized cubic
+    a, b, c = c2 / d3, c1 / d3, c0 / d3
+    q = (a * a - 3.0 * b) / 9.0
+    r = (2.0 * a**3 - 9.0 * a * b + 27.0 * c) / 54.0
+    three_real = r * r < q**3
+    sqrt_q = _np.sqrt(_np.where(three_real, q, 1.0))
+    phi = _np.arccos(_np.clip(r / sqrt_q**3, -1.0, 1.0))
+    trig = [
+        -2.0 * sqrt_q * _np.cos((phi + k * 2.0 * _np.pi) / 3.0) - a / 3.0
+        for k in range(3)
+    ]
+    s = -_np.sign(r) * _np.cbrt(
+        _np.abs(r) + _np.sqrt(_np.where(three_real, 0.0, r * r - q**3))
+    )
+    single = (
+        s + _np.where(s != 0.0, q / _np.where(s != 0.0, s, 1.0), 0.0) - a / 3.0
+    )
+    roots_3 = [
+        _np.where(three_real, trig[0], single),
+        _np.where(three_real, trig[1], _np.nan),
+        _np.where(three_real, trig[2], _np.nan),
+    ]
+
+    # numerically stable solution of the quadratics
+    disc = c1 * c1 - 4.0 * c2 * c0
+    h = -0.5 * (c1 + _np.where(c1 < 0.0, -1.0, 1.0) * _np.sqrt(disc))
+    roots_2 = [
+        c0 / h,
+        _np.where(c2 != 0.0, h / _np.where(c2 != 0.0, c2, 1.0), _np.nan),
+        _np.full(_np.shape(h), _np.nan),
+    ]
+
+    roots = _np.stack(
+        [_np.where(cubic, x3, x2) for x3, x2 in zip(roots_3, roots_2)],
+        axis=-1,
+    )
+    c0, c1, c2, c3 = (_np.asarray(x)[..., None] for x in (c0, c1, c2, c3))
+    for _ in range(2):
+        value = ((c3 * roots + c2) * roots + c1) * roots + c0
+        deriv = (3.0 * c3 * roots + 2.0 * c2) * roots + c1
+        step = _np.where(
+            deriv != 0.0, value / _np.where(deriv != 0.0, deriv, 1.0), 0.0
+        )
+        roots = roots - step
+    return roots
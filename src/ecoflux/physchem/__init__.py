@@ -9,4 +9,4 @@ Functions to calculate physicochemical properties.
 
 """
 
-from . import sat_vap  # noqa
+from . import latent_heat, sat_vap  # noqa
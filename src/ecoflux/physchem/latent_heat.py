@@ -0,0 +1,41 @@
+"""Latent heat of water."""
+
+import numpy as _np
+import scipy.constants as _sc
+
+T_0: float = _sc.zero_Celsius
+
+
+def latent_heat_vap(temp, kelvin=False):
+    """
+    Calculate the latent heat of vaporization of water at a temperature.
+
+    Parameters
+    ----------
+    temp : float or array_like
+        Temperature, in Celsius degree by default.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+
+    Returns
+    -------
+    float or array_like
+        Latent heat of vaporization [J kg^-1].
+
+    Notes
+    -----
+    The cubic fit is valid from -25 to 40 C [RY89]_.
+
+    References
+    ----------
+    .. [RY89] Rogers, R. R. and Yau, M. K. (1989). *A Short Course in Cloud
+       Physics* (3rd ed.), p. 16. Pergamon Press, Oxford, UK.
+
+    Examples
+    --------
+    >>> print("%.1f" % latent_heat_vap(20.))
+    2453760.0
+
+    """
+    T_c = _np.asarray(temp, dtype="d") - kelvin * T_0
+    return (2500.8 - 2.36 * T_c + 0.0016 * T_c**2 - 0.00006 * T_c**3) * 1e3
@@ -1,13 +1,19 @@
 """Saturation vapor pressure of water."""
 
+from functools import lru_cache
+
 import numpy as _np
 import scipy.constants as _sc
-from scipy import optimize as _optimize
 
 T_0: float = _sc.zero_Celsius
 
+# temperature range and step of the tables of the fast mode [K]
+_FAST_T_MIN: float = 173.15
+_FAST_T_MAX: float = 393.15
+_FAST_STEP: float = 0.01
+
 
-def p_sat_h2o(temp, ice=False, kelvin=False, method="gg"):
+def p_sat_h2o(temp, ice=False, kelvin=False, method="gg", fast=False):
     """
     Calculate saturation vapor pressure over water or ice at a temperature.
 
@@ -26,6 +32,16 @@ def p_sat_h2o(temp, ice=False, kelvin=False, method="gg"):
         'gg': default, Goff-Gratch equation (1946). [GG46]_
         'buck': Buck Research Instruments L.L.C. (1996). [B96]_
         'cimo': CIMO Guide (2008). [WMO]_
+    fast : bool, optional
+        Interpolate linearly in a cached table of the Goff-Gratch equation
+        with a step of 0.01 K if enabled, e.g., for high-frequency data or
+        in iterative solvers. It applies to the 'gg' method only and is
+        ignored for 'buck' and 'cimo'. In ``benchmarks/bench_p_sat_h2o.py``
+        it measured about 1.9 times faster on 1000 samples and 1.9 to 2.6
+        times faster on 36000 to 1e6 samples, depending on the machine. The
+        maximum relative error is below 6e-7 (below 2e-7 above -40 C). The
+        table covers -100 to 120 C (to the triple point over ice); other
+        temperatures are evaluated exactly.
 
     Returns
     -------
@@ -53,31 +69,34 @@ def p_sat_h2o(temp, ice=False, kelvin=False, method="gg"):
     Examples
     --------
     >>> p_sat_h2o(25)
-    3165.195633383682
+    np.float64(3165.195633383682)
 
     >>> p_sat_h2o([0, 5, 15, 25])
-    array([  610.33609993,   871.31372986,  1703.28100711,  3165.19563338])
+    array([ 610.33609993,  871.31372986, 1703.28100711, 3165.19563338])
 
     >>> p_sat_h2o(25, method='buck')
-    3168.5314122754344
+    np.float64(3168.5314122754344)
 
     >>> p_sat_h2o(273.15, kelvin=True)
-    610.33609993341383
+    np.float64(610.3360999334138)
 
     >>> p_sat_h2o(-15, ice=True)
-    165.01477392358936
+    np.float64(165.01477392358936)
 
     >>> p_sat_h2o(258.15, kelvin=True, ice=True, method='cimo')
-    165.28713201714956
+    np.float64(165.28713201714956)
 
     """
     T_k = _np.array(temp, dtype="d") + (not kelvin) * T_0
     # force temperature to be in Kelvin
 
-    if _np.sum(T_k > 273.16) and ice:
+    if ice and _np.any(T_k > 273.16):
         # The triple point of water is 273.16 K
         raise ValueError("Temperature error, no ice exists.")
 
+    if fast and method not in ("buck", "cimo"):
+        return _p_sat_h2o_fast(T_k, bool(ice), method)
+
     if not ice:
         if method == "buck":
             T_c = T_k - T_0  # temperature in Celsius degree
@@ -127,17 +146,133 @@ def p_sat_h2o(temp, ice=False, kelvin=False, method="gg"):
     return e_sat
 
 
-def dew_temp(e_sat, guess=25.0, kelvin=False, method="gg"):
+@lru_cache(maxsize=None)
+def _p_sat_table(ice, method):
+    """
+    A helper function to tabulate saturation vapor pressure for the fast
+    mode, once per phase and method.
+    """
+    t_max = 273.16 if ice else _FAST_T_MAX
+    n = int(round((t_max - _FAST_T_MIN) / _FAST_STEP))
+    T_k = _FAST_T_MIN + _FAST_STEP * _np.arange(n + 1)
+    e_sat = p_sat_h2o(T_k, ice=ice, kelvin=True, method=method)
+    return e_sat[:-1], _np.diff(e_sat)
+
+
+def _p_sat_h2o_fast(T_k, ice, method):
+    """
+    A helper function to interpolate saturation vapor pressure in the table,
+    with the exact evaluation outside of its range.
+    """
+    e_0, d_e = _p_sat_table(ice, method)
+    T_1d = _np.atleast_1d(T_k)
+    x = T_1d - _FAST_T_MIN
+    x *= 1.0 / _FAST_STEP
+    inside = (x >= 0.0) & (x < e_0.size)
+    if not _np.all(inside):
+        x[~inside] = 0.0
+    idx = x.astype(_np.intp)
+    x -= idx
+    e_sat = d_e.take(idx)
+    e_sat *= x
+    e_sat += e_0.take(idx)
+    if not _np.all(inside):
+        e_sat[~inside] = p_sat_h2o(
+            T_1d[~inside], ice=ice, kelvin=True, method=method
+        )
+    return e_sat.reshape(_np.shape(T_k))[()]
+
+
+def dp_sat_h2o_dT(temp, ice=False, kelvin=False, method="gg"):
+    """
+    Calculate the temperature derivative of saturation vapor pressure.
+
+    The derivative is analytic for every method of `p_sat_h2o`, e.g., for
+    the slope of the saturation vapor pressure curve in the energy balance
+    or for Newton iterations on temperature.
+
+    Parameters
+    ----------
+    temp : float or array_like
+        Temperature, in Celsius degree by default.
+    ice : bool, optional
+        Calculate the derivative over ice if enabled.
+    kelvin : bool, optional
+        Temperature input is in Kelvin if enabled.
+    method : str, optional
+        Method used to evaluate saturation vapor pressure. See `p_sat_h2o`.
+
+    Returns
+    -------
+    float or array_like
+        Derivative of saturation vapor pressure [Pa K^-1].
+
+    Raises
+    ------
+    ValueError
+        If keyword 'ice' is enabled but temperature is above 0 C or 273.15 K.
+
+    Examples
+    --------
+    >>> print("%.4f" % dp_sat_h2o_dT(25))
+    188.6862
+
+    """
+    e_sat = p_sat_h2o(temp, ice=ice, kelvin=kelvin, method=method)
+    T_k = _np.array(temp, dtype="d") + (not kelvin) * T_0
+    T_c = T_k - T_0
+    ln10 = _np.log(10.0)
+
+    if method in ("buck", "cimo"):
+        # e_sat = c * exp((a - T_c / d) * T_c / (b + T_c))
+        if method == "buck":
+            a, b, d = (
+                (23.036, 279.82, 333.7) if ice else (18.678, 257.14, 234.5)
+            )
+        else:
+            a, b, d = (
+                (22.46, 272.62, _np.inf) if ice else (17.62, 243.12, _np.inf)
+            )
+        dlog = ((a - 2.0 * T_c / d) * (b + T_c) - (a - T_c / d) * T_c) / (
+            b + T_c
+        ) ** 2
+    elif not ice:
+        # d ln(e_sat) / dT of the Goff-Gratch equation
+        u_T = 373.16 / T_k
+        v_T = T_k / 373.16
+        w_u = 8.1328e-3 * 3.49149 * ln10 * 10 ** (-3.49149 * (u_T - 1))
+        w_v = 1.3816e-7 * 11.344 * ln10 * 10 ** (11.344 * (1 - v_T))
+        dlog = ln10 * (
+            (7.90298 + w_u) * u_T / T_k - 5.02808 / (ln10 * T_k) + w_v / 373.16
+        )
+    else:
+        u_T = 273.16 / T_k
+        dlog = ln10 * (
+            9.09718 * u_T / T_k + 3.56654 / (ln10 * T_k) - 0.876793 / 273.16
+        )
+
+    return e_sat * dlog
+
+
+def dew_temp(
+    e_sat, guess=None, kelvin=False, method="gg", ice=False, max_iter=50
+):
     """
     Calculate dew temperature from water concentration.
 
+    The Buck and CIMO equations are inverted in closed form. The Goff-Gratch
+    equation is inverted by Newton iterations on the logarithm of saturation
+    vapor pressure, with the analytic derivative `dp_sat_h2o_dT`, on all
+    elements at once; each element stops updating once it has converged.
+
     Parameters
     ----------
-    e_sat : float
-        Saturation vapor pressure in Pascal. Takes only a single value,
-        no array allowed.
-    guess : float, optional
-        An initial guess for the dew temperature to infer.
+    e_sat : float or array_like
+        Saturation vapor pressure in Pascal.
+    guess : float or array_like, optional
+        An initial guess for the dew temperature to infer in Celsius degree,
+        also if `kelvin` is enabled, only used by the Goff-Gratch method.
+        Default is the closed-form CIMO inverse.
     kelvin : bool, optional
         Dew temperature calculated is in Kelvin if enabled.
     method : str, optional
@@ -145,36 +280,94 @@ def dew_temp(e_sat, guess=25.0, kelvin=False, method="gg"):
         'gg': default, Goff-Gratch equation (1946). [GG46]_
         'buck': Buck Research Instruments L.L.C. (1996). [B96]_
         'cimo': CIMO Guide (2008). [WMO]_
+    ice : bool, optional
+        Calculate frost temperature over ice if enabled. Frost temperatures
+        above the triple point of water are NaN.
+    max_iter : int, optional
+        Maximum number of Newton iterations of the Goff-Gratch method.
+        Default is 50.
 
     Returns
     -------
-    T_dew : float
-        Dew temperature.
+    T_dew : float or array_like
+        Dew temperature. NaN for non-positive vapor pressures and for
+        elements that fail to converge.
 
     Examples
     --------
     >>> dew_temp(3165)
-    24.998963153421172
+    np.float64(24.998963153421187)
 
     >>> dew_temp(610)
-    -0.0075798295337097081
+    np.float64(-0.007579829533710836)
 
     >>> dew_temp(3165, kelvin=True)
-    298.14896315342116
+    np.float64(298.14896315342116)
 
-    """
+    >>> dew_temp(3165, guess=20., kelvin=True)
+    np.float64(298.14896315342116)
 
-    def __e_sat_residual(T, e_sat, kelvin, method):
-        return p_sat_h2o(T, kelvin=kelvin, method=method) - e_sat
+    >>> dew_temp([610., 1703.28100711, 3165.19563338])
+    array([-7.57982953e-03,  1.50000000e+01,  2.50000000e+01])
 
-    if kelvin:
-        guess += T_0
+    """
+    e = _np.array(e_sat, dtype="d")
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        log_e = _np.log(_np.where(e > 0.0, e, _np.nan))
 
-    try:
-        T_dew = _optimize.newton(
-            __e_sat_residual, x0=guess, args=(e_sat, kelvin, method)
+    if method == "buck":
+        # solve (a - T_c / d) * T_c / (b + T_c) = ln(e / c) for T_c
+        c, a, b, d = (
+            (611.15, 23.036, 279.82, 333.7)
+            if ice
+            else (611.21, 18.678, 257.14, 234.5)
         )
-    except RuntimeError:
-        T_dew = _np.nan
+        x = log_e - _np.log(c)
+        T_c = 0.5 * d * ((a - x) - _np.sqrt((a - x) ** 2 - 4.0 * x * b / d))
+        T_k = T_c + T_0
+    elif method == "cimo":
+        T_k = _cimo_inverse(log_e, ice) + T_0
+    else:
+        if guess is None:
+            T_k = _cimo_inverse(log_e, ice) + T_0
+        else:
+            T_k = _np.array(_np.broadcast_to(guess, e.shape), dtype="d") + T_0
+        T_k = _np.where(_np.isfinite(log_e), T_k, _np.nan)
+        converged = _np.zeros(e.shape, dtype=bool)
+        active = _np.flatnonzero(_np.isfinite(T_k))
+        flat_T, flat_conv, flat_log_e = (
+            T_k.reshape(-1),
+            converged.reshape(-1),
+            log_e.reshape(-1),
+        )
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            # iterates over ice must stay below the triple point
+            T = flat_T[active]
+            if ice:
+                T = _np.minimum(T, 273.16)
+            e_T = p_sat_h2o(T, ice=ice, kelvin=True)
+            step = (_np.log(e_T) - flat_log_e[active]) / (
+                dp_sat_h2o_dT(T, ice=ice, kelvin=True) / e_T
+            )
+            flat_T[active] = T - step
+            done = _np.abs(step) < 1e-10 * T
+            flat_conv[active[done]] = True
+            active = active[~done]
+        T_k = _np.where(converged, T_k, _np.nan)
+
+    if ice:
+        T_k = _np.where(T_k <= 273.16, T_k, _np.nan)
+    T_dew = T_k - (not kelvin) * T_0
+    return T_dew[()] if T_dew.ndim == 0 else T_dew
 
-    return T_dew
+
+def _cimo_inverse(log_e, ice):
+    """
+    A helper function to invert the CIMO equation for temperature in Celsius
+    degree from the logarithm of saturation vapor pressure in Pascal.
+    """
+    a, b = (22.46, 272.62) if ice else (17.62, 243.12)
+    x = log_e - _np.log(611.2)
+    return b * x / (a - x)
@@ -9,4 +9,4 @@ Statistical functions used in processing flux data.
 
 """
 
-from . import dists, regressions, summary, timeseries  # noqa
+from . import despike, dists, regressions, summary, timeseries  # noqa
@@ -0,0 +1,137 @@
+"""Despiking of high-frequency time series."""
+
+from collections import namedtuple
+
+import numpy as _np
+
+from .timeseries import batch_gapfill, running_moments
+
+
+def despike(
+    data,
+    window_size,
+    threshold=3.5,
+    threshold_step=0.1,
+    max_consecutive=3,
+    max_iter=20,
+    replace=True,
+    max_spike_frac=0.01,
+):
+    """
+    Detect and replace spikes in high-frequency time series.
+
+    This follows the despiking test of Vickers and Mahrt [VM97]_: a value is
+    an outlier if it deviates from the mean of the moving window by more than
+    `threshold` times the standard deviation, and runs of no more than
+    `max_consecutive` outliers are spikes. Longer runs are retained as
+    possibly physical. Detected spikes are excluded and the test is repeated
+    with the threshold increased by `threshold_step`, until no more spikes
+    are found or `max_iter` passes have been done.
+
+    All channels are processed at once and every pass is fully vectorized,
+    using the O(n) running-window engine
+    `ecoflux.stats.timeseries.running_moments`.
+
+    Parameters
+    ----------
+    data : array_like
+        Time series, either 1D or 2D with the shape (time, channels), e.g.,
+        u, v, w, Ts, CO2, and H2O.
+    window_size : int
+        Size of the moving window, e.g., 5 min of samples.
+    threshold : float or array_like, optional
+        Initial outlier threshold in units of the standard deviation, either
+        a single value or one per channel. Default is 3.5.
+    threshold_step : float, optional
+        Increment of the threshold after every pass. Default is 0.1.
+    max_consecutive : int, optional
+        Maximum number of consecutive outliers to be treated as a spike.
+        Default is 3.
+    max_iter : int, optional
+        Maximum number of passes. Default is 20.
+    replace : bool, optional
+        If `True` (default), replace the spikes by linear interpolation.
+        Otherwise, replace the spikes with NaNs.
+    max_spike_frac : float, optional
+        Fraction of spikes above which a channel is flagged. Default is 0.01.
+
+    Returns
+    -------
+    data : array_like
+        Despiked time series. Has the same shape as the input.
+    spikes : array_like
+        Boolean flags of the same shape as the input; `True` at spikes.
+    n_spikes : int or array_like
+        Number of spikes in each channel.
+    flag : bool or array_like
+        `True` for channels whose fraction of spikes exceeds
+        `max_spike_frac`.
+
+    Raises
+    ------
+    ValueError
+        If the `window_size` is larger than the size of the input time series.
+
+    References
+    ----------
+    .. [VM97] Vickers, D. and Mahrt, L. (1997). Quality control and flux
+       sampling problems for tower and aircraft data. *Journal of Atmospheric
+       and Oceanic Technology*, 14(3), 512–526.
+       https://doi.org/10.1175/1520-0426(1997)014<0512:QCAFSP>2.0.CO;2
+
+    """
+    data = _np.asarray(data, dtype="d")
+    if data.shape[0] < window_size:
+        raise ValueError("Window size larger than data size.")
+    x = data.reshape(data.shape[0], -1)
+    work = x.copy()
+    spikes = _np.zeros(x.shape, dtype=bool)
+    thres = _np.broadcast_to(_np.asarray(threshold, dtype="d"), x.shape[1:])
+
+    for i in range(max_iter):
+        count, mean, sq_dev = running_moments(work, window_size)
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            std = _np.sqrt(sq_dev / (count - 1))
+            outliers = (
+                _np.abs(work - mean) > (thres + i * threshold_step) * std
+            )
+        new_spikes = _short_runs(outliers, max_consecutive)
+        if not _np.any(new_spikes):
+            break
+        spikes |= new_spikes
+        work[new_spikes] = _np.nan
+
+    if replace:
+        filled = batch_gapfill(_np.arange(x.shape[0]), work).filled
+        work = _np.where(spikes, filled, x)
+
+    n_spikes = _np.sum(spikes, axis=0)
+    flag = n_spikes > max_spike_frac * _np.sum(_np.isfinite(x), axis=0)
+    if data.ndim == 1:
+        n_spikes, flag = n_spikes.item(), flag.item()
+
+    DespikeResult = namedtuple(
+        "DespikeResult", ("data", "spikes", "n_spikes", "flag")
+    )
+    return DespikeResult(
+        work.reshape(data.shape), spikes.reshape(data.shape), n_spikes, flag
+    )
+
+
+def _short_runs(mask, max_len):
+    """
+    A helper function to select the runs of `True` along the first axis of a
+    2D boolean array that are no longer than `max_len`.
+    """
+    n, n_cols = mask.shape
+    edges = _np.zeros((n_cols, n + 2), dtype=_np.int8)
+    edges[:, 1:-1] = mask.T
+    edges = _np.diff(edges, axis=1)
+    # paired in order because the runs in each column do not overlap
+    col, start = _np.nonzero(edges == 1)
+    _, end = _np.nonzero(edges == -1)
+    short = end - start <= max_len
+    marks = _np.zeros((n_cols, n + 1), dtype=int)
+    marks[col[short], start[short]] = 1
+    marks[col[short], end[short]] = -1
+    return (_np.cumsum(marks, axis=1)[:, :-1] > 0).T
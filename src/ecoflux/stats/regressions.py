@@ -82,3 +82,420 @@ def linreg_zerointercept(x, y):
         ("slope", "intercept", "rvalue", "pvalue", "stderr"),
     )
     return LinregZeroInterceptResult(slope, intercept, rvalue, pvalue, stderr)
+
+
+def nanmultilinregress(x, y):
+    """
+    NaN-ignoring multiple linear regression with an intercept.
+
+    Parameters
+    ----------
+    x : array_like
+        Regressors with the shape (n, k).
+    y : array_like
+        Measurements of length n.
+
+    Returns
+    -------
+    coef : array_like
+        Coefficients of the regressors.
+    intercept : float
+        Intercept of the regression.
+    coef_stderr : array_like
+        Standard errors of the coefficients.
+    intercept_stderr : float
+        Standard error of the intercept.
+    rsquared : float
+        Coefficient of determination.
+
+    """
+    x = _np.asarray(x, dtype="d").reshape(len(y), -1)
+    y = _np.asarray(y, dtype="d")
+    finite = _np.all(_np.isfinite(x), axis=1) & _np.isfinite(y)
+    xfinite = x[finite]
+    yfinite = y[finite]
+
+    n, k = xfinite.shape
+    df = n - k - 1  # degree of freedom
+    beta = _np.full(k + 1, _np.nan)
+    stderr = _np.full(k + 1, _np.nan)
+    rsquared = _np.nan
+    if n > k:
+        design = _np.column_stack((_np.ones(n), xfinite))
+        beta, _, rank, _ = _np.linalg.lstsq(design, yfinite, rcond=None)
+        resid = yfinite - design @ beta
+        ss_res = _np.sum(resid**2)
+        ss_tot = _np.sum((yfinite - _np.mean(yfinite)) ** 2)
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            rsquared = 1.0 - ss_res / ss_tot
+            if df > 0 and rank == k + 1:
+                stderr = _np.sqrt(
+                    _np.diag(_np.linalg.inv(design.T @ design)) * ss_res / df
+                )
+
+    MultiLinregressResult = namedtuple(
+        "MultiLinregressResult",
+        ("coef", "intercept", "coef_stderr", "intercept_stderr", "rsquared"),
+    )
+    return MultiLinregressResult(
+        beta[1:], beta[0], stderr[1:], stderr[0], rsquared
+    )
+
+
+def grouped_linregress(groups, x, y):
+    """
+    NaN-ignoring linear regressions of many groups at once.
+
+    The sums of every group are accumulated with `numpy.bincount` in a
+    single pass over the records, and the second moments are taken about the
+    group means for numerical stability, so that no Python loop over the
+    groups is needed.
+
+    Parameters
+    ----------
+    groups : array_like
+        Group labels of the records, e.g., leaf, species, or campaign IDs.
+    x, y : array_like
+        Two sets of measurements with the same shape as `groups`.
+
+    Returns
+    -------
+    group : array_like
+        Sorted unique group labels.
+    slope : array_like
+        Slopes of the regression lines.
+    intercept : array_like
+        Intercepts of the regression lines.
+    rvalue : array_like
+        Pearson correlation coefficients.
+    pvalue : array_like
+        Two-sided p-values for a hypothesis test with the null hypothesis
+        that the slope is zero.
+    stderr : array_like
+        Standard errors of the slopes.
+    intercept_stderr : array_like
+        Standard errors of the intercepts.
+    count : array_like
+        Numbers of finite records in the groups.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> res = grouped_linregress(
+    ...     ["a", "a", "a", "b", "b", "b"],
+    ...     [0.0, 1.0, 2.0, 0.0, 1.0, 2.0],
+    ...     [1.0, 3.0, 5.0, 0.0, -1.0, np.nan],
+    ... )
+    >>> res.slope
+    array([ 2., -1.])
+
+    """
+    levels, inverse = _np.unique(groups, return_inverse=True)
+    inverse = inverse.ravel()
+    x = _np.asarray(x, dtype="d").ravel()
+    y = _np.asarray(y, dtype="d").ravel()
+    finite = _np.isfinite(x) & _np.isfinite(y)
+    x = _np.where(finite, x, 0.0)
+    y = _np.where(finite, y, 0.0)
+
+    def group_sum(values):
+        return _np.bincount(inverse, weights=values, minlength=levels.size)
+
+    n = group_sum(finite.astype("d"))
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = group_sum(x) / n
+        y_mean = group_sum(y) / n
+        dx = _np.where(finite, x - x_mean[inverse], 0.0)
+        dy = _np.where(finite, y - y_mean[inverse], 0.0)
+        s_xx = group_sum(dx * dx)
+        s_yy = group_sum(dy * dy)
+        s_xy = group_sum(dx * dy)
+
+        slope = s_xy / s_xx
+        intercept = y_mean - slope * x_mean
+        rvalue = _np.clip(s_xy / _np.sqrt(s_xx * s_yy), -1.0, 1.0)
+        df = n - 2.0
+        mse = _np.where(
+            df > 0.0, _np.fmax(s_yy - slope * s_xy, 0.0) / df, _np.nan
+        )
+        stderr = _np.sqrt(mse / s_xx)
+        intercept_stderr = _np.sqrt(mse * (1.0 / n + x_mean**2 / s_xx))
+        pvalue = 2.0 * _stats.distributions.t.sf(
+            _np.abs(slope / stderr), _np.where(df > 0.0, df, _np.nan)
+        )
+
+    GroupedLinregressResult = namedtuple(
+        "GroupedLinregressResult",
+        (
+            "group",
+            "slope",
+            "intercept",
+            "rvalue",
+            "pvalue",
+            "stderr",
+            "intercept_stderr",
+            "count",
+        ),
+    )
+    return GroupedLinregressResult(
+        levels,
+        slope,
+        intercept,
+        rvalue,
+        pvalue,
+        stderr,
+        intercept_stderr,
+        n.astype(int),
+    )
+
+
+def batch_least_squares(
+    fun, p0, args=(), jac=None, max_iter=100, ftol=1e-8, xtol=1e-8
+):
+    """
+    Solve many small nonlinear least-squares problems at once.
+
+    All problems are iterated together with a vectorized Levenberg–Marquardt
+    algorithm, in which each problem has its own damping parameter and
+    convergence test, and problems are dropped from the iteration once they
+    have converged. The Jacobians are only re-evaluated for problems whose
+    last step was accepted. Problems with different numbers of observations are
+    padded with NaNs.
+
+    Parameters
+    ----------
+    fun : callable
+        Residual function ``fun(p, *args)``, where `p` has the shape
+        (n_problems, n_params), returning the residuals with the shape
+        (n_problems, n_obs). Observations with NaN residuals at `p0` are
+        ignored.
+    p0 : array_like
+        Initial guesses with the shape (n_problems, n_params).
+    args : tuple, optional
+        Extra arguments of `fun` and `jac`. Arrays have the problems along
+        the first axis; scalars are passed as they are.
+    jac : callable, optional
+        Jacobian function ``jac(p, *args)`` returning the derivatives of the
+        residuals with the shape (n_problems, n_obs, n_params). Default is
+        to use forward finite differences.
+    max_iter : int, optional
+        Maximum number of iterations. Default is 100.
+    ftol : float, optional
+        Tolerance of the relative reduction of the cost. Default is 1e-8.
+    xtol : float, optional
+        Tolerance of the relative change of the parameters. Default is 1e-8.
+
+    Returns
+    -------
+    x : array_like
+        Solutions with the shape (n_problems, n_params).
+    stderr : array_like
+        Standard errors of the solutions; NaN where the problem has no more
+        observations than parameters.
+    cost : array_like
+        Half the sum of squared residuals at the solutions.
+    converged : array_like
+        Boolean flags of convergence; False where the problem has fewer
+        observations than parameters, which are left at `p0`.
+    n_iter : array_like
+        Number of iterations of each problem.
+
+    References
+    ----------
+    .. [N99] Nielsen, H. B. (1999). *Damping Parameter in Marquardt's
+       Method*. Technical Report IMM-REP-1999-05, Technical University of
+       Denmark.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> x = np.array([[0.0, 1.0, 2.0, 3.0], [0.0, 1.0, 2.0, np.nan]])
+    >>> y = np.array([[1.0, 2.7, 7.4, 20.1], [2.0, 1.2, 0.7, np.nan]])
+    >>> res = batch_least_squares(
+    ...     lambda p, x, y: p[:, :1] * np.exp(p[:, 1:] * x) - y,
+    ...     np.ones((2, 2)),
+    ...     args=(x, y),
+    ... )
+    >>> np.round(res.x, 2)
+    array([[ 1.  ,  1.  ],
+           [ 2.  , -0.52]])
+
+    """
+    p = _np.array(p0, dtype="d", ndmin=2)
+    n_batch, n_params = p.shape
+    resid = fun(p, *args)
+    valid = _np.isfinite(resid)
+    n_obs = _np.sum(valid, axis=1)
+    # underdetermined problems are not iterated and never converge
+    determined = n_obs >= n_params
+    cost = 0.5 * _np.sum(_np.where(valid, resid, 0.0) ** 2, axis=1)
+    damping = _np.full(n_batch, 1e-3)
+    factor = _np.full(n_batch, 2.0)
+    converged = _np.zeros(n_batch, dtype=bool)
+    n_iter = _np.zeros(n_batch, dtype=int)
+    # Jacobians, re-evaluated only where the parameters have changed
+    jacobian = _np.zeros(valid.shape + (n_params,))
+    scale = _np.zeros((n_batch, n_params))
+    stale = _np.ones(n_batch, dtype=bool)
+    eye = _np.eye(n_params)
+
+    for _ in range(max_iter):
+        idx = _np.flatnonzero(~converged & determined & (damping < 1e16))
+        if idx.size == 0:
+            break
+        update = idx[stale[idx]]
+        if update.size:
+            args_u = _batch_args(args, update)
+            with _np.errstate(all="ignore"):
+                resid[update] = fun(p[update], *args_u)
+                jacobian[update] = _batch_jacobian(
+                    fun, jac, p[update], resid[update], valid[update], args_u
+                )
+            # Marquardt scaling by the largest column norms seen so far
+            scale[update] = _np.maximum(
+                scale[update],
+                _np.maximum(_np.sum(jacobian[update] ** 2, axis=1), 1e-12),
+            )
+            stale[update] = False
+
+        p_a, valid_a, cost_a = p[idx], valid[idx], cost[idx]
+        damp = damping[idx, None] * scale[idx]
+        resid_a = _np.where(valid_a, resid[idx], 0.0)
+        grad = _np.einsum("bni,bn->bi", jacobian[idx], resid_a)
+        # the damped step as the least-squares solution of the augmented
+        # system, which avoids squaring the condition number of J
+        q, r = _np.linalg.qr(
+            _np.concatenate(
+                (jacobian[idx], _np.sqrt(damp)[:, :, None] * eye), axis=1
+            )
+        )
+        rhs = _np.einsum("bni,bn->bi", q[:, : valid.shape[1]], resid_a)
+        step = -_np.linalg.solve(r, rhs[..., None])[..., 0]
+        p_new = p_a + step
+        with _np.errstate(all="ignore"):
+            resid_new = fun(p_new, *_batch_args(args, idx))
+            cost_new = 0.5 * _np.sum(
+                _np.where(valid_a, resid_new, 0.0) ** 2, axis=1
+            )
+        # a model that fails at valid observations rejects the step
+        cost_new[_np.any(valid_a & ~_np.isfinite(resid_new), axis=1)] = _np.inf
+        accept = cost_new <= cost_a
+        small_step = _np.linalg.norm(step, axis=1) <= xtol * (
+            _np.linalg.norm(p_a, axis=1) + xtol
+        )
+        converged[idx] = small_step | (
+            accept & (cost_a - cost_new <= ftol * cost_a)
+        )
+
+        # damping update from the gain ratio of the actual to the predicted
+        # cost reduction [N99]_
+        predicted = 0.5 * _np.sum(step * (damp * step - grad), axis=1)
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            gain = _np.where(
+                predicted > 0.0, (cost_a - cost_new) / predicted, 0.0
+            )
+        damping[idx] = _np.where(
+            accept,
+            _np.maximum(
+                damping[idx]
+                * _np.maximum(1.0 / 3.0, 1.0 - (2.0 * gain - 1.0) ** 3),
+                1e-12,
+            ),
+            damping[idx] * factor[idx],
+        )
+        factor[idx] = _np.where(accept, 2.0, factor[idx] * 2.0)
+        p[idx[accept]] = p_new[accept]
+        cost[idx[accept]] = cost_new[accept]
+        stale[idx[accept]] = True
+        n_iter[idx] += 1
+
+    # standard errors from the Jacobian at the solutions
+    with _np.errstate(all="ignore"):
+        resid = _np.where(valid, fun(p, *args), 0.0)
+        jacobian = _batch_jacobian(fun, jac, p, resid, valid, args)
+    cov = _np.linalg.pinv(_np.einsum("bni,bnj->bij", jacobian, jacobian))
+    dof = n_obs - n_params
+    with _np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = _np.where(dof > 0, 2.0 * cost / dof, _np.nan)
+        stderr = _np.sqrt(
+            _np.diagonal(cov, axis1=1, axis2=2) * sigma2[:, None]
+        )
+
+    BatchLeastSquaresResult = namedtuple(
+        "BatchLeastSquaresResult",
+        ("x", "stderr", "cost", "converged", "n_iter"),
+    )
+    return BatchLeastSquaresResult(p, stderr, cost, converged, n_iter)
+
+
+def pack_groups(groups, *arrays):
+    """
+    Pack the records of ragged groups into NaN-padded arrays.
+
+    The records of each group are placed in one row in their original
+    order, e.g., to fit all groups at once with `batch_least_squares`.
+
+    Parameters
+    ----------
+    groups : array_like
+        Group labels of the records. Records of a group need not be
+        contiguous.
+    *arrays : array_like
+        Variables of the records, of the same size as `groups`.
+
+    Returns
+    -------
+    groups : array_like
+        Sorted unique group labels.
+    arrays : tuple of array_like
+        Packed variables with the shape (n_groups, max_group_size), padded
+        with NaNs.
+
+    Examples
+    --------
+    >>> res = pack_groups([2, 1, 2, 2], [1.0, 2.0, 3.0, 4.0])
+    >>> res.groups
+    array([1, 2])
+    >>> res.arrays[0]
+    array([[ 2., nan, nan],
+           [ 1.,  3.,  4.]])
+
+    """
+    levels, inverse = _np.unique(groups, return_inverse=True)
+    inverse = inverse.ravel()
+    order = _np.argsort(inverse, kind="stable")
+    counts = _np.bincount(inverse, minlength=levels.size)
+    starts = _np.cumsum(counts) - counts
+    rows = inverse[order]
+    cols = _np.arange(order.size) - _np.repeat(starts, counts)
+    packed = []
+    for a in arrays:
+        out = _np.full((levels.size, max(int(_np.max(counts)), 1)), _np.nan)
+        out[rows, cols] = _np.asarray(a, dtype="d").ravel()[order]
+        packed.append(out)
+
+    PackGroupsResult = namedtuple("PackGroupsResult", ("groups", "arrays"))
+    return PackGroupsResult(levels, tuple(packed))
+
+
+def _batch_args(args, idx):
+    """A helper function to select the problems from the extra arguments."""
+    return tuple(a[idx] if _np.ndim(a) else a for a in args)
+
+
+def _batch_jacobian(fun, jac, p, resid, valid, args):
+    """
+    A helper function to evaluate the Jacobians of batched residuals, by
+    forward finite differences if no Jacobian function is given. Rows of
+    invalid observations are set to zero.
+    """
+    if jac is not None:
+        jacobian = _np.asarray(jac(p, *args), dtype="d")
+    else:
+        jacobian = _np.empty(resid.shape + (p.shape[1],))
+        h = _np.sqrt(_np.finfo(float).eps) * _np.maximum(_np.abs(p), 1.0)
+        for j in range(p.shape[1]):
+            p_h = p.copy()
+            p_h[:, j] += h[:, j]
+            jacobian[..., j] = (fun(p_h, *args) - resid) / h[:, j, None]
+    return _np.where(valid[..., None] & _np.isfinite(jacobian), jacobian, 0.0)
@@ -324,3 +324,288 @@ def dixon_test(x, left=True, right=True, q_conf="q95"):
         ]
 
     return outliers
+
+
+class RunningStats:
+    """
+    Incremental accumulator of summary statistics for chunked data.
+
+    Count, mean, variance, minimum, maximum, and co-moments are updated chunk
+    by chunk with the Welford algorithm, so that the full data never have to
+    be held in memory. Partial accumulators (e.g., built from chunks processed
+    on different cores) can be combined with `merge`, which uses the parallel
+    form of the same update [CGL83]_. NaNs are ignored, and the co-moments
+    of two variables are taken over the records where both are finite.
+    Before any data have been added, the count is 0 and the other statistics
+    are NaN.
+
+    Parameters
+    ----------
+    chunk : array_like, optional
+        Initial data. A 1D array is a single variable; a 2D array has the
+        shape (time, variables).
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> rs = RunningStats()
+    >>> for chunk in np.split(np.arange(12.0), 3):
+    ...     rs = rs.update(chunk)
+    >>> rs.count, rs.mean, rs.std()
+    (12, 5.5, 3.605551275463989)
+
+    References
+    ----------
+    .. [CGL83] Chan, T. F., Golub, G. H., and LeVeque, R. J. (1983).
+       Algorithms for computing the sample variance: analysis and
+       recommendations. *The American Statistician*, 37(3), 242–247.
+
+    """
+
+    def __init__(self, chunk=None):
+        self._ndim = None
+        # pairwise states: element [i, j] refers to variable i over the
+        # records where both variables i and j are finite
+        self._count = None
+        self._mean = None
+        self._sq_dev = None
+        self._comoment = None
+        self._min = None
+        self._max = None
+        if chunk is not None:
+            self.update(chunk)
+
+    def update(self, chunk):
+        """
+        Update the statistics with a new chunk of data.
+
+        Parameters
+        ----------
+        chunk : array_like
+            A 1D array of a single variable or a 2D array with the shape
+            (time, variables).
+
+        Returns
+        -------
+        RunningStats
+            The accumulator itself.
+
+        Raises
+        ------
+        ValueError
+            If the number of variables differs from earlier chunks.
+
+        """
+        x = _np.asarray(chunk, dtype="d")
+        ndim = x.ndim
+        if ndim == 1:
+            x = x[:, _np.newaxis]
+        elif ndim != 2:
+            raise ValueError("Chunk must be one- or two-dimensional.")
+        self._check_shape(ndim, x.shape[1])
+        if x.shape[0] == 0:
+            return self
+
+        finite = _np.isfinite(x)
+        mask = finite.astype("d")
+        n_finite = _np.sum(finite, axis=0)
+        # shift by the chunk means to reduce cancellation
+        shift = _np.sum(_np.where(finite, x, 0.0), axis=0) / _np.maximum(
+            n_finite, 1
+        )
+        dev = _np.where(finite, x - shift, 0.0)
+        count = mask.T @ mask
+        sum_dev = dev.T @ mask
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            mean_dev = _np.where(count > 0, sum_dev / count, 0.0)
+        state = (
+            count,
+            shift[:, _np.newaxis] + mean_dev,
+            (dev * dev).T @ mask - sum_dev * mean_dev,
+            dev.T @ dev - sum_dev * mean_dev.T,
+            _np.fmin.reduce(x, axis=0),
+            _np.fmax.reduce(x, axis=0),
+        )
+        self._combine(*state)
+        return self
+
+    def merge(self, other):
+        """
+        Merge the statistics of another accumulator into this one.
+
+        Parameters
+        ----------
+        other : RunningStats
+            An accumulator of the same variables.
+
+        Returns
+        -------
+        RunningStats
+            The accumulator itself.
+
+        Raises
+        ------
+        ValueError
+            If the number of variables differs between the two accumulators.
+
+        """
+        if other._count is None:
+            return self
+        self._check_shape(other._ndim, other._count.shape[0])
+        self._combine(
+            other._count,
+            other._mean,
+            other._sq_dev,
+            other._comoment,
+            other._min,
+            other._max,
+        )
+        return self
+
+    @property
+    def count(self):
+        """Number of finite values of each variable."""
+        if self._count is None:
+            return 0
+        return self._result(_np.diag(self._count).astype(int))
+
+    @property
+    def mean(self):
+        """Mean of each variable."""
+        if self._count is None:
+            return _np.nan
+        return self._result(self._diag(self._mean))
+
+    @property
+    def min(self):
+        """Minimum of each variable."""
+        if self._count is None:
+            return _np.nan
+        return self._result(self._min)
+
+    @property
+    def max(self):
+        """Maximum of each variable."""
+        if self._count is None:
+            return _np.nan
+        return self._result(self._max)
+
+    def var(self, ddof=1):
+        """
+        Variance of each variable.
+
+        Parameters
+        ----------
+        ddof : int, optional
+            Degree of freedom for variance calculation. Default is 1.
+
+        """
+        if self._count is None:
+            return _np.nan
+        return self._result(self._var(ddof))
+
+    def std(self, ddof=1):
+        """
+        Standard deviation of each variable.
+
+        Parameters
+        ----------
+        ddof : int, optional
+            Degree of freedom for standard deviation calculation. Default is
+            1.
+
+        """
+        if self._count is None:
+            return _np.nan
+        return self._result(_np.sqrt(self._var(ddof)))
+
+    def cov(self, ddof=1):
+        """
+        Covariance matrix of the variables, from pairwise finite records.
+
+        Parameters
+        ----------
+        ddof : int, optional
+            Degree of freedom for covariance calculation. Default is 1.
+
+        """
+        if self._count is None:
+            return _np.nan
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            cov = _np.where(
+                self._count > ddof,
+                self._comoment / (self._count - ddof),
+                _np.nan,
+            )
+        return self._result(cov)
+
+    def corr(self):
+        """Pearson correlation matrix of the variables."""
+        if self._count is None:
+            return _np.nan
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            corr = self._comoment / _np.sqrt(self._sq_dev * self._sq_dev.T)
+        return self._result(corr)
+
+    def zscore(self, x):
+        """
+        Calculate the Z-score of values with the accumulated statistics.
+
+        Parameters
+        ----------
+        x : array_like
+            Values of the variables.
+
+        Returns
+        -------
+        array_like
+            The same as `zscore` applied to the concatenated data, evaluated
+            at `x`.
+
+        """
+        return (_np.asarray(x, dtype="d") - self.mean) / self.std(ddof=1)
+
+    def _check_shape(self, ndim, n_vars):
+        if self._count is None:
+            self._ndim = ndim
+        elif self._count.shape[0] != n_vars or (self._ndim == 1) != (
+            ndim == 1
+        ):
+            raise ValueError("Number of variables does not match.")
+
+    def _combine(self, count, mean, sq_dev, comoment, x_min, x_max):
+        if self._count is None:
+            self._count = count
+            self._mean = mean
+            self._sq_dev = sq_dev
+            self._comoment = comoment
+            self._min = x_min
+            self._max = x_max
+            return
+
+        n_a, n_b = self._count, count
+        n = n_a + n_b
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            frac_b = _np.where(n > 0, n_b / n, 0.0)
+        delta = _np.where(n_b > 0, mean - self._mean, 0.0)
+        weight = n_a * frac_b
+        self._mean = self._mean + delta * frac_b
+        self._sq_dev = self._sq_dev + sq_dev + delta * delta * weight
+        self._comoment = self._comoment + comoment + delta * delta.T * weight
+        self._count = n
+        self._min = _np.fmin(self._min, x_min)
+        self._max = _np.fmax(self._max, x_max)
+
+    def _var(self, ddof):
+        n = _np.diag(self._count)
+        with _np.errstate(divide="ignore", invalid="ignore"):
+            return _np.where(
+                n > ddof, _np.diag(self._sq_dev) / (n - ddof), _np.nan
+            )
+
+    def _diag(self, a):
+        return _np.where(_np.diag(self._count) > 0, _np.diag(a), _np.nan)
+
+    def _result(self, a):
+        # results of a single variable are returned as scalars
+        return a.item() if self._ndim == 1 else a
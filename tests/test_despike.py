@@ -0,0 +1,89 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from ecoflux.stats.despike import despike
+from ecoflux.stats.timeseries import extract_window
+
+
+def _despike_loop(x, window_size, threshold, step, max_consecutive, max_iter):
+    """Vickers-Mahrt despiking of one channel with explicit loops."""
+    left_size = (window_size - 1) // 2
+    right_size = window_size - 1 - left_size
+    work = x.copy()
+    spikes = np.zeros(x.size, dtype=bool)
+    for i in range(max_iter):
+        outliers = np.zeros(x.size, dtype=bool)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for j in range(x.size):
+                w = work[extract_window(work, j, left_size, right_size)]
+                outliers[j] = np.abs(work[j] - np.nanmean(w)) > (
+                    threshold + i * step
+                ) * np.nanstd(w, ddof=1)
+        new_spikes = np.zeros(x.size, dtype=bool)
+        j = 0
+        while j < x.size:
+            if outliers[j]:
+                k = j
+                while k < x.size and outliers[k]:
+                    k += 1
+                if k - j <= max_consecutive:
+                    new_spikes[j:k] = True
+                j = k
+            else:
+                j += 1
+        if not np.any(new_spikes):
+            break
+        spikes |= new_spikes
+        work[new_spikes] = np.nan
+    return spikes
+
+
+@pytest.fixture
+def noisy_channels():
+    rng = np.random.default_rng(12)
+    data = rng.normal(size=(600, 3)) + [0.0, 300.0, 15.0]
+    # single and double spikes, and a long run that is retained
+    data[[50, 51, 200], 0] += 12.0
+    data[400, 1] -= 10.0
+    data[300:310, 2] += 8.0
+    data[10, 2] = np.nan
+    return data
+
+
+def test_despike_matches_loop(noisy_channels):
+    res = despike(noisy_channels, 51, threshold=3.0)
+    for c in range(3):
+        expected = _despike_loop(noisy_channels[:, c], 51, 3.0, 0.1, 3, 20)
+        np.testing.assert_array_equal(res.spikes[:, c], expected)
+    assert np.all(res.spikes[[50, 51, 200], 0])
+    assert res.spikes[400, 1]
+    assert not np.any(res.spikes[300:310, 2])
+    np.testing.assert_array_equal(res.n_spikes, np.sum(res.spikes, axis=0))
+
+
+def test_despike_replace(noisy_channels):
+    res = despike(noisy_channels, 51, threshold=3.0)
+    # spikes are interpolated linearly, other values are unchanged
+    assert res.data[400, 1] == pytest.approx(
+        0.5 * (noisy_channels[399, 1] + noisy_channels[401, 1])
+    )
+    np.testing.assert_array_equal(
+        res.data[~res.spikes], noisy_channels[~res.spikes]
+    )
+    res_nan = despike(noisy_channels, 51, threshold=3.0, replace=False)
+    assert np.all(np.isnan(res_nan.data[res_nan.spikes]))
+    # flagged channels with too many spikes
+    res = despike(noisy_channels, 51, threshold=3.0, max_spike_frac=0.004)
+    np.testing.assert_array_equal(res.flag, res.n_spikes > 0.004 * 600)
+    assert res.flag[0]
+
+
+def test_despike_1d(noisy_channels):
+    res = despike(noisy_channels[:, 0], 51, threshold=3.0)
+    assert res.data.shape == (600,)
+    assert isinstance(res.n_spikes, int)
+    with pytest.raises(ValueError):
+        despike(noisy_channels[:20, 0], 51)
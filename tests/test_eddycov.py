@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.eddycov import (
+    air_molar_density,
+    block_cov,
+    h2o_mole_fraction,
+    lagged_block_cov,
+    latent_heat_flux,
+    scalar_flux,
+    sensible_heat_flux,
+)
+from ecoflux.physchem.latent_heat import latent_heat_vap
+
+
+def _lagged_cov_loop(x, y, lag, ddof=1):
+    """Covariance of y lagging behind x by `lag` samples in one block."""
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = np.where(valid, x - np.mean(x[valid]), np.nan)
+    y = np.where(valid, y - np.mean(y[valid]), np.nan)
+    if lag >= 0:
+        prod = x[: x.size - lag] * y[lag:]
+    else:
+        prod = x[-lag:] * y[: y.size + lag]
+    n = np.sum(np.isfinite(prod))
+    return np.nansum(prod) / (n - ddof) if n > ddof else np.nan
+
+
+@pytest.fixture
+def lagged_series():
+    rng = np.random.default_rng(3)
+    n, block_size = 1200, 200
+    x = rng.normal(size=n)
+    # y lags behind x by a different number of samples in each block
+    shifts = np.repeat([3, -2, 5, 0, 7, -4], block_size)
+    y = 0.8 * x[(np.arange(n) - shifts) % n] + 0.3 * rng.normal(size=n)
+    return x, y, block_size
+
+
+def test_block_cov_matches_loop(lagged_series):
+    x, y, block_size = lagged_series
+    x = x.copy()
+    x[50:60] = np.nan
+    expected = [
+        _lagged_cov_loop(x[i : i + block_size], y[i : i + block_size], 0)
+        for i in range(0, x.size, block_size)
+    ]
+    np.testing.assert_allclose(block_cov(x, y, block_size), expected)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 4])
+def test_lagged_block_cov_matches_loop(lagged_series, chunk_size):
+    x, y, block_size = lagged_series
+    y = y.copy()
+    y[210:230] = np.nan
+    res = lagged_block_cov(x, y, block_size, 8, chunk_size=chunk_size)
+    for k, i in enumerate(range(0, x.size, block_size)):
+        covs = np.array(
+            [
+                _lagged_cov_loop(
+                    x[i : i + block_size], y[i : i + block_size], lag
+                )
+                for lag in range(-8, 9)
+            ]
+        )
+        i_max = np.nanargmax(np.abs(covs))
+        assert res.lag[k] == i_max - 8
+        assert res.cov[k] == pytest.approx(covs[i_max])
+    np.testing.assert_array_equal(res.lag, [3, -2, 5, 0, 7, -4])
+    assert np.all(res.valid)
+
+
+def test_lagged_block_cov_min_lag(lagged_series):
+    x, y, block_size = lagged_series
+    res = lagged_block_cov(x, y, block_size, 8, min_lag=0)
+    assert np.all(res.lag >= 0)
+    np.testing.assert_array_equal(res.lag[[0, 2, 3, 4]], [3, 5, 0, 7])
+
+
+def test_lagged_block_cov_missing_block(lagged_series):
+    x, y, block_size = lagged_series
+    x = x.copy()
+    x[block_size : 2 * block_size] = np.nan
+    res = lagged_block_cov(x, y, block_size, 8, min_lag=-8)
+    np.testing.assert_array_equal(res.valid, [1, 0, 1, 1, 1, 1])
+    assert np.isnan(res.cov[1])
+    np.testing.assert_array_equal(res.lag[res.valid], [3, 5, 0, 7, -4])
+
+
+def test_lagged_block_cov_lag_range():
+    with pytest.raises(ValueError):
+        lagged_block_cov(np.zeros(100), np.zeros(100), 10, 10)
+
+
+def test_flux_conversions():
+    rho_m = air_molar_density(101325.0, 20.0)
+    assert rho_m == pytest.approx(41.57, rel=1e-3)
+    assert air_molar_density(101325.0, 293.15, 2000.0, kelvin=True) == (
+        pytest.approx(rho_m * (1.0 - 2000.0 / 101325.0))
+    )
+    # 0.1 m s-1 K of kinematic heat flux is about 120 W m-2
+    assert sensible_heat_flux(0.1, rho_m) == pytest.approx(120.0, rel=0.02)
+    assert latent_heat_flux(1e-4, rho_m, 20.0) == pytest.approx(
+        1e-4 * rho_m * 0.018015 * 2453760.0, rel=1e-4
+    )
+    assert latent_heat_vap(20.0) == pytest.approx(2453760.0)
+    assert h2o_mole_fraction(0.01) == pytest.approx(0.01608, rel=1e-3)
+    assert scalar_flux(0.5, rho_m) == pytest.approx(0.5 * rho_m)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import scipy.constants as sc
+from scipy import optimize
+
+from ecoflux.constants import constants
+from ecoflux.leaf.energy_balance import leaf_temp
+from ecoflux.physchem.latent_heat import latent_heat_vap
+from ecoflux.physchem.sat_vap import dp_sat_h2o_dT, p_sat_h2o
+
+
+@pytest.mark.parametrize("method", ["gg", "buck", "cimo"])
+@pytest.mark.parametrize("ice", [False, True])
+def test_dp_sat_h2o_dT(method, ice):
+    temp = np.linspace(-30.0, 0.0, 7) if ice else np.linspace(-10.0, 45.0, 12)
+    h = 1e-4
+    expected = (
+        p_sat_h2o(temp + h, ice=ice, method=method)
+        - p_sat_h2o(temp - h, ice=ice, method=method)
+    ) / (2.0 * h)
+    np.testing.assert_allclose(
+        dp_sat_h2o_dT(temp, ice=ice, method=method), expected, rtol=1e-7
+    )
+    np.testing.assert_allclose(
+        dp_sat_h2o_dT(temp + sc.zero_Celsius, ice, True, method),
+        dp_sat_h2o_dT(temp, ice, False, method),
+    )
+
+
+def _balance(temp, rad_abs, temp_air, e_air, heat_cond, vap_cond):
+    T_l, T_a = temp + sc.zero_Celsius, temp_air + sc.zero_Celsius
+    return (
+        rad_abs
+        - 2.0 * 0.97 * sc.sigma * T_l**4
+        - constants.cpm_d * heat_cond * (temp - temp_air)
+        - latent_heat_vap(T_a, kelvin=True)
+        * constants.M_w
+        * vap_cond
+        * (p_sat_h2o(temp) - e_air)
+        / 101325.0
+    )
+
+
+def test_leaf_temp_matches_root_finding():
+    rng = np.random.default_rng(9)
+    shape = (4, 5)
+    rad_abs = rng.uniform(400.0, 1000.0, shape)
+    temp_air = rng.uniform(5.0, 35.0, shape)
+    e_air = 0.5 * p_sat_h2o(temp_air)
+    heat_cond = rng.uniform(0.2, 2.0, shape)
+    vap_cond = rng.uniform(0.0, 0.5, shape)
+    res = leaf_temp(rad_abs, temp_air, e_air, heat_cond, vap_cond)
+    assert res.temp.shape == shape
+    assert np.all(res.converged)
+    for idx in np.ndindex(shape):
+        args = tuple(
+            a[idx] for a in (rad_abs, temp_air, e_air, heat_cond, vap_cond)
+        )
+        expected = optimize.brentq(_balance, -50.0, 80.0, args=args)
+        assert res.temp[idx] == pytest.approx(expected, abs=1e-6)
+    # the fluxes close the energy balance
+    emission = 2.0 * 0.97 * sc.sigma * (res.temp + sc.zero_Celsius) ** 4
+    np.testing.assert_allclose(
+        emission + res.sensible_heat + res.latent_heat, rad_abs
+    )
+    np.testing.assert_allclose(
+        res.transpiration,
+        vap_cond * (p_sat_h2o(res.temp) - e_air) / 101325.0,
+    )
+
+
+def test_leaf_temp_kelvin_and_missing():
+    res = leaf_temp([600.0, np.nan], 25.0, 2000.0, 1.0, 0.2)
+    np.testing.assert_array_equal(res.converged, [True, False])
+    assert np.isnan(res.temp[1])
+    res_k = leaf_temp(
+        600.0, 25.0 + sc.zero_Celsius, 2000.0, 1.0, 0.2, kelvin=True
+    )
+    assert res_k.temp == pytest.approx(res.temp[0] + sc.zero_Celsius)
+    # too few iterations to converge
+    res = leaf_temp(600.0, 25.0, 2000.0, 1.0, 0.2, max_iter=1)
+    assert not res.converged
+    assert np.isnan(res.temp)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.footprint import (
+    FootprintClimatology,
+    footprint,
+    footprint_climatology,
+)
+
+
+@pytest.fixture
+def grid():
+    return np.arange(-500.0, 501.0, 5.0)
+
+
+def test_footprint_integral(grid):
+    fp = footprint(grid, grid, 10.0, 0.4, 0.8, -50.0, 270.0, z0=0.1)
+    # most of the flux comes from the upwind area within the grid
+    total = np.sum(fp, axis=(1, 2)) * 25.0
+    assert 0.8 < total[0] < 1.0
+    # west wind: the footprint lies to the west of the tower
+    assert np.sum(fp[0][:, grid < 0]) > 100 * np.sum(fp[0][:, grid > 0])
+
+
+def test_footprint_near_neutral_symmetric(grid):
+    # |L| above 5000 m is neutral in the crosswind spread for either sign
+    fp = footprint(
+        grid, grid, 10.0, 0.4, 0.8, [-1e4, 1e4, -1e6], 180.0, u_mean=3.0
+    )
+    np.testing.assert_allclose(fp[0], fp[2])
+    np.testing.assert_allclose(fp[0], fp[1])
+
+
+def test_footprint_invalid(grid):
+    fp = footprint(
+        grid, grid, 10.0, [0.05, 0.4], 0.8, -50.0, 0.0, u_mean=[1.0, 3.0]
+    )
+    assert np.all(np.isnan(fp[0]))
+    assert np.all(np.isfinite(fp[1]))
+    with pytest.raises(ValueError):
+        footprint(grid, grid, 10.0, 0.4, 0.8, -50.0, 0.0)
+
+
+def test_footprint_climatology(grid):
+    u_star = [0.3, 0.5, 0.05, 0.4]
+    ol = [-50.0, 200.0, -20.0, 1e4]
+    wind_dir = [270.0, 180.0, 90.0, 45.0]
+    fp = footprint(grid, grid, 10.0, u_star, 0.6, ol, wind_dir, z0=0.1)
+    clim = footprint_climatology(
+        grid, grid, 10.0, u_star, 0.6, ol, wind_dir, z0=0.1, chunk_size=3
+    )
+    assert clim.count == 3
+    np.testing.assert_allclose(clim.mean, np.nanmean(fp, axis=0))
+
+    first = FootprintClimatology(grid, grid).update(
+        10.0, u_star[:2], 0.6, ol[:2], wind_dir[:2], z0=0.1
+    )
+    second = FootprintClimatology(grid, grid).update(
+        10.0, u_star[2:], 0.6, ol[2:], wind_dir[2:], z0=0.1
+    )
+    merged = first.merge(second)
+    assert merged.count == 3
+    np.testing.assert_allclose(merged.mean, clim.mean)
+    assert np.all(np.isnan(FootprintClimatology(grid, grid).mean))
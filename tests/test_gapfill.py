@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from ecoflux.stats.timeseries import batch_gapfill, mds_gapfill, simple_gapfill
+
+
+@pytest.fixture
+def half_hourly():
+    rng = np.random.default_rng(0)
+    time = np.arange(0.0, 60.0, 1.0 / 48.0)
+    rg = np.maximum(0.0, 800.0 * np.sin(2.0 * np.pi * (time - 0.25)))
+    ta = 15.0 + 5.0 * np.sin(2.0 * np.pi * (time - 0.375)) + 0.05 * time
+    vpd = np.maximum(0.0, 10.0 + 8.0 * np.sin(2.0 * np.pi * (time - 0.4)))
+    flux = 2.0 - 0.02 * rg + rng.normal(0.0, 0.5, time.size)
+    gaps = rng.random(time.size) < 0.2
+    gaps[1000:1100] = True
+    flux[gaps] = np.nan
+    return time, flux, rg, ta, vpd
+
+
+def test_batch_gapfill_matches_simple_gapfill():
+    rng = np.random.default_rng(1)
+    x = np.cumsum(rng.uniform(0.5, 1.5, 200))
+    y = rng.normal(size=(200, 3))
+    y[rng.random(y.shape) < 0.3] = np.nan
+    y[:5, 1] = np.nan
+    y[-7:, 2] = np.nan
+    res = batch_gapfill(x, y)
+    for j in range(3):
+        np.testing.assert_allclose(
+            res.filled[:, j], simple_gapfill(x, y[:, j])
+        )
+    np.testing.assert_array_equal(res.flag, ~np.isfinite(y))
+
+
+def test_batch_gapfill_max_gap_per_variable():
+    x = np.arange(8.0)
+    col = np.array([0.0, np.nan, 2.0, np.nan, np.nan, np.nan, 6.0, 7.0])
+    y = np.column_stack((col, col))
+    res = batch_gapfill(x, y, max_gap=[1, 3])
+    np.testing.assert_array_equal(
+        res.filled[:, 0], [0, 1, 2, np.nan, np.nan, np.nan, 6, 7]
+    )
+    np.testing.assert_array_equal(res.filled[:, 1], np.arange(8.0))
+    np.testing.assert_array_equal(res.flag[:, 0], [0, 1, 0, 0, 0, 0, 0, 0])
+
+
+def test_batch_gapfill_all_nan_column_is_not_flagged():
+    y = np.column_stack((np.full(4, np.nan), [1.0, np.nan, 3.0, 4.0]))
+    res = batch_gapfill(np.arange(4.0), y)
+    assert not np.any(res.flag[:, 0])
+    assert np.all(np.isnan(res.filled[:, 0]))
+    assert res.filled[1, 1] == 2.0
+
+
+def test_mds_gapfill_lookup_matches_brute_force(half_hourly):
+    time, flux, rg, ta, vpd = half_hourly
+    res = mds_gapfill(time, flux, rg, ta, vpd)
+    measured = np.isfinite(flux)
+    np.testing.assert_array_equal(res.filled[measured], flux[measured])
+    assert np.all(res.quality[measured] == 0)
+    assert np.all(res.quality[~measured] > 0)
+
+    first = np.flatnonzero((res.method == 1) & (res.window == 7))
+    assert first.size > 0
+    for i in first[:: max(1, first.size // 50)]:
+        similar = (
+            measured
+            & (np.abs(time - time[i]) <= 7.0 + 1e-9)
+            & (np.abs(rg - rg[i]) <= 50.0 + 1e-9)
+            & (np.abs(ta - ta[i]) <= 2.5 + 1e-9)
+            & (np.abs(vpd - vpd[i]) <= 5.0 + 1e-9)
+        )
+        assert res.n[i] == np.sum(similar)
+        assert res.filled[i] == pytest.approx(np.mean(flux[similar]))
+
+
+def test_mds_gapfill_diurnal_course_without_drivers(half_hourly):
+    time, flux, rg, ta, vpd = half_hourly
+    rg = np.full(time.size, np.nan)
+    res = mds_gapfill(time, flux, rg, ta, vpd)
+    measured = np.isfinite(flux)
+    gaps = np.flatnonzero(~measured)
+    assert np.all(res.method[gaps] == 3)
+    i = gaps[gaps < 900][10]
+    w = res.window[i]
+    days = np.arange(-w, w + 1)
+    near = np.zeros(time.size, bool)
+    for day in days:
+        near |= np.abs(time - time[i] - day) <= 1.0 / 24.0 + 1e-6
+    assert res.n[i] == np.sum(near & measured)
+    assert res.filled[i] == pytest.approx(np.mean(flux[near & measured]))
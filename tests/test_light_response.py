@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+from scipy.optimize import least_squares
+
+from ecoflux.leaf.light_response import (
+    fit_light_response,
+    hyperbolic,
+    jac_hyperbolic,
+    jac_michaelis_menten,
+    michaelis_menten,
+    residual_hyperbolic,
+    residual_michaelis_menten,
+)
+
+
+def _jac_central(residual, p, par, A_n, h=1e-6):
+    """Reference Jacobian by central differences."""
+    p = np.asarray(p, dtype="d")
+    cols = []
+    for i in range(p.size):
+        dp = np.zeros_like(p)
+        dp[i] = h * max(abs(p[i]), 1.0)
+        cols.append(
+            (residual(p + dp, par, A_n) - residual(p - dp, par, A_n))
+            / (2.0 * dp[i])
+        )
+    return np.stack(cols, axis=-1)
+
+
+PAR = np.array([0.0, 25.0, 50.0, 100.0, 200.0, 400.0, 800.0, 1200.0, 1600.0])
+
+
+@pytest.fixture
+def curves():
+    rng = np.random.default_rng(5)
+    n_curves = 40
+    params = np.column_stack(
+        (
+            rng.uniform(0.5, 0.9, n_curves),
+            rng.uniform(0.03, 0.07, n_curves),
+            rng.uniform(10.0, 30.0, n_curves),
+            rng.uniform(0.5, 3.0, n_curves),
+        )
+    )
+    # ragged curves with shuffled records and non-contiguous labels
+    labels, par, A_n = [], [], []
+    for k, p in enumerate(params):
+        n = rng.integers(6, PAR.size + 1)
+        x = np.sort(rng.choice(PAR, n, replace=False))
+        labels.append(np.full(n, 10 * k))
+        par.append(x)
+        A_n.append(hyperbolic(p, x) + rng.normal(scale=0.2, size=n))
+    order = rng.permutation(sum(a.size for a in labels))
+    labels, par, A_n = (np.concatenate(a)[order] for a in (labels, par, A_n))
+    return labels, par, A_n
+
+
+@pytest.mark.parametrize(
+    "model, func, residual",
+    [
+        ("hyperbolic", hyperbolic, residual_hyperbolic),
+        ("michaelis_menten", michaelis_menten, residual_michaelis_menten),
+    ],
+)
+def test_fit_light_response_vs_least_squares(curves, model, func, residual):
+    labels, par, A_n = curves
+    fit = fit_light_response(labels, par, A_n, model=model)
+    np.testing.assert_array_equal(fit.curve, np.unique(labels))
+    assert fit.params.shape == fit.stderr.shape
+    assert fit.params.shape[1] == (4 if model == "hyperbolic" else 3)
+    for k, label in enumerate(fit.curve):
+        sel = labels == label
+        if not fit.converged[k]:
+            continue
+        ref = least_squares(
+            residual, fit.params[k], args=(par[sel], A_n[sel]), method="lm"
+        )
+        cost = np.sum(residual(fit.params[k], par[sel], A_n[sel]) ** 2)
+        assert cost == pytest.approx(2.0 * ref.cost, rel=1e-6, abs=1e-10)
+        # the standard errors from the covariance of the residuals
+        n, m = sel.sum(), fit.params.shape[1]
+        cov = np.linalg.inv(ref.jac.T @ ref.jac) * 2.0 * ref.cost / (n - m)
+        np.testing.assert_allclose(
+            fit.stderr[k], np.sqrt(np.diag(cov)), rtol=1e-3
+        )
+    assert np.mean(fit.converged) > 0.9
+
+
+def test_fit_light_response_missing_and_p0(curves):
+    labels, par, A_n = curves
+    A_n = A_n.copy()
+    A_n[::7] = np.nan
+    fit = fit_light_response(labels, par, A_n)
+    single = fit_light_response(labels, par, A_n, p0=[0.7, 0.05, 20.0, 2.0])
+    both = fit.converged & single.converged
+    np.testing.assert_allclose(
+        fit.params[both], single.params[both], rtol=1e-4, atol=1e-6
+    )
+    with pytest.raises(ValueError):
+        fit_light_response(labels, par, A_n, model="exponential")
+
+
+@pytest.mark.parametrize("theta", [0.0, 1e-9, 0.3, 0.7, 0.95])
+def test_jac_hyperbolic(theta):
+    p = [theta, 0.05, 20.0, 2.0]
+    A_n = hyperbolic(p, PAR)
+    jac = jac_hyperbolic(p, PAR, A_n)
+    assert jac.shape == (PAR.size, 4)
+    assert np.all(np.isfinite(jac))
+    # the theta step must stay in the domain around theta = 0
+    if theta < 1e-6:
+        p_lo, p_hi = [0.0, 0.05, 20.0, 2.0], [2e-6, 0.05, 20.0, 2.0]
+        slope = (hyperbolic(p_hi, PAR) - hyperbolic(p_lo, PAR)) / 2e-6
+        np.testing.assert_allclose(jac[:, 0], slope, rtol=1e-4, atol=1e-8)
+        ref = _jac_central(residual_hyperbolic, p, PAR, A_n)[:, 1:]
+        np.testing.assert_allclose(jac[:, 1:], ref, rtol=1e-6, atol=1e-8)
+    else:
+        ref = _jac_central(residual_hyperbolic, p, PAR, A_n)
+        np.testing.assert_allclose(jac, ref, rtol=1e-6, atol=1e-8)
+
+
+def test_jac_michaelis_menten():
+    p = [500.0, 20.0, 2.0]
+    jac = jac_michaelis_menten(p, PAR)
+    ref = _jac_central(residual_michaelis_menten, p, PAR, 0.0)
+    np.testing.assert_allclose(jac, ref, rtol=1e-6, atol=1e-10)
+
+
+@pytest.mark.parametrize(
+    "residual, jac, p_true, p0",
+    [
+        (
+            residual_hyperbolic,
+            jac_hyperbolic,
+            [0.02, 0.05, 20.0, 2.0],
+            [0.5, 0.03, 15.0, 1.0],
+        ),
+        (
+            residual_michaelis_menten,
+            jac_michaelis_menten,
+            [300.0, 20.0, 2.0],
+            [500.0, 15.0, 1.0],
+        ),
+    ],
+)
+def test_least_squares_with_jac(residual, jac, p_true, p0):
+    A_n = residual(p_true, PAR, 0.0)
+    calls = []
+
+    def counted(p, par, A_n):
+        calls.append(1)
+        return residual(p, par, A_n)
+
+    least_squares(counted, p0, args=(PAR, A_n))
+    n_numeric = len(calls)
+    calls.clear()
+    analytic = least_squares(counted, p0, jac=jac, args=(PAR, A_n))
+    assert analytic.success
+    np.testing.assert_allclose(analytic.x, p_true, rtol=1e-5, atol=1e-7)
+    # no model evaluations are spent on finite differences
+    assert len(calls) == analytic.nfev
+    assert len(calls) + analytic.njev < n_numeric
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.partitioning import (
+    daytime_partitioning,
+    lloyd_taylor,
+    nighttime_partitioning,
+)
+
+
+@pytest.fixture
+def half_hourly_nee():
+    """Twelve days of half-hourly NEE from known respiration and GPP."""
+    rng = np.random.default_rng(8)
+    time = np.arange(0.0, 12.0, 1.0 / 48.0)
+    hour = (time % 1.0) * 24.0
+    rg = np.fmax(800.0 * np.sin(np.pi * (hour - 6.0) / 12.0), 0.0)
+    par = 2.0 * rg
+    temp = 12.0 + 8.0 * np.sin(np.pi * (hour - 9.0) / 12.0) + 0.5 * time
+    r_ref = 2.0 + 0.1 * time
+    reco = lloyd_taylor((r_ref, 200.0), temp)
+    gpp = 0.05 * par * 30.0 / (0.05 * par + 30.0)
+    nee = reco - gpp + 0.05 * rng.normal(size=time.size)
+    return time, nee, temp, par, rg, reco, gpp
+
+
+def test_lloyd_taylor():
+    assert lloyd_taylor((2.0, 300.0), 15.0) == pytest.approx(2.0)
+    assert lloyd_taylor((2.0, 300.0), 25.0) == pytest.approx(
+        2.0 * np.exp(300.0 * (1.0 / 61.02 - 1.0 / 71.02))
+    )
+
+
+def test_nighttime_partitioning(half_hourly_nee):
+    time, nee, temp, par, rg, reco, gpp = half_hourly_nee
+    res = nighttime_partitioning(time, nee, temp, rg)
+    assert res.e_0 == pytest.approx(200.0, rel=0.05)
+    np.testing.assert_allclose(res.reco, reco, rtol=0.1)
+    np.testing.assert_allclose(res.gpp, res.reco - nee)
+
+
+def test_nighttime_partitioning_narrow_temp_range(half_hourly_nee):
+    time, nee, temp, par, rg, reco, gpp = half_hourly_nee
+    # nights with less than 5 K of temperature range are not used for E_0
+    temp = 15.0 + 0.4 * np.sin(2.0 * np.pi * time)
+    nee = lloyd_taylor((2.0, 200.0), temp) + np.where(rg > 0.0, -gpp, 0.0)
+    res = nighttime_partitioning(time, nee, temp, rg)
+    assert res.e_0 == 100.0
+    np.testing.assert_allclose(res.r_ref, 2.0, rtol=1e-3)
+
+
+def test_daytime_partitioning(half_hourly_nee):
+    time, nee, temp, par, rg, reco, gpp = half_hourly_nee
+    res = daytime_partitioning(time, nee, temp, par, rg, e_0=200.0)
+    valid = np.all(np.isfinite(res.params), axis=1)
+    assert np.sum(valid) >= res.params.shape[0] - 1
+    np.testing.assert_allclose(res.params[valid, 0], 0.05, rtol=0.1)
+    np.testing.assert_allclose(res.params[valid, 1], 30.0, rtol=0.1)
+    day = rg > 100.0
+    np.testing.assert_allclose(res.gpp[day], gpp[day], rtol=0.1)
+    res_e0 = daytime_partitioning(time, nee, temp, par, rg)
+    assert res_e0.e_0 == pytest.approx(200.0, rel=0.05)
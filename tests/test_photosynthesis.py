@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+from ecoflux.leaf.photosynthesis import (
+    GAMMA_STAR_25,
+    arrhenius,
+    fit_aci,
+    fvcb,
+    temperature_factors,
+)
+
+CI = np.array(
+    [
+        50.0,
+        80.0,
+        100.0,
+        150.0,
+        200.0,
+        300.0,
+        400.0,
+        600.0,
+        800.0,
+        1000.0,
+        1200.0,
+        1500.0,
+    ]
+)
+
+
+def test_fvcb_limitations():
+    res = fvcb(CI, 25.0, 60.0, 120.0, 1.0, tpu25=8.5)
+    np.testing.assert_allclose(
+        res.a_n, np.minimum(np.minimum(res.w_c, res.w_j), res.w_p) - res.r_d
+    )
+    # Rubisco limitation at low Ci, then RuBP, then TPU
+    limit = np.argmin(np.stack((res.w_c, res.w_j, res.w_p)), axis=0)
+    assert np.all(np.diff(limit) >= 0)
+    np.testing.assert_array_equal(np.unique(limit), [0, 1, 2])
+
+
+def test_temperature_factors():
+    f = temperature_factors(25.0)
+    np.testing.assert_allclose(f[:4], 1.0)
+    np.testing.assert_allclose(f.gamma_star, GAMMA_STAR_25)
+    temp = np.array([10.0, 25.0, 35.0])
+    f_k = temperature_factors(temp + 273.15, kelvin=True)
+    np.testing.assert_allclose(f_k, temperature_factors(temp))
+    np.testing.assert_allclose(f_k.vcmax, arrhenius(1.0, 65330.0, temp))
+
+
+@pytest.mark.parametrize(
+    "truth", [(40.3, 62.0, 1.63), (22.4, 42.8, 1.88), (60.0, 120.0, 1.0)]
+)
+def test_fit_aci_regression(truth):
+    # curves that converged to wrong local minima with limitations chosen
+    # anew at every iteration
+    A_n = fvcb(CI, 25.0, *truth).a_n
+    fit = fit_aci(np.zeros(CI.size), CI, A_n)
+    np.testing.assert_allclose(fit.params[0], truth, rtol=1e-6)
+    assert fit.converged[0]
+
+
+def test_fit_aci_noise_free_batch():
+    rng = np.random.default_rng(0)
+    n = 500
+    truth = np.column_stack(
+        (
+            rng.uniform(20.0, 120.0, n),
+            rng.uniform(30.0, 200.0, n),
+            rng.uniform(0.3, 2.5, n),
+        )
+    )
+    A_n = fvcb(CI, 25.0, truth[:, :1], truth[:, 1:2], truth[:, 2:3]).a_n
+    # shuffled records and one missing point per curve
+    A_n[np.arange(n), rng.integers(0, CI.size, n)] = np.nan
+    curve = np.repeat(np.arange(n), CI.size)
+    perm = rng.permutation(curve.size)
+    fit = fit_aci(curve[perm], np.tile(CI, n)[perm], A_n.ravel()[perm])
+    # every curve that has both limitations at 2 points or more
+    res = fvcb(CI, 25.0, truth[:, :1], truth[:, 1:2], truth[:, 2:3])
+    rubisco = (res.w_c < res.w_j) & np.isfinite(A_n)
+    identifiable = (np.sum(rubisco, axis=1) >= 2) & (
+        np.sum(~rubisco & np.isfinite(A_n), axis=1) >= 2
+    )
+    assert np.all(fit.converged[identifiable])
+    np.testing.assert_allclose(
+        fit.params[fit.converged], truth[fit.converged], rtol=1e-5
+    )
+
+
+def test_fit_aci_inactive_limitation():
+    # RuBP limitation at no point: J is not determined
+    A_n = fvcb(CI, 25.0, 30.0, 300.0, 1.0).a_n
+    fit = fit_aci(np.zeros(CI.size), CI, A_n)
+    assert not fit.converged[0]
+    np.testing.assert_allclose(fit.params[0, [0, 2]], [30.0, 1.0])
+    assert np.isnan(fit.stderr[0, 1])
+    assert np.all(np.isfinite(fit.stderr[0, [0, 2]]))
+
+
+def test_fit_aci_tpu_noisy():
+    rng = np.random.default_rng(1)
+    truth = np.array([[50.0, 90.0, 1.2, 7.0], [80.0, 150.0, 2.0, 9.0]])
+    ci = np.linspace(50.0, 1500.0, 20)
+    A_n = fvcb(
+        ci,
+        25.0,
+        truth[:, :1],
+        truth[:, 1:2],
+        truth[:, 2:3],
+        tpu25=truth[:, 3:],
+    ).a_n + 0.1 * rng.normal(size=(2, ci.size))
+    fit = fit_aci(
+        np.repeat([0, 1], ci.size), np.tile(ci, 2), A_n.ravel(), fit_tpu=True
+    )
+    assert np.all(fit.converged)
+    np.testing.assert_allclose(fit.params, truth, rtol=0.1)
+    for i in range(2):
+        # no lower cost from multiple starts of a general solver
+        def resid(p):
+            return fvcb(ci, 25.0, p[0], p[1], p[2], tpu25=p[3]).a_n - A_n[i]
+
+        best = min(
+            optimize.least_squares(resid, truth[i] * s).cost
+            for s in (0.7, 1.0, 1.3)
+        )
+        cost = 0.5 * np.sum(resid(fit.params[i]) ** 2)
+        assert cost <= best * (1.0 + 1e-6)
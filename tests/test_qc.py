@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.qc import itc_test, qc_flag, steady_state_test
+
+
+def test_steady_state_test_matches_loop():
+    rng = np.random.default_rng(7)
+    block_size, n_sub = 600, 6
+    x = rng.normal(size=3 * block_size)
+    # a trend in the covariance of the last block
+    y = 0.5 * x + rng.normal(size=x.size)
+    y[2 * block_size :] += (
+        np.linspace(0.0, 2.0, block_size) * x[2 * block_size :]
+    )
+    expected = []
+    for block_x, block_y in zip(
+        x.reshape(-1, block_size), y.reshape(-1, block_size)
+    ):
+        cov = np.cov(block_x, block_y)[0, 1]
+        cov_sub = np.mean(
+            [
+                np.cov(sub_x, sub_y)[0, 1]
+                for sub_x, sub_y in zip(
+                    block_x.reshape(n_sub, -1), block_y.reshape(n_sub, -1)
+                )
+            ]
+        )
+        expected.append(abs(cov_sub - cov) / abs(cov))
+    result = steady_state_test(x, y, block_size, n_sub)
+    np.testing.assert_allclose(result, expected)
+    assert result[2] > result[0]
+
+
+def test_steady_state_test_block_size():
+    with pytest.raises(ValueError):
+        steady_state_test(np.zeros(100), np.zeros(100), 50, n_sub=6)
+
+
+@pytest.mark.parametrize(
+    "zeta, ratio",
+    [
+        (-1.0, 1.3 * 3.0 ** (1 / 3)),
+        (0.0, 0.21 * np.log(2 * 7.2921e-5 * np.sin(np.pi / 4) / 0.4) + 3.1),
+        (0.1, 0.21 * np.log(2 * 7.2921e-5 * np.sin(np.pi / 4) / 0.4) + 3.1),
+        (-3.0, 1.3 * 7.0 ** (1 / 3)),
+    ],
+)
+def test_itc_test_model(zeta, ratio):
+    # a measured ratio 10% above the model
+    result = itc_test(1.1 * ratio * 0.4, 0.4, zeta, 45.0)
+    assert result == pytest.approx(0.1)
+
+
+def test_itc_test_branches():
+    u_star = 0.2
+    neutral = 0.21 * np.log(2 * 7.2921e-5 * np.sin(np.deg2rad(50.0)) / 0.2)
+    neutral += 3.1
+    zeta = np.array([-5.0, -0.5, -0.2, 0.0, 0.3, 0.4, 0.5, 2.0])
+    ratio = np.array(
+        [np.nan, 1.3 * 2.0 ** (1 / 3)] + [neutral] * 4 + [np.nan, np.nan]
+    )
+    sigma_w = 1.5 * np.nan_to_num(ratio, nan=1.0) * u_star
+    result = itc_test(sigma_w, u_star, zeta, 50.0)
+    np.testing.assert_allclose(result, 0.5 * (ratio / ratio))
+    # stable intervals are compared with the neutral model up to 0.4 only
+    assert itc_test(neutral * u_star, u_star, 0.4, 50.0) == 0.0
+    assert np.isnan(itc_test(neutral * u_star, u_star, 0.41, 50.0))
+
+
+def test_qc_flag():
+    steady_state = [0.1, 0.2, 0.5, 1.5, np.nan, 0.1]
+    itc = [0.2, 0.4, 0.1, 0.1, 0.1, np.nan]
+    np.testing.assert_array_equal(qc_flag(steady_state), [0, 0, 1, 2, 2, 0])
+    # the ITC is not tested where it is NaN
+    np.testing.assert_array_equal(
+        qc_flag(steady_state, itc), [0, 1, 1, 2, 2, 0]
+    )
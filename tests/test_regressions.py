@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from scipy import optimize, stats
+
+from ecoflux.stats.regressions import (
+    batch_least_squares,
+    grouped_linregress,
+    nanmultilinregress,
+    pack_groups,
+)
+
+
+def _exp_resid(p, x, y):
+    return p[:, :1] * np.exp(p[:, 1:] * x) - y
+
+
+def _exp_jac(p, x, y):
+    e = np.exp(p[:, 1:] * x)
+    return np.stack((e, p[:, :1] * x * e), axis=-1)
+
+
+@pytest.fixture
+def exp_problems():
+    rng = np.random.default_rng(11)
+    n_batch, n_obs = 50, 12
+    x = np.tile(np.linspace(0.0, 2.0, n_obs), (n_batch, 1))
+    a = rng.uniform(0.5, 3.0, (n_batch, 1))
+    b = rng.uniform(-1.0, 1.0, (n_batch, 1))
+    y = a * np.exp(b * x) + 0.05 * rng.normal(size=x.shape)
+    # ragged problems padded with NaNs
+    x[::3, 9:] = np.nan
+    y[::3, 9:] = np.nan
+    return x, y
+
+
+@pytest.mark.parametrize("jac", [None, _exp_jac])
+def test_batch_least_squares_matches_scipy(exp_problems, jac):
+    x, y = exp_problems
+    res = batch_least_squares(
+        _exp_resid, np.ones((x.shape[0], 2)), (x, y), jac
+    )
+    assert np.all(res.converged)
+    for i in range(x.shape[0]):
+        finite = np.isfinite(x[i])
+        ref = optimize.least_squares(
+            lambda p: p[0] * np.exp(p[1] * x[i, finite]) - y[i, finite],
+            [1.0, 1.0],
+            method="lm",
+            xtol=1e-12,
+            ftol=1e-12,
+        )
+        np.testing.assert_allclose(res.x[i], ref.x, rtol=1e-5, atol=1e-7)
+        assert res.cost[i] == pytest.approx(ref.cost, rel=1e-8)
+        # standard errors from the covariance matrix of the residuals
+        dof = finite.sum() - 2
+        cov = np.linalg.inv(ref.jac.T @ ref.jac) * 2.0 * ref.cost / dof
+        np.testing.assert_allclose(
+            res.stderr[i], np.sqrt(np.diag(cov)), rtol=1e-4
+        )
+
+
+def test_batch_least_squares_underdetermined():
+    x = np.array([[0.0, 1.0, 2.0], [0.0, np.nan, np.nan], [np.nan] * 3])
+    y = np.array([[1.0, 2.7, 7.4], [1.0, np.nan, np.nan], [np.nan] * 3])
+    res = batch_least_squares(_exp_resid, np.ones((3, 2)), (x, y))
+    np.testing.assert_array_equal(res.converged, [True, False, False])
+    np.testing.assert_array_equal(res.n_iter[1:], 0)
+    np.testing.assert_array_equal(res.x[1:], 1.0)
+    assert np.all(np.isnan(res.stderr[1:]))
+
+
+def test_nanmultilinregress():
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=(40, 2))
+    y = 1.0 + x @ [2.0, -0.5] + 0.1 * rng.normal(size=40)
+    y[3] = np.nan
+    res = nanmultilinregress(x, y)
+    design = np.column_stack((np.ones(39), np.delete(x, 3, axis=0)))
+    beta = np.linalg.lstsq(design, np.delete(y, 3), rcond=None)[0]
+    np.testing.assert_allclose(res.coef, beta[1:])
+    assert res.intercept == pytest.approx(beta[0])
+    assert np.all(np.isnan(nanmultilinregress(x[:2], y[:2]).coef_stderr))
+
+
+def test_grouped_linregress_matches_scipy():
+    rng = np.random.default_rng(4)
+    groups = rng.integers(0, 5, 200)
+    x = rng.normal(size=200)
+    y = groups * x + rng.normal(size=200)
+    x[::17] = np.nan
+    res = grouped_linregress(groups, x, y)
+    np.testing.assert_array_equal(res.group, np.arange(5))
+    for g in range(5):
+        finite = (groups == g) & np.isfinite(x)
+        ref = stats.linregress(x[finite], y[finite])
+        assert res.count[g] == finite.sum()
+        assert res.slope[g] == pytest.approx(ref.slope)
+        assert res.intercept[g] == pytest.approx(ref.intercept)
+        assert res.rvalue[g] == pytest.approx(ref.rvalue)
+        assert res.pvalue[g] == pytest.approx(ref.pvalue, rel=1e-6, abs=1e-300)
+        assert res.stderr[g] == pytest.approx(ref.stderr)
+        assert res.intercept_stderr[g] == pytest.approx(ref.intercept_stderr)
+
+
+def test_pack_groups():
+    rng = np.random.default_rng(11)
+    groups = rng.choice([7, 3, 5], 40)
+    x = rng.normal(size=40)
+    y = np.arange(40.0)
+    levels, (x_pk, y_pk) = pack_groups(groups, x, y)
+    np.testing.assert_array_equal(levels, [3, 5, 7])
+    assert x_pk.shape == (3, np.max(np.bincount(groups)))
+    for k, level in enumerate(levels):
+        n = np.sum(groups == level)
+        # the records of a group keep their order
+        np.testing.assert_array_equal(x_pk[k, :n], x[groups == level])
+        np.testing.assert_array_equal(y_pk[k, :n], y[groups == level])
+        assert np.all(np.isnan(y_pk[k, n:]))
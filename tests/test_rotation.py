@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.rotation import (
+    double_rotation,
+    interval_mean,
+    planar_fit,
+    planar_fit_rotation,
+)
+
+
+@pytest.fixture
+def tilted_wind():
+    """Winds of 60 intervals on a plane ``w = 0.02 + 0.05 u - 0.03 v``."""
+    rng = np.random.default_rng(5)
+    n_intervals, n_samples = 60, 500
+    speed = rng.uniform(1.0, 5.0, n_intervals)
+    direction = rng.uniform(0.0, 2 * np.pi, n_intervals)
+    u = speed * np.cos(direction)
+    v = speed * np.sin(direction)
+    w = 0.02 + 0.05 * u - 0.03 * v
+    mean = np.stack((u, v, w), axis=-1)
+    wind = mean[:, np.newaxis, :] + rng.normal(
+        scale=0.3, size=(n_intervals, n_samples, 3)
+    )
+    # remove the sample means of the noise to keep the plane exact
+    wind -= np.mean(wind, axis=1, keepdims=True) - mean[:, np.newaxis, :]
+    return wind
+
+
+def _double_rotation_loop(wind):
+    """Double rotation of one interval, as in Wilczak et al. (2001)."""
+    u, v, w = np.mean(wind, axis=0)
+    yaw = np.arctan2(v, u)
+    c, s = np.cos(yaw), np.sin(yaw)
+    wind = wind @ np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+    u, v, w = np.mean(wind, axis=0)
+    pitch = np.arctan2(w, u)
+    c, s = np.cos(pitch), np.sin(pitch)
+    return wind @ np.array([[c, 0, -s], [0, 1, 0], [s, 0, c]])
+
+
+def test_double_rotation_matches_loop(tilted_wind):
+    res = double_rotation(tilted_wind)
+    expected = np.stack([_double_rotation_loop(wind) for wind in tilted_wind])
+    np.testing.assert_allclose(res.wind, expected, atol=1e-12)
+    mean = np.mean(res.wind, axis=1)
+    np.testing.assert_allclose(mean[:, 1:], 0.0, atol=1e-12)
+    np.testing.assert_allclose(
+        np.linalg.norm(res.wind, axis=-1),
+        np.linalg.norm(tilted_wind, axis=-1),
+    )
+
+
+def test_rotation_with_boundaries(tilted_wind):
+    flat = tilted_wind.reshape(-1, 3)
+    boundaries = np.arange(0, flat.shape[0], tilted_wind.shape[1])
+    np.testing.assert_allclose(
+        interval_mean(flat, boundaries), interval_mean(tilted_wind)
+    )
+    res = double_rotation(tilted_wind)
+    res_flat = double_rotation(flat, boundaries)
+    np.testing.assert_allclose(res_flat.wind, res.wind.reshape(-1, 3))
+    fit = planar_fit(interval_mean(tilted_wind))
+    res = planar_fit_rotation(tilted_wind, fit)
+    res_flat = planar_fit_rotation(flat, fit, boundaries)
+    np.testing.assert_allclose(res_flat.wind, res.wind.reshape(-1, 3))
+
+
+def test_planar_fit_rotation(tilted_wind):
+    fit = planar_fit(interval_mean(tilted_wind), n_sectors=2)
+    np.testing.assert_allclose(fit.b0, 0.02)
+    np.testing.assert_allclose(fit.b1, 0.05)
+    np.testing.assert_allclose(fit.b2, -0.03)
+    res = planar_fit_rotation(tilted_wind, fit)
+    mean = np.mean(res.wind, axis=1)
+    np.testing.assert_allclose(mean[:, 1:], 0.0, atol=1e-12)
+    # orthonormal rotation matrices
+    np.testing.assert_allclose(
+        res.matrix @ np.swapaxes(res.matrix, -1, -2),
+        np.broadcast_to(np.eye(3), res.matrix.shape),
+        atol=1e-12,
+    )
+
+
+def test_planar_fit_sparse_sector(tilted_wind):
+    mean_wind = interval_mean(tilted_wind)
+    # no intervals from the 4th quadrant, and NaNs in one interval
+    mean_wind = mean_wind[(mean_wind[:, 0] < 0) | (mean_wind[:, 1] > 0)].copy()
+    mean_wind[0] = np.nan
+    fit_all = planar_fit(mean_wind)
+    fit = planar_fit(mean_wind, n_sectors=4)
+    for b, b_all in zip(fit, fit_all):
+        assert b[3] == b_all[0]
+        assert np.all(np.isfinite(b))
+    res = planar_fit_rotation(tilted_wind, fit)
+    assert np.all(np.isfinite(res.wind))
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import scipy.constants as sc
+
+from ecoflux.physchem.sat_vap import dew_temp, p_sat_h2o
+
+
+@pytest.mark.parametrize("method", ["gg", "buck", "cimo"])
+def test_dew_temp_round_trip(method):
+    temp = np.linspace(-40.0, 60.0, 101)
+    np.testing.assert_allclose(
+        dew_temp(p_sat_h2o(temp, method=method), method=method),
+        temp,
+        atol=1e-8,
+    )
+    frost = np.linspace(-60.0, 0.0, 61)
+    np.testing.assert_allclose(
+        dew_temp(
+            p_sat_h2o(frost, ice=True, method=method), method=method, ice=True
+        ),
+        frost,
+        atol=1e-8,
+    )
+
+
+def test_dew_temp_kelvin_and_guess():
+    e = p_sat_h2o(np.array([[5.0, 15.0], [25.0, 35.0]]))
+    T_dew = dew_temp(e)
+    assert T_dew.shape == (2, 2)
+    np.testing.assert_allclose(
+        dew_temp(e, kelvin=True), T_dew + sc.zero_Celsius
+    )
+    # the guess is in Celsius degree, also in Kelvin mode
+    np.testing.assert_allclose(
+        dew_temp(e, guess=20.0, kelvin=True), T_dew + sc.zero_Celsius
+    )
+    np.testing.assert_allclose(dew_temp(e, guess=20.0), T_dew)
+
+
+def test_dew_temp_invalid():
+    T_dew = dew_temp([0.0, -5.0, np.nan, 1000.0])
+    assert np.all(np.isnan(T_dew[:3]))
+    assert np.isfinite(T_dew[3])
+    # no frost temperature above the triple point
+    assert np.isnan(dew_temp(p_sat_h2o(5.0), ice=True))
+    assert np.isnan(dew_temp(1000.0, max_iter=0))
+
+
+@pytest.mark.parametrize("ice", [False, True])
+def test_p_sat_h2o_fast(ice):
+    temp = (
+        np.linspace(-99.0, 0.0, 1001)
+        if ice
+        else np.linspace(-99.0, 119.0, 2001)
+    )
+    exact = p_sat_h2o(temp, ice=ice)
+    fast = p_sat_h2o(temp, ice=ice, fast=True)
+    np.testing.assert_allclose(fast, exact, rtol=6e-7)
+    # out of the table range, the exact equation is used
+    assert p_sat_h2o(150.0, fast=True) == pytest.approx(p_sat_h2o(150.0))
+
+
+def test_p_sat_h2o_reference():
+    # saturation vapor pressure at the triple point and the boiling point
+    assert p_sat_h2o(0.01) == pytest.approx(611.657, rel=2e-3)
+    assert p_sat_h2o(100.0) == pytest.approx(101325.0, rel=1e-3)
+    assert p_sat_h2o(0.01, ice=True) == pytest.approx(611.657, rel=2e-3)
+    for method in ("buck", "cimo"):
+        assert p_sat_h2o(25.0, method=method) == pytest.approx(
+            p_sat_h2o(25.0), rel=2e-3
+        )
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from ecoflux.flux.spectra import (
+    cospectra,
+    log_bin,
+    log_freq_grid,
+    ogive,
+    spectra,
+)
+
+
+@pytest.fixture
+def intervals():
+    rng = np.random.default_rng(13)
+    n_intervals, n_samples = 4, 1200
+    w = rng.normal(size=(n_intervals, n_samples))
+    # a correlated scalar with a trend
+    c = 0.5 * w + rng.normal(size=w.shape) + np.linspace(0.0, 3.0, n_samples)
+    return w, c, 10.0
+
+
+@pytest.mark.parametrize("detrend", ["linear", "mean"])
+def test_spectra_matches_periodogram(intervals, detrend):
+    w, c, fs = intervals
+    scipy_detrend = "linear" if detrend == "linear" else "constant"
+    freq, psd = spectra(c, fs, detrend=detrend)
+    freq_ref, psd_ref = signal.periodogram(c, fs, detrend=scipy_detrend)
+    np.testing.assert_allclose(freq, freq_ref[1:])
+    np.testing.assert_allclose(psd, psd_ref[:, 1:], atol=1e-12)
+    # the spectra integrate to the variance of the fluctuations
+    fluc = signal.detrend(c, type=scipy_detrend)
+    np.testing.assert_allclose(
+        np.sum(psd, axis=-1) * (freq[1] - freq[0]), np.var(fluc, axis=-1)
+    )
+
+
+def test_cospectra_and_ogive(intervals):
+    w, c, fs = intervals
+    scalars = np.stack((c, -2.0 * c))
+    freq, cospec = cospectra(w, scalars, fs)
+    assert cospec.shape == (2,) + w.shape[:1] + freq.shape
+    fluc_w = signal.detrend(w)
+    fluc_c = signal.detrend(c)
+    cov = np.mean(fluc_w * fluc_c, axis=-1)
+    og = ogive(freq, cospec)
+    np.testing.assert_allclose(og[0, :, 0], cov)
+    np.testing.assert_allclose(og[1, :, 0], -2.0 * cov)
+    np.testing.assert_allclose(
+        og[..., -1], cospec[..., -1] * (freq[1] - freq[0])
+    )
+
+
+def test_spectra_taper_and_missing(intervals):
+    w, c, fs = intervals
+    freq, psd = spectra(w, fs, taper=True)
+    var = np.sum(psd, axis=-1) * (freq[1] - freq[0])
+    np.testing.assert_allclose(
+        var, np.var(signal.detrend(w), axis=-1), rtol=0.1
+    )
+    w = w.copy()
+    w[0, ::10] = np.nan
+    assert np.all(np.isfinite(spectra(w, fs).psd))
+    with pytest.raises(ValueError):
+        spectra(w, fs, detrend="quadratic")
+
+
+def test_log_bin(intervals):
+    w, c, fs = intervals
+    freq, psd = spectra(w, fs)
+    grid = log_freq_grid(w.shape[-1], fs, 30)
+    assert log_freq_grid(w.shape[-1], fs, 30) is grid
+    assert np.sum(grid.counts) == freq.size
+    assert np.all(np.diff(grid.freq) > 0.0)
+    bin_freq, binned = log_bin(psd, w.shape[-1], fs, 30)
+    np.testing.assert_array_equal(bin_freq, grid.freq)
+    for k, (start, count) in enumerate(zip(grid.starts, grid.counts)):
+        np.testing.assert_allclose(
+            binned[:, k], np.mean(psd[:, start : start + count], axis=-1)
+        )
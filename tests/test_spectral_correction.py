@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from scipy import integrate
+
+from ecoflux.flux.spectral_correction import (
+    kaimal_cospectrum,
+    spectral_correction_factor,
+    tf_block_average,
+    tf_first_order,
+    tf_scalar_path,
+    tf_separation,
+    tf_sonic_path,
+    tf_tube,
+)
+
+
+@pytest.mark.parametrize("zeta", [-1.0, 0.0, 0.5, 2.0])
+def test_kaimal_cospectrum_normalized(zeta):
+    total, _ = integrate.quad(
+        lambda ln_n: kaimal_cospectrum(np.exp(ln_n), zeta), -20, 20, limit=200
+    )
+    assert total == pytest.approx(1.0, abs=1e-3)
+
+
+def _factor_quad(u, z, zeta, fs, period, **kwargs):
+    """Reference correction factor integrated by quad for one half-hour."""
+
+    def transfer(f):
+        t = tf_block_average(f, period) * tf_first_order(f, kwargs["tau"])
+        t *= tf_sonic_path(f, u, kwargs["sonic_path"])
+        t *= tf_scalar_path(f, u, kwargs["scalar_path"])
+        t *= tf_separation(f, u, kwargs["separation"])
+        return t * tf_tube(f, *kwargs["tube"])
+
+    def integrand(ln_f, attenuated):
+        f = np.exp(ln_f)
+        model = kaimal_cospectrum(f * z / u, zeta)
+        return model * transfer(f) if attenuated else model
+
+    bounds = (np.log(0.1 / period), np.log(0.5 * fs))
+    model = integrate.quad(
+        integrand, *bounds, args=(False,), limit=400, epsrel=1e-6
+    )[0]
+    measured = integrate.quad(
+        integrand, *bounds, args=(True,), limit=400, epsrel=1e-6
+    )[0]
+    return model / measured
+
+
+def test_spectral_correction_factor_vs_quad():
+    setup = dict(
+        sonic_path=0.15,
+        scalar_path=0.125,
+        separation=0.2,
+        tau=0.1,
+        tube=(5.0, 0.002, 1e-4),
+    )
+    u = np.array([[1.0, 3.0], [5.0, 8.0]])
+    zeta = np.array([[-0.5, 0.1], [1.0, -0.05]])
+    factor = spectral_correction_factor(u, 3.0, zeta, 10.0, **setup)
+    assert factor.shape == u.shape
+    expected = [
+        _factor_quad(uu, 3.0, zz, 10.0, 1800.0, **setup)
+        for uu, zz in zip(u.ravel(), zeta.ravel())
+    ]
+    np.testing.assert_allclose(factor.ravel(), expected, rtol=5e-3)
+    assert np.all(factor > 1.0)
+
+
+def test_spectral_correction_factor_monotonic():
+    # slower sensors attenuate more and need larger corrections
+    factors = [
+        spectral_correction_factor(3.0, 3.0, 0.0, 10.0, tau=tau)
+        for tau in (0.0, 0.05, 0.1, 0.3)
+    ]
+    assert np.all(np.diff(factors) > 0.0)
+    # block averaging alone barely attenuates a 30 min flux
+    assert factors[0] == pytest.approx(1.0, abs=0.01)
+    # tau given as a scalar or a tuple
+    assert spectral_correction_factor(
+        3.0, 3.0, 0.0, 10.0, tau=(0.1,)
+    ) == pytest.approx(factors[2])
+
+
+def test_tf_tube_regimes():
+    freq = np.array([0.0, 0.1, 1.0, 5.0])
+    laminar = tf_tube(freq, 5.0, 0.002, 1e-5)
+    turbulent = tf_tube(freq, 5.0, 0.002, 2e-4)
+    for tf in (laminar, turbulent):
+        assert tf[0] == 1.0
+        assert np.all(np.diff(tf) < 0.0)
@@ -0,0 +1,186 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+from ecoflux.leaf.photosynthesis import fvcb
+from ecoflux.leaf.stom_cond import (
+    coupled_stom_cond,
+    fit_ball_berry,
+    fit_medlyn,
+)
+from ecoflux.physchem.sat_vap import p_sat_h2o
+
+
+def _coupled_reference(co2, temp, par, vcmax25, jmax25, rd25, g0, slope, g_b):
+    """Solve the coupled model for c_i by bracketing, point by point."""
+
+    def supply_gap(c_i):
+        a_n = fvcb(c_i, temp, vcmax25, jmax25, rd25, par=par).a_n
+        c_s = co2 - a_n / g_b
+        g_s = g0 + slope * max(a_n, 0.0) / c_s
+        return co2 - c_i - a_n * (1.0 / g_b + 1.6 / g_s)
+
+    with np.errstate(divide="ignore"):
+        c_i = optimize.brentq(supply_gap, 50.0, co2, xtol=1e-12)
+    return fvcb(c_i, temp, vcmax25, jmax25, rd25, par=par).a_n, c_i
+
+
+@pytest.mark.parametrize("bl_cond", [None, 1.5])
+@pytest.mark.parametrize(
+    "co2, temp, par",
+    [(400.0, 25.0, 1500.0), (400.0, 30.0, 300.0), (800.0, 18.0, 900.0)],
+)
+def test_coupled_stom_cond_ball_berry(co2, temp, par, bl_cond):
+    res = coupled_stom_cond(
+        co2, temp, par, 60.0, 120.0, 1.0, 0.01, 9.0, rh=0.7, bl_cond=bl_cond
+    )
+    g_b = np.inf if bl_cond is None else bl_cond / 1.37
+    a_n, c_i = _coupled_reference(
+        co2, temp, par, 60.0, 120.0, 1.0, 0.01, 9.0 * 0.7, g_b
+    )
+    assert res.a_n == pytest.approx(a_n, rel=1e-8)
+    assert res.c_i == pytest.approx(c_i, rel=1e-8)
+    # consistency with the photosynthesis and conductance models
+    assert res.c_s == pytest.approx(co2 - res.a_n / g_b)
+    assert res.g_s == pytest.approx(0.01 + 9.0 * 0.7 * res.a_n / res.c_s)
+    assert fvcb(res.c_i, temp, 60.0, 120.0, 1.0, par=par).a_n == pytest.approx(
+        res.a_n
+    )
+
+
+def test_coupled_stom_cond_medlyn():
+    vpd = np.array([0.5, 1.5, 3.0])
+    res = coupled_stom_cond(
+        400.0,
+        25.0,
+        1200.0,
+        60.0,
+        120.0,
+        1.0,
+        0.0,
+        4.0,
+        model="medlyn",
+        vpd=vpd,
+    )
+    slope = 1.6 * (1.0 + 4.0 / np.sqrt(vpd))
+    for i in range(3):
+        a_n, c_i = _coupled_reference(
+            400.0, 25.0, 1200.0, 60.0, 120.0, 1.0, 0.0, slope[i], np.inf
+        )
+        assert res.a_n[i] == pytest.approx(a_n, rel=1e-8)
+        assert res.c_i[i] == pytest.approx(c_i, rel=1e-8)
+    # stomata close with increasing VPD
+    assert np.all(np.diff(res.g_s) < 0.0)
+
+
+def test_coupled_stom_cond_tpu_and_dark():
+    par = np.array([1500.0, 1500.0, 0.0])
+    res = coupled_stom_cond(
+        [400.0, 1000.0, 400.0],
+        25.0,
+        par,
+        60.0,
+        120.0,
+        1.0,
+        0.02,
+        9.0,
+        rh=0.7,
+        tpu25=5.0,
+    )
+    # TPU-limited at high CO2
+    assert res.a_n[1] == pytest.approx(15.0 - 1.0)
+    # respiration only in the dark, with the residual conductance
+    assert res.a_n[2] == pytest.approx(-1.0)
+    assert res.g_s[2] == pytest.approx(0.02)
+    assert res.c_i[2] == pytest.approx(400.0 + 1.6 * 1.0 / 0.02)
+    np.testing.assert_allclose(
+        fvcb(
+            res.c_i,
+            25.0,
+            60.0,
+            120.0,
+            1.0,
+            tpu25=5.0,
+            par=par,
+        ).a_n,
+        res.a_n,
+    )
+
+
+def test_coupled_stom_cond_inputs():
+    with pytest.raises(ValueError):
+        coupled_stom_cond(400.0, 25.0, 1000.0, 60.0, 120.0, 1.0, 0.01, 9.0)
+    with pytest.raises(ValueError):
+        coupled_stom_cond(
+            400.0, 25.0, 1000.0, 60.0, 120.0, 1.0, 0.01, 4.0, model="medlyn"
+        )
+    with pytest.raises(ValueError):
+        coupled_stom_cond(
+            400.0, 25.0, 1000.0, 60.0, 120.0, 1.0, 0.01, 9.0, model="x", rh=0.5
+        )
+
+
+@pytest.fixture
+def leaf_conditions():
+    rng = np.random.default_rng(6)
+    n = 60
+    return dict(
+        groups=np.repeat(["a", "b", "c"], n // 3),
+        co2=rng.uniform(300.0, 800.0, n),
+        temp=rng.uniform(18.0, 32.0, n),
+        par=rng.uniform(300.0, 1800.0, n),
+        humidity=rng.uniform(0.4, 0.9, n),
+        vpd=rng.uniform(0.5, 3.0, n),
+        g1=np.repeat([3.0, 4.0, 5.0], n // 3),
+    )
+
+
+def test_fit_ball_berry_round_trip(leaf_conditions):
+    c = leaf_conditions
+    res = coupled_stom_cond(
+        c["co2"],
+        c["temp"],
+        c["par"],
+        60.0,
+        120.0,
+        1.0,
+        0.02,
+        2.0 * c["g1"],
+        rh=c["humidity"],
+        bl_cond=2.0,
+    )
+    # transpiration from the saturated leaf to the surface humidity
+    E = res.g_s * p_sat_h2o(c["temp"]) * (1.0 - c["humidity"]) / 1e5
+    fit = fit_ball_berry(
+        c["groups"], res.a_n, E, 1e5, c["temp"], res.g_s, 2.0, c["co2"]
+    )
+    np.testing.assert_array_equal(fit.group, ["a", "b", "c"])
+    np.testing.assert_allclose(fit.g0, 0.02, atol=1e-10)
+    np.testing.assert_allclose(fit.g1, [6.0, 8.0, 10.0])
+    np.testing.assert_allclose(fit.rvalue, 1.0)
+    np.testing.assert_array_equal(fit.count, 20)
+
+
+def test_fit_medlyn_round_trip(leaf_conditions):
+    c = leaf_conditions
+    res = coupled_stom_cond(
+        c["co2"],
+        c["temp"],
+        c["par"],
+        60.0,
+        120.0,
+        1.0,
+        0.01,
+        c["g1"],
+        model="medlyn",
+        vpd=c["vpd"],
+        bl_cond=2.0,
+    )
+    E = res.g_s * c["vpd"] * 1e3 / 1e5
+    A_n = res.a_n.copy()
+    A_n[0] = np.nan
+    fit = fit_medlyn(c["groups"], A_n, E, 1e5, res.g_s, 2.0, c["co2"])
+    np.testing.assert_allclose(fit.g0, 0.01, atol=1e-10)
+    np.testing.assert_allclose(fit.g1, [3.0, 4.0, 5.0])
+    np.testing.assert_array_equal(fit.count, [19, 20, 20])
+    assert np.all(fit.g1_stderr < 1e-6)
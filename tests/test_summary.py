@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from ecoflux.stats.summary import RunningStats
+
+
+def test_running_stats_matches_numpy_on_chunks():
+    rng = np.random.default_rng(0)
+    x = rng.normal(3.0, 2.0, (1000, 3))
+    x[rng.random(x.shape) < 0.05] = np.nan
+    rs = RunningStats()
+    for chunk in np.array_split(x, 7):
+        rs.update(chunk)
+    np.testing.assert_array_equal(rs.count, np.sum(np.isfinite(x), axis=0))
+    np.testing.assert_allclose(rs.mean, np.nanmean(x, axis=0))
+    np.testing.assert_allclose(rs.std(), np.nanstd(x, axis=0, ddof=1))
+    np.testing.assert_allclose(rs.min, np.nanmin(x, axis=0))
+    np.testing.assert_allclose(rs.max, np.nanmax(x, axis=0))
+    both = np.all(np.isfinite(x[:, :2]), axis=1)
+    np.testing.assert_allclose(
+        rs.cov()[0, 1], np.cov(x[both, 0], x[both, 1])[0, 1]
+    )
+
+
+def test_running_stats_merge_equals_single_pass():
+    rng = np.random.default_rng(1)
+    x = rng.normal(1e6, 1.0, 500)
+    merged = RunningStats(x[:123]).merge(RunningStats(x[123:]))
+    single = RunningStats(x)
+    assert merged.count == single.count == 500
+    assert merged.mean == pytest.approx(np.mean(x), rel=1e-12)
+    assert merged.var() == pytest.approx(np.var(x, ddof=1), rel=1e-9)
+
+
+def test_running_stats_empty():
+    rs = RunningStats()
+    assert rs.count == 0
+    for value in (rs.mean, rs.min, rs.max, rs.var(), rs.std(), rs.cov()):
+        assert np.isnan(value)
+    rs.update([])
+    assert rs.count == 0
+    rs.update([1.0, 2.0, 3.0])
+    assert (rs.count, rs.mean, rs.std()) == (3, 2.0, 1.0)
+
+
+def test_running_stats_rejects_mismatched_chunks():
+    rs = RunningStats(np.zeros((4, 2)))
+    with pytest.raises(ValueError):
+        rs.update(np.zeros((4, 3)))
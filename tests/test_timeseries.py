@@ -0,0 +1,251 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from ecoflux.stats.summary import mad, zscore
+from ecoflux.stats.timeseries import (
+    binned_stats,
+    extract_window,
+    hourly_avg,
+    hourly_median,
+    rolling_apply,
+    rolling_window,
+    running_mad,
+    running_moments,
+    running_median,
+    running_std,
+    running_zscore,
+)
+
+
+def _windows(series, window_size):
+    """Windows of the original per-index implementation."""
+    left_size = (int(window_size) - 1) // 2
+    right_size = window_size - 1 - left_size
+    return [
+        series[extract_window(series, i, left_size, right_size)]
+        for i in range(series.size)
+    ], left_size
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.normal(size=500)) + 1e3
+    x[rng.random(x.size) < 0.05] = np.nan
+    return x
+
+
+@pytest.mark.parametrize("window_size", [1, 2, 7, 48])
+def test_running_std_matches_window_loop(series, window_size):
+    windows, _ = _windows(series, window_size)
+    with warnings.catch_warnings():
+        # all-NaN and single-value windows
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = np.array([np.nanstd(w, ddof=1) for w in windows])
+    np.testing.assert_allclose(
+        running_std(series, window_size), expected, rtol=1e-8, atol=1e-10
+    )
+
+
+@pytest.mark.parametrize("window_size", [5, 48])
+def test_running_zscore_matches_window_loop(series, window_size):
+    windows, left_size = _windows(series, window_size)
+    expected = np.array([zscore(w)[left_size] for w in windows])
+    np.testing.assert_allclose(
+        running_zscore(series, window_size), expected, rtol=1e-8, atol=1e-10
+    )
+
+
+@pytest.mark.parametrize("window_size", [5, 48])
+def test_running_std_constant_segment(series, window_size):
+    x = series.copy()
+    x[100:250] = 1003.25
+    x[300:400] = 987.5
+    windows, left_size = _windows(x, window_size)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        std = np.array([np.nanstd(w, ddof=1) for w in windows])
+        z = np.array([zscore(w)[left_size] for w in windows])
+    constant = std == 0.0
+    assert np.sum(constant) > 150
+    np.testing.assert_array_equal(running_std(x, window_size)[constant], 0.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        np.testing.assert_allclose(
+            running_zscore(x, window_size), z, rtol=1e-8, atol=1e-10
+        )
+
+
+def test_running_moments_2d(series):
+    x = np.column_stack((series, series[::-1] * 2.0))
+    res = running_moments(x, 7)
+    assert res.count.shape == res.mean.shape == res.sq_dev.shape == x.shape
+    for k in range(x.shape[1]):
+        windows, _ = _windows(x[:, k], 7)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean = np.array([np.nanmean(w) for w in windows])
+            sq_dev = np.array(
+                [np.nansum((w - np.nanmean(w)) ** 2) for w in windows]
+            )
+        np.testing.assert_array_equal(
+            res.count[:, k], [np.sum(np.isfinite(w)) for w in windows]
+        )
+        np.testing.assert_allclose(res.mean[:, k], mean, rtol=1e-12)
+        np.testing.assert_allclose(res.sq_dev[:, k], sq_dev, rtol=1e-7)
+    with pytest.raises(ValueError):
+        running_moments(series[:5], 6)
+
+
+def test_running_std_rejects_large_window(series):
+    with pytest.raises(ValueError):
+        running_std(series[:5], 6)
+
+
+@pytest.mark.parametrize("window_size", [1, 4, 9, 48])
+def test_running_median_and_mad_match_window_loop(series, window_size):
+    windows, _ = _windows(series, window_size)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.array([np.nanmedian(w) for w in windows])
+        mad_expected = np.array([mad(w) for w in windows])
+    np.testing.assert_allclose(running_median(series, window_size), median)
+    np.testing.assert_allclose(running_mad(series, window_size), mad_expected)
+
+
+def test_running_median_with_ties_and_all_nan_window():
+    x = np.array([1.0, 1.0, np.nan, np.nan, np.nan, 2.0, 2.0, 2.0, 5.0])
+    windows, _ = _windows(x, 3)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = np.array([np.nanmedian(w) for w in windows])
+    np.testing.assert_array_equal(running_median(x, 3), expected)
+
+
+@pytest.mark.parametrize("window_size", [2, 3, 10, 31])
+def test_running_median_with_many_nans(window_size):
+    rng = np.random.default_rng(4)
+    x = rng.integers(0, 8, 400).astype(float)
+    x[rng.random(x.size) < 0.4] = np.nan
+    x[150:190] = np.nan
+    x[-3:] = np.nan
+    windows, _ = _windows(x, window_size)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.array([np.nanmedian(w) for w in windows])
+        mad_expected = np.array([mad(w) for w in windows])
+    np.testing.assert_array_equal(running_median(x, window_size), median)
+    np.testing.assert_array_equal(running_mad(x, window_size), mad_expected)
+
+
+@pytest.mark.parametrize("window_size", [5, 48])
+def test_robust_running_zscore_matches_window_loop(series, window_size):
+    windows, left_size = _windows(series, window_size)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = np.array(
+            [zscore(w, robust_zscore=True)[left_size] for w in windows]
+        )
+    np.testing.assert_allclose(
+        running_zscore(series, window_size, robust_zscore=True),
+        expected,
+        rtol=1e-10,
+    )
+
+
+@pytest.fixture
+def hourly_series():
+    rng = np.random.default_rng(2)
+    hours = np.tile(np.arange(0, 24, 0.5), 20).astype(int)
+    x = np.sin(hours / 24.0 * 2 * np.pi) + rng.normal(size=hours.size)
+    x[rng.random(x.size) < 0.1] = np.nan
+    # an hour without data
+    x[hours == 3] = np.nan
+    return hours, x
+
+
+@pytest.mark.parametrize("all_hours", [True, False])
+def test_hourly_stats_match_hour_loop(hourly_series, all_hours):
+    hours, x = hourly_series
+    hours, x = hours[hours != 5], x[hours != 5]
+    level = np.arange(24) if all_hours else np.unique(hours)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = np.array(
+            [
+                [
+                    np.nanmean(x[hours == h]),
+                    np.nanstd(x[hours == h], ddof=1),
+                    np.nanmedian(x[hours == h]),
+                    np.nanpercentile(x[hours == h], 25.0),
+                    np.nanpercentile(x[hours == h], 75.0),
+                ]
+                for h in level
+            ]
+        )
+    med = hourly_median(hours, x, all_hours)
+    avg = hourly_avg(hours, x, all_hours)
+    np.testing.assert_array_equal(med.hour_level, level)
+    np.testing.assert_allclose(avg.avg, expected[:, 0])
+    np.testing.assert_allclose(avg.std, expected[:, 1])
+    np.testing.assert_allclose(med.median, expected[:, 2])
+    np.testing.assert_allclose(med.q1, expected[:, 3])
+    np.testing.assert_allclose(med.q3, expected[:, 4])
+
+
+def test_binned_stats_multiple_keys_and_variables(hourly_series):
+    hours, x = hourly_series
+    day = np.repeat(np.arange(20), 48)
+    data = np.column_stack((x, 2.0 * x))
+    res = binned_stats((day % 2, hours), data, ddof=0)
+    assert res.level.shape == (48, 2)
+    for i, (parity, h) in enumerate(res.level):
+        sel = (day % 2 == parity) & (hours == h)
+        for j in range(2):
+            values = data[sel, j][np.isfinite(data[sel, j])]
+            assert res.count[i, j] == values.size
+            if values.size:
+                assert res.avg[i, j] == pytest.approx(np.mean(values))
+                assert res.std[i, j] == pytest.approx(np.std(values))
+                assert res.median[i, j] == pytest.approx(np.median(values))
+    # records of keys not in the levels are ignored
+    res = binned_stats(hours, x, levels=[1, 2, 30])
+    assert res.count[2] == 0
+    assert np.isnan(res.avg[2])
+
+
+@pytest.mark.parametrize("window_size", [1, 4, 9])
+def test_rolling_window_matches_extract_window(series, window_size):
+    windows, _ = _windows(series, window_size)
+    view = rolling_window(series, window_size)
+    assert view.shape == series.shape + (window_size,)
+    # a read-only strided view, in which consecutive windows overlap
+    assert not view.flags.writeable
+    assert view.strides == (series.itemsize, series.itemsize)
+    np.testing.assert_array_equal(view, np.array(windows))
+    # windows along the first axis of a 2D series
+    data = np.column_stack((series, -series))
+    view = rolling_window(data, window_size)
+    assert view.shape == data.shape + (window_size,)
+    np.testing.assert_array_equal(view[:, 1], -np.array(windows))
+
+
+@pytest.mark.parametrize(
+    "chunk_size, n_workers", [(None, None), (37, None), (37, 4)]
+)
+def test_rolling_apply_matches_window_loop(series, chunk_size, n_workers):
+    windows, _ = _windows(series, 9)
+    expected = np.array([np.nanpercentile(w, 90.0) for w in windows])
+    result = rolling_apply(
+        series,
+        9,
+        np.nanpercentile,
+        chunk_size=chunk_size,
+        n_workers=n_workers,
+        q=90.0,
+    )
+    np.testing.assert_allclose(result, expected)
+    with pytest.raises(ValueError):
+        rolling_apply(series[:5], 9, np.nanmean)
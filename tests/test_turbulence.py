@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.turbulence import (
+    obukhov_length,
+    potential_temp,
+    psi_h,
+    psi_m,
+    turbulence_params,
+)
+
+
+def test_potential_temp():
+    assert potential_temp(20.0, 1e5) == pytest.approx(293.15)
+    # dry adiabatic: theta = T (p_0 / p)^(R_d / c_p), R_d / c_p ~ 0.286
+    assert potential_temp(280.0, 9e4, kelvin=True) == pytest.approx(
+        280.0 * (1e5 / 9e4) ** 0.2857, rel=1e-4
+    )
+
+
+def test_obukhov_length_pressure():
+    length = obukhov_length(0.3, 0.1, 20.0)
+    assert length == pytest.approx(-(0.3**3) * 293.15 / (0.4 * 9.80665 * 0.1))
+    length_p = obukhov_length(0.3, 0.1, 20.0, pressure=9e4)
+    assert length_p / length == pytest.approx(
+        potential_temp(20.0, 9e4) / 293.15
+    )
+    assert obukhov_length(0.3, 0.0, 20.0) == -np.inf
+
+
+def test_psi_functions():
+    zeta = np.array([-2.0, -0.5, -0.01, 0.0, 0.3])
+    x = (1.0 - 16.0 * zeta[:3]) ** 0.25
+    expected_m = (
+        np.log((1.0 + x) ** 2 * (1.0 + x**2) / 8.0)
+        - 2.0 * np.arctan(x)
+        + np.pi / 2
+    )
+    expected_h = 2.0 * np.log((1.0 + x**2) / 2.0)
+    np.testing.assert_allclose(psi_m(zeta[:3]), expected_m)
+    np.testing.assert_allclose(psi_h(zeta[:3]), expected_h)
+    np.testing.assert_allclose(psi_m(zeta[3:]), [0.0, -1.5])
+    np.testing.assert_allclose(psi_h(zeta[3:]), [0.0, -1.5])
+
+
+def test_turbulence_params():
+    cov_uw = np.array([-0.09, -0.04, -0.01])
+    cov_w_ts = np.array([0.1, 0.0, -0.02])
+    tp = turbulence_params(cov_uw, 0.0, cov_w_ts, 20.0, 3.0, d=0.5)
+    np.testing.assert_allclose(tp.u_star, [0.3, 0.2, 0.1])
+    np.testing.assert_allclose(
+        tp.obukhov_length, obukhov_length(tp.u_star, cov_w_ts, 20.0)
+    )
+    np.testing.assert_allclose(tp.zeta, 2.5 / tp.obukhov_length)
+    np.testing.assert_array_equal(np.sign(tp.zeta), [-1, 0, 1])
+    np.testing.assert_allclose(tp.psi_m, psi_m(tp.zeta))
+    np.testing.assert_allclose(tp.psi_h, psi_h(tp.zeta))
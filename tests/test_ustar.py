@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from ecoflux.flux.ustar import ustar_threshold
+
+
+def _threshold_loop(u_star, nee, temp, n_temp, n_ustar):
+    """Reference moving point test of one season with explicit loops."""
+    order = np.argsort(temp, kind="stable")
+    class_thresholds = []
+    for cls in np.array_split(order, n_temp):
+        if (
+            cls.size < 3 * n_ustar
+            or abs(np.corrcoef(temp[cls], u_star[cls])[0, 1]) >= 0.4
+        ):
+            continue
+        cls = cls[np.argsort(u_star[cls], kind="stable")]
+        bins = [
+            cls[i * cls.size // n_ustar : (i + 1) * cls.size // n_ustar]
+            for i in range(n_ustar)
+        ]
+        for i in range(n_ustar - 1):
+            higher = np.mean([np.mean(nee[b]) for b in bins[i + 1 :]])
+            if np.mean(nee[bins[i]]) >= 0.99 * higher:
+                class_thresholds.append(np.mean(u_star[bins[i]]))
+                break
+    return np.median(class_thresholds) if class_thresholds else np.nan
+
+
+@pytest.fixture
+def night():
+    rng = np.random.default_rng(3)
+    n = 6000
+    u_star = rng.uniform(0.02, 0.8, n)
+    temp = rng.uniform(0.0, 25.0, n)
+    season = rng.integers(0, 2, n)
+    thresholds = np.array([0.2, 0.3])[season]
+    reco = 2.0 * np.exp(0.07 * temp)
+    nee = reco * np.minimum(u_star / thresholds, 1.0)
+    nee += rng.normal(scale=0.05, size=n)
+    nee[::50] = np.nan
+    return u_star, nee, temp, season
+
+
+def test_ustar_threshold(night):
+    u_star, nee, temp, season = night
+    res = ustar_threshold(u_star, nee, temp, season)
+    np.testing.assert_array_equal(res.season, [0, 1])
+    np.testing.assert_allclose(res.season_threshold, [0.2, 0.3], atol=0.03)
+    assert res.threshold == res.season_threshold[1]
+    assert res.bootstrap.shape == (0,)
+    for k in range(2):
+        sel = (season == k) & np.isfinite(nee)
+        expected = _threshold_loop(u_star[sel], nee[sel], temp[sel], 6, 20)
+        assert res.season_threshold[k] == pytest.approx(expected)
+
+
+def test_ustar_threshold_not_found(night):
+    u_star, nee, temp, _ = night
+    # no u* dependence: the first class already reaches the plateau
+    flat = ustar_threshold(u_star, 2.0 * np.exp(0.07 * temp), temp)
+    assert flat.threshold < 0.1
+    # u* correlated with temperature in every class
+    res = ustar_threshold(u_star, nee, u_star)
+    assert np.isnan(res.threshold)
+    # too few records
+    res = ustar_threshold(u_star[:50], nee[:50], temp[:50])
+    assert np.isnan(res.threshold)
+
+
+def test_ustar_threshold_bootstrap(night):
+    u_star, nee, temp, season = night
+    res = ustar_threshold(u_star, nee, temp, season, n_boot=8, seed=42)
+    assert res.bootstrap.shape == (8,)
+    assert np.all(np.isfinite(res.bootstrap))
+    np.testing.assert_allclose(np.median(res.bootstrap), 0.3, atol=0.05)
+    again = ustar_threshold(u_star, nee, temp, season, n_boot=8, seed=42)
+    np.testing.assert_array_equal(again.bootstrap, res.bootstrap)
+    parallel = ustar_threshold(
+        u_star, nee, temp, season, n_boot=8, seed=42, n_workers=3
+    )
+    np.testing.assert_array_equal(parallel.bootstrap, res.bootstrap)